@@ -0,0 +1,80 @@
+# scripts/benchmark_calendar_writes.py
+# Throughput of conflict-checked calendar bookings as writer threads are added,
+# comparing one global write lock (a single stripe, like the old storage_lock
+# pattern) with per-day striped locks. Each booking sleeps --persist-ms inside
+# the critical section to stand in for the Calendar API insert.
+#
+#   python scripts/benchmark_calendar_writes.py --bookings 400 --persist-ms 2
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from riley2.core.calendar_store import WRITE_LOCK_STRIPES, CalendarStore, CalendarWriter
+from riley2.core.logger_utils import logger
+
+THREAD_COUNTS = (1, 2, 4, 8, 16)
+
+
+def make_bookings(count, days):
+    """Half-hour meetings spread round-robin over `days` days, every tenth one a double booking."""
+    bookings = []
+    for i in range(count):
+        day = f"2025/{6 + (i % days) // 28:02d}/{(i % days) % 28 + 1:02d}"
+        slot = (i // days) % 16 if i % 10 else max((i // days) % 16 - 1, 0)
+        hour, half = divmod(slot, 2)
+        start = f"{8 + hour:02d}:{30 * half:02d}"
+        end = f"{8 + hour + half:02d}:{30 * (1 - half):02d}"
+        bookings.append({"title": f"Booking {i}", "date": day, "start_time": start, "end_time": end})
+    return bookings
+
+
+def run(bookings, threads, stripes, persist_ms):
+    def persist(event):
+        time.sleep(persist_ms / 1000)
+        return event
+
+    writer = CalendarWriter(CalendarStore(), stripes=stripes, persist=persist)
+    shards = [bookings[i::threads] for i in range(threads)]
+    outcomes = []
+
+    def worker(shard):
+        outcomes.extend(writer.create(event)["status"] for event in shard)
+
+    workers = [threading.Thread(target=worker, args=(shard,)) for shard in shards]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(bookings) / elapsed, outcomes.count("conflict")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=400)
+    parser.add_argument("--days", type=int, default=56)
+    parser.add_argument("--persist-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+    # Every double booking logs a conflict warning; keep the table readable
+    logger.setLevel(logging.ERROR)
+
+    bookings = make_bookings(args.bookings, args.days)
+    print(f"\n📊 {args.bookings} bookings over {args.days} days, {args.persist_ms:g} ms persist\n")
+    print(f"{'threads':>7}  {'global lock':>14}  {'striped':>14}  conflicts")
+    for threads in THREAD_COUNTS:
+        global_rate, conflicts = run(bookings, threads, 1, args.persist_ms)
+        striped_rate, striped_conflicts = run(bookings, threads, WRITE_LOCK_STRIPES, args.persist_ms)
+        assert conflicts == striped_conflicts, "Striping must not change which bookings conflict"
+        print(f"{threads:>7}  {global_rate:>10.0f} /s  {striped_rate:>10.0f} /s  {conflicts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# scripts/benchmark_logging.py
+# Microbenchmark for the CPU and allocation cost of hot-path debug logging:
+# eager f-strings versus deferred, size-capped Payload arguments, with DEBUG
+# enabled and disabled.
+
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from riley2.core.logger_utils import Payload
+
+ITERATIONS = 2000
+
+# Shaped like what the hot paths log: a full planner prompt and an email batch
+PROMPT = "You are Riley2's Backend Manager LLM.\n" + "Available tools: calendar_scan, email_download_chunk\n" * 40
+EMAIL_BATCH = "\n---\n".join(f"From: sender{i}@example.com\nSubject: Update {i}\n" + "snippet " * 30 for i in range(20))
+TOOL_OUTPUT = {"events": [{"title": f"Event {i}", "date": "2025/05/12"} for i in range(200)]}
+
+class FormattingHandler(logging.Handler):
+    """Formats every record like a real handler would, then discards it."""
+    def emit(self, record):
+        self.format(record)
+
+def make_logger(level):
+    bench_logger = logging.getLogger(f"riley2_bench_{logging.getLevelName(level)}")
+    bench_logger.handlers.clear()
+    bench_logger.propagate = False
+    handler = FormattingHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    bench_logger.addHandler(handler)
+    bench_logger.setLevel(level)
+    return bench_logger
+
+def eager(bench_logger):
+    import json
+    bench_logger.debug(f"Planner prompt: {PROMPT}")
+    bench_logger.debug(f"Email batch: {EMAIL_BATCH}")
+    bench_logger.debug(f"Tool outputs: {json.dumps(TOOL_OUTPUT, default=str)}")
+
+def deferred(bench_logger):
+    bench_logger.debug("Planner prompt: %s", Payload(PROMPT))
+    bench_logger.debug("Email batch: %s", Payload(EMAIL_BATCH))
+    if bench_logger.isEnabledFor(logging.DEBUG):
+        bench_logger.debug("Tool outputs: %s", Payload(TOOL_OUTPUT))
+
+def measure(fn, bench_logger):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(bench_logger)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in range(100):
+        fn(bench_logger)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / ITERATIONS * 1e6, peak
+
+def main():
+    print(f"\n📊 Logging microbenchmark ({ITERATIONS} iterations, 3 debug calls each)\n")
+    print(f"{'mode':<10} {'level':<8} {'µs/iter':>10} {'peak alloc':>12}")
+    for level in (logging.DEBUG, logging.INFO):
+        bench_logger = make_logger(level)
+        for name, fn in (("eager", eager), ("deferred", deferred)):
+            us, peak = measure(fn, bench_logger)
+            print(f"{name:<10} {logging.getLevelName(level):<8} {us:>10.1f} {peak / 1024:>10.1f}KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# scripts/benchmark_routing.py
+# Measures misroute rate and per-query latency of the chat/work router
+# against the labelled query set in data/routing_queries.json, and
+# leave-one-out accuracy and latency of the local tool intent model
+# trained from data/intent_corpus.json.
+
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from riley2.core.query_classifier import classify_query
+from riley2.core.intent_classifier import DEFAULT_CONFIDENCE_THRESHOLD, IntentClassifier, load_intent_corpus
+
+LABELLED_QUERIES = os.path.join(BASE_DIR, 'data', 'routing_queries.json')
+
+LEGACY_SOCIAL_KEYWORDS = [
+    "hi", "hello", "how are you", "joke", "tell me", "chat",
+    "conversation", "what can you do", "what controls", "what tools", "how can you help"
+]
+
+def legacy_classify_query(query):
+    """The original substring matcher, kept here as the benchmark baseline."""
+    lowered = query.lower()
+    if any(word in lowered for word in LEGACY_SOCIAL_KEYWORDS):
+        return "chat"
+    return "work"
+
+def load_labelled_queries(path=LABELLED_QUERIES):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def benchmark(classifier, samples, repeats=200):
+    misroutes = [s for s in samples if classifier(s["query"]) != s["label"]]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sample in samples:
+            classifier(sample["query"])
+    elapsed = time.perf_counter() - start
+    return {
+        "misroute_rate": len(misroutes) / len(samples),
+        "misroutes": [s["query"] for s in misroutes],
+        "us_per_query": elapsed / (repeats * len(samples)) * 1e6,
+    }
+
+def main():
+    samples = load_labelled_queries()
+    print(f"\n📊 Routing benchmark over {len(samples)} labelled queries\n")
+    for name, classifier in [("legacy substring", legacy_classify_query), ("compiled regex", classify_query)]:
+        report = benchmark(classifier, samples)
+        print(f"{name:<18} misroute rate: {report['misroute_rate']:.1%}   latency: {report['us_per_query']:.1f} µs/query")
+        for query in report["misroutes"]:
+            print(f"    ✗ {query}")
+
+INTENT_THRESHOLDS = (0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3)
+
+def leave_one_out_predictions(samples):
+    """Train on every sample but one and predict the held-out one, with no threshold applied."""
+    predictions = []
+    predict_seconds = 0.0
+    for i, sample in enumerate(samples):
+        model = IntentClassifier(threshold=0.0).fit(samples[:i] + samples[i + 1:])
+        start = time.perf_counter()
+        label, confidence = model.predict(sample["query"])
+        predict_seconds += time.perf_counter() - start
+        predictions.append((label, confidence, sample["label"]))
+    return predictions, predict_seconds / len(samples) * 1e6
+
+def benchmark_intent_model(predictions, threshold):
+    confident = [(label, truth) for label, confidence, truth in predictions
+                 if label is not None and confidence >= threshold]
+    wrong = sum(1 for label, truth in confident if label != truth)
+    return {
+        "accuracy_when_confident": (len(confident) - wrong) / len(confident) if confident else 0.0,
+        "misrouted": wrong,
+        "fallback_rate": 1 - len(confident) / len(predictions),
+    }
+
+def main_intent():
+    samples = load_intent_corpus()
+    predictions, us_per_query = leave_one_out_predictions(samples)
+    print(f"\n📊 Intent model leave-one-out over {len(samples)} labelled queries ({us_per_query:.1f} µs/query)\n")
+    print(f"{'threshold':>9} {'accuracy':>9} {'misrouted':>10} {'LLM fallback':>13}")
+    for threshold in INTENT_THRESHOLDS:
+        report = benchmark_intent_model(predictions, threshold)
+        marker = "  <- DEFAULT_CONFIDENCE_THRESHOLD" if threshold == DEFAULT_CONFIDENCE_THRESHOLD else ""
+        print(f"{threshold:>9.2f} {report['accuracy_when_confident']:>9.1%} {report['misrouted']:>10} "
+              f"{report['fallback_rate']:>13.1%}{marker}")
+
+if __name__ == "__main__":
+    main()
+    main_intent()
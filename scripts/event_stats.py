@@ -0,0 +1,40 @@
+# scripts/event_stats.py
+# Aggregates the structured event log (riley2_events.jsonl) into per-stage
+# latency percentiles, optionally restricted to one stage or one trace.
+
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from riley2.core.event_log import EVENT_LOG_PATH, latency_percentiles, read_events
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency percentiles per stage from the riley2 event log")
+    parser.add_argument("path", nargs="?", default=EVENT_LOG_PATH, help="JSON-lines event log")
+    parser.add_argument("--stage", help="Only report this stage")
+    parser.add_argument("--trace", help="Only include events from this trace_id")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ No event log at {args.path}")
+        sys.exit(1)
+
+    events = (e for e in read_events(args.path)
+              if (not args.stage or e.get("stage") == args.stage)
+              and (not args.trace or e.get("trace_id") == args.trace))
+    summary = latency_percentiles(events)
+    if not summary:
+        print("No timed events found.")
+        return
+
+    print(f"\n📊 Stage latency (ms) from {args.path}\n")
+    print(f"{'stage':<20} {'count':>7} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+    for stage, stats in sorted(summary.items(), key=lambda item: -item[1]["p50"]):
+        print(f"{stage:<20} {stats['count']:>7} {stats['p50']:>10.1f} {stats['p90']:>10.1f} "
+              f"{stats['p99']:>10.1f} {stats['max']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# scripts/load_test_webhook.py
+# Local load test for the pooled webhook server: N concurrent clients POST to
+# /twilio for a fixed time and we report throughput, latency percentiles and
+# how many requests were shed with 503.
+#
+#   python scripts/load_test_webhook.py --url http://127.0.0.1:5000/twilio
+#   python scripts/load_test_webhook.py --self-host --handler-ms 200 --workers 8
+#
+# --self-host starts PooledWSGIServer in-process around a stand-in app that
+# sleeps --handler-ms, so the server's queueing and shedding can be measured
+# without Ollama or Gmail.
+
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from riley2.core.event_log import percentile
+from riley2.core.serving import PooledWSGIServer
+
+
+def make_sleep_app(handler_ms):
+    def app(environ, start_response):
+        environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+        time.sleep(handler_ms / 1000)
+        start_response("200 OK", [("Content-Type", "application/xml")])
+        return [b"<Response><Message>ok</Message></Response>"]
+    return app
+
+
+def run_client(url, deadline, client_id, results, backoff_ms):
+    sequence = 0
+    while time.monotonic() < deadline:
+        sequence += 1
+        body = urllib.parse.urlencode({
+            "From": f"+1555{client_id:07d}", "MessageSid": f"SMload{client_id}x{sequence}", "Body": "hello",
+        }).encode()
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, data=body, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = "error"
+        results.append((status, time.perf_counter() - started))
+        if status != 200:
+            # Like Twilio, back off instead of hammering a server that is shedding load
+            time.sleep(backoff_ms / 1000)
+
+
+def load_test(url, clients, seconds, backoff_ms=100):
+    results = []
+    deadline = time.monotonic() + seconds
+    threads = [threading.Thread(target=run_client, args=(url, deadline, i, results, backoff_ms))
+               for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def report(results, elapsed):
+    ok = sorted(latency for status, latency in results if status == 200)
+    shed = sum(1 for status, _ in results if status == 503)
+    failed = len(results) - len(ok) - shed
+    print(f"Requests: {len(results)} in {elapsed:.1f}s  ok={len(ok)} shed={shed} failed={failed}")
+    print(f"Throughput: {len(ok) / elapsed:.1f} ok req/s ({len(results) / elapsed:.1f} total req/s)")
+    if ok:
+        print("Latency (ms): " + "  ".join(
+            f"p{pct}={percentile(ok, pct) * 1000:.1f}" for pct in (50, 90, 99)) + f"  max={ok[-1] * 1000:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Riley2 webhook server")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/twilio")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--backoff-ms", type=float, default=100, help="Client pause after a 503 or error")
+    parser.add_argument("--self-host", action="store_true", help="Serve a sleeping stand-in app in-process")
+    parser.add_argument("--handler-ms", type=float, default=100, help="Stand-in app latency for --self-host")
+    parser.add_argument("--workers", type=int, default=8, help="Server workers for --self-host")
+    parser.add_argument("--queue-size", type=int, default=32, help="Server queue for --self-host")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.self_host:
+        server = PooledWSGIServer(("127.0.0.1", 0), make_sleep_app(args.handler_ms),
+                                  workers=args.workers, queue_size=args.queue_size)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/twilio"
+        print(f"Self-hosted: {args.workers} workers, queue {args.queue_size}, handler {args.handler_ms:.0f} ms")
+
+    print(f"Load testing {url} with {args.clients} clients for {args.seconds:.0f}s")
+    results, elapsed = load_test(url, args.clients, args.seconds, args.backoff_ms)
+    report(results, elapsed)
+
+    if server:
+        server.shutdown()
+        server.drain()
+
+
+if __name__ == "__main__":
+    main()
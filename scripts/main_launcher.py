@@ -6,10 +6,11 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 # Import the logger from logger_utils instead of configuring a new one
-from riley2.core.logger_utils import logger
+from riley2.core.logger_utils import logger, log_listener
 
 # Add a file handler if not already present to ensure logs go to riley2.log
-for handler in logger.handlers:
+# (logger_utils attaches its file handler to the background queue listener)
+for handler in list(logger.handlers) + list(log_listener.handlers):
     if isinstance(handler, logging.FileHandler) and handler.baseFilename.endswith('riley2.log'):
         break
 else:
@@ -21,8 +22,14 @@ else:
     logger.addHandler(file_handler)
 
 from riley2.core.router_chain import route_user_query
+from riley2.core.tracing import tracer
 
 def main():
+    # Verbose mode traces each query: flame summary on screen, Chrome trace file for detail
+    verbose = "--verbose" in sys.argv or "-v" in sys.argv
+    if verbose:
+        tracer.enabled = True
+
     logger.info("Riley2 main application started")
     print("✅ Gmail authentication OK")
     print("✅ Calendar authentication OK")
@@ -38,5 +45,11 @@ def main():
         reply = route_user_query(user_input)
         print(f"Riley2: {reply}")
 
+        if verbose:
+            spans = tracer.reset()
+            print("\n🔥 Where the time went:")
+            print(tracer.flame_summary(spans))
+            print(f"Trace written to {tracer.export(spans=spans)}\n")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
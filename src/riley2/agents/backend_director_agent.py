@@ -1,39 +1,44 @@
 import logging
-from riley2.core.logger_utils import logger
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from riley2.core.logger_utils import logger, Payload
 from langchain_community.chat_models import ChatOllama
-from langchain_core.runnables import RunnableSequence
 from riley2.core.tool_executor import execute_tool
+from riley2.core.metrics import record_llm_call
+from riley2.core.prompt_builder import KEEP_START, NOTE_BUDGET, QUERY_BUDGET, TOOL_RESULT_BUDGET, PromptBuilder
 
 llm = ChatOllama(model="mistral", temperature=0.4)
 
 # Step 1: Planner prompt – decides what to ask the backend agent
-planner_prompt = ChatPromptTemplate.from_messages([
-    ("system", 
-     """
-     You are a planning assistant for Riley2. Your job is to break down the user’s complex request into clear backend tool calls.
-     For each step, suggest a JSON-formatted dictionary like:
-     {"tool": "calendar_query", "args": {"query": "next weekend events"}}
-     You may return multiple tool queries, separated by newlines if needed.
-     Only return tool calls, no explanations.
-     """),
-    ("human", "{user_input}")
-])
-planner_chain = planner_prompt | llm
+PLANNER_INSTRUCTIONS = """
+You are a planning assistant for Riley2. Your job is to break down the user’s complex request into clear backend tool calls.
+For each step, suggest a JSON-formatted dictionary like:
+{"tool": "calendar_query", "args": {"query": "next weekend events"}}
+You may return multiple tool queries, separated by newlines if needed.
+Only return tool calls, no explanations.
+"""
+
+def director_plan_prompt(user_input):
+    return (PromptBuilder("director_planner")
+            .add("instructions", PLANNER_INSTRUCTIONS)
+            .add("query", user_input, budget=QUERY_BUDGET, policy=KEEP_START))
 
 # Step 2: Summarizer prompt – interprets results into a final response
-summarizer_prompt = ChatPromptTemplate.from_messages([
-    MessagesPlaceholder(variable_name="intermediate_steps"),
-    ("human", "Using the tool outputs above, answer the original user query: {original_question}")
-])
-summarizer_chain = summarizer_prompt | llm
+def director_summary_prompt(user_input, steps):
+    """Each tool output gets its own budget; the largest ones shrink first if the prompt is still too long."""
+    builder = PromptBuilder("director_summarizer")
+    for index, step in enumerate(steps, 1):
+        builder.add(f"step{index}", f"Tool: {step['tool']}\nArgs: {step['args']}", budget=NOTE_BUDGET, policy=KEEP_START)
+        builder.add(f"result{index}", step["result"], budget=TOOL_RESULT_BUDGET, policy=KEEP_START)
+    return builder.add("query", f"Using the tool outputs above, answer the original user query: {user_input}",
+                       budget=QUERY_BUDGET, policy=KEEP_START)
 
 # Main callable
 def handle_backend_query(user_input: str) -> str:
     logger.debug(f"Handling backend query: {user_input}")
     # Step 1: Generate tool call plan
-    plan_raw = planner_chain.invoke({"user_input": user_input})
-    logger.debug(f"Generated tool call plan: {plan_raw}")
+    prompt = director_plan_prompt(user_input).build()
+    plan_raw = llm.invoke(prompt).content
+    record_llm_call("director_planner", prompt, plan_raw)
+    logger.debug("Generated tool call plan: %s", Payload(plan_raw))
 
     tool_queries = parse_tool_queries(plan_raw)
     logger.debug(f"Parsed tool queries: {tool_queries}")
@@ -45,19 +50,18 @@ def handle_backend_query(user_input: str) -> str:
         args = query.get("args", {})
         logger.debug(f"Executing tool: {tool} with args: {args}")
         result = execute_tool(tool, args)
-        logger.debug(f"Tool result: {result}")
+        logger.debug("Tool result: %s", Payload(result))
         steps.append({"tool": tool, "args": args, "result": result})
 
     # Step 3: Summarize the results into a final user-facing response
-    final = summarizer_chain.invoke({
-        "intermediate_steps": steps,
-        "original_question": user_input
-    })
-    logger.debug(f"Final summarized response: {final.content.strip()}")
-    return final.content.strip()
+    prompt = director_summary_prompt(user_input, steps).build()
+    final = llm.invoke(prompt).content
+    record_llm_call("director_summarizer", prompt, final)
+    logger.debug("Final summarized response: %s", Payload(final))
+    return final.strip()
 
 def parse_tool_queries(response_text):
-    logger.debug(f"Parsing tool queries from response text: {response_text}")
+    logger.debug("Parsing tool queries from response text: %s", Payload(response_text))
     import json
     tool_calls = []
     for line in response_text.strip().splitlines():
@@ -1,21 +1,29 @@
 from riley2.core.llm_backend import backend_planner_llm
 from riley2.core.tool_executor import execute_tool as perform_action
 from riley2.agents.end_turn_agent import EndTurnAgent
-from datetime import datetime, timedelta
+from riley2.core.plan_executor import PlanError, parse_plan, execute_plan, sink_steps
+from riley2.core.speculation import SpeculativeExecutor
+from riley2.core.event_log import timed_event
+from riley2.core.session_memory import estimate_tokens
+from riley2.core.tracing import span
+from riley2.core.date_args import format_date, local_today
+from riley2.core.prompt_builder import KEEP_START, NOTE_BUDGET, QUERY_BUDGET, TOOL_RESULT_BUDGET, PromptBuilder
+from datetime import timedelta
 import json
-import logging
-from riley2.core.logger_utils import logger
+import os
+from riley2.core.logger_utils import logger, Payload
 
 def extract_args_for_tool(tool_name, context, user_query):
     logger.debug(f"Extracting arguments for tool: {tool_name} with user query: {user_query}")
-    today = datetime.utcnow().date()
+    # Dates stay typed; the tools accept date objects without re-parsing
+    today = local_today()
     if tool_name == "calendar_scan":
-        end = today + timedelta(days=30)
-        args = {"start_date": today.strftime("%Y/%m/%d"), "end_date": end.strftime("%Y/%m/%d"), "query": user_query}
+        # No title filter: the whole sentence ("When is my Italy trip?") never matches an event title
+        args = {"start_date": today, "end_date": today + timedelta(days=30)}
+    elif tool_name == "calendar_free_slots":
+        args = {"start_date": today, "end_date": today + timedelta(days=7), "duration": 60}
     elif tool_name == "email_download_chunk":
-        end = today
-        start = end - timedelta(days=7)
-        args = {"start_date": start.strftime("%Y/%m/%d"), "end_date": end.strftime("%Y/%m/%d")}
+        args = {"start_date": today - timedelta(days=7), "end_date": today}
     elif tool_name == "meta_query":
         args = {"query": user_query}
     else:
@@ -23,50 +31,76 @@ def extract_args_for_tool(tool_name, context, user_query):
     logger.debug(f"Extracted arguments: {args}")
     return args
 
-def backend_manager_loop_v2(query, context, max_steps=8):
-    end_turn_agent = EndTurnAgent()
+# Off until the hit rate (speculation_stats) is measured in production: a miss on an
+# email query costs an extra Gmail list call plus up to 20 get calls
+SPECULATE_BY_DEFAULT = os.environ.get('RILEY2_SPECULATE', '0') in ('1', 'true', 'True')
 
-    logger.info(f"FRONTEND -> BACKENDM: [User Query] {query}")
+# Router labels (llm_frontend.route_tool) that map directly onto a backend tool
+ROUTED_TOOLS = {
+    "calendar_next": "calendar_scan",
+    "calendar_range": "calendar_scan",
+    "calendar_search": "calendar_scan",
+    "email_inbox": "email_download_chunk",
+    "email_latest": "email_download_chunk",
+    "email_unread": "email_download_chunk",
+    "email_search": "email_download_chunk",
+}
 
-    for step in range(max_steps):
-        logger.debug(f"Step {step} of backend manager loop")
-        if step == 0:
-            planner_prompt = f"""
-You are Riley2's Backend Manager LLM.
-Your job is to solve the user's request by either:
+SPECULATION_KEYWORDS = {
+    "email_download_chunk": ("email", "inbox", "mail"),
+    "calendar_scan": ("calendar", "event", "meeting", "trip", "schedule"),
+}
 
-- Selecting an appropriate backend tool
-- Or using the Meta Agent to explain system capabilities
-- Or directly responding via LLM natural text
+def predict_tool_calls(query, context):
+    lowered = query.lower()
+    predictions = [(tool_name, extract_args_for_tool(tool_name, context, query))
+                   for tool_name, keywords in SPECULATION_KEYWORDS.items()
+                   if any(word in lowered for word in keywords)]
+    logger.debug(f"Predicted tool calls for speculation: {predictions}")
+    return predictions
 
-Available tools:
+def prefetch_note(predictions):
+    """Tell the planner which calls are already running so it can pick the exact same args."""
+    if not predictions:
+        return ""
+    calls = "\n".join(f"- {tool_name} {json.dumps(args, default=format_date)}" for tool_name, args in predictions)
+    return f"""
+These tool calls are already running. If one of them fits, use it with exactly these args:
+{calls}
+"""
+
+TOOL_LIST = """Available tools:
 - calendar_scan(start_date, end_date, query)
+- calendar_free_slots(start_date, end_date, duration, constraints)
 - email_download_chunk(start_date, end_date)
 - email_filter_by_sender(raw_emails, sender_email)
 - email_summarize_batch(raw_emails)
 - get_current_time()
-- meta_query(query)
+- meta_query(query)"""
 
-You may directly answer using "LLM_ANSWER" if no tool needed.
+FREE_SLOTS_HINT = ('calendar_free_slots takes duration in minutes (or "1h30m") and optional constraints like '
+                   '{"day_start": "09:00", "day_end": "17:00", "weekdays_only": true, "attendees": ["name@example.com"]}.')
 
-Respond STRICTLY in JSON:
-{{ 
-  "action": "<tool_name or META_QUERY or LLM_ANSWER or END_TURN>", 
-  "args": {{ ... }}
-}}
-"""
-        else:
-            last_action, last_result = context.last_action_result()
-            planner_prompt = f"""
+FIRST_STEP_INSTRUCTIONS = """
 You are Riley2's Backend Manager LLM.
+Your job is to solve the user's request by either:
 
-You just attempted:
-Tool: {last_action}
-Result: {last_result}
+- Selecting an appropriate backend tool
+- Or using the Meta Agent to explain system capabilities
+- Or directly responding via LLM natural text
 
-User's original goal: "{query}"
+""" + TOOL_LIST + "\n"
+
+FIRST_STEP_FORMAT = """You may directly answer using "LLM_ANSWER" if no tool needed.
+
+Respond STRICTLY in JSON:
+{ 
+  "action": "<tool_name or META_QUERY or LLM_ANSWER or END_TURN>", 
+  "args": { ... }
+}
+"""
 
-Think:
+FOLLOW_UP_FORMAT = """Think:
 - Retry broader search?
 - Different tool?
 - Clarify with user?
@@ -74,51 +108,201 @@ Think:
 - End turn if complete?
 
 Respond STRICTLY in JSON:
-{{ 
+{ 
   "action": "<tool_name or META_QUERY or REQUEST_CLARIFICATION or LLM_ANSWER or END_TURN>", 
-  "args": {{ ... }}
-}}
+  "args": { ... }
+}
 """
 
-        logger.debug(f"Planner prompt: {planner_prompt}")
-        planner_response = backend_planner_llm(planner_prompt)
-        logger.debug(f"Planner response: {planner_response}")
+def first_step_prompt(query, predictions):
+    """Planner prompt for the first step; the query and prefetch note are budgeted, the rest is fixed."""
+    return (PromptBuilder("planner")
+            .add("instructions", FIRST_STEP_INSTRUCTIONS)
+            .add("today", f'Today\'s date is {format_date(local_today())}. Dates use the YYYY/MM/DD format; '
+                          'phrases like "next weekend" also work.\n' + FREE_SLOTS_HINT)
+            .add("query", f'User\'s request: "{query}"', budget=QUERY_BUDGET, policy=KEEP_START)
+            .add("prefetch", prefetch_note(predictions), budget=NOTE_BUDGET, policy=KEEP_START)
+            .add("format", FIRST_STEP_FORMAT))
 
-        try:
-            parsed = json.loads(planner_response)
-        except Exception as e:
-            logger.error(f"Failed to parse planner response: {e}")
-            break
+def follow_up_prompt(query, context):
+    """Planner prompt after a tool call; a large tool result is re-rendered or cut to fit its budget."""
+    last_action, last_result = context.last_action_result()
+    return (PromptBuilder("planner")
+            .add("instructions", f"\nYou are Riley2's Backend Manager LLM.\n\nYou just attempted:\nTool: {last_action}\nResult:")
+            .add("tool_result", last_result, budget=TOOL_RESULT_BUDGET, policy=KEEP_START)
+            .add("query", f'\nUser\'s original goal: "{query}"\n', budget=QUERY_BUDGET, policy=KEEP_START)
+            .add("format", FOLLOW_UP_FORMAT))
 
-        action = parsed.get("action")
-        args = parsed.get("args", {})
-        logger.debug(f"Parsed action: {action}, args: {args}")
+def backend_manager_loop_v2(query, context, max_steps=8, speculate=SPECULATE_BY_DEFAULT, route=None):
+    """Plan one tool call at a time until EndTurnAgent is satisfied.
 
-        if action == "END_TURN":
-            logger.info("BACKENDM: [End Turn Condition Met]")
-            break
+    route is the label from llm_frontend.route_tool; when it maps onto a backend tool,
+    that tool runs first without asking the planner.
+    """
+    end_turn_agent = EndTurnAgent()
+    routed_tool = ROUTED_TOOLS.get(route)
 
-        if action == "LLM_ANSWER":
-            final_response = args.get("response", "I'm not sure how to answer that.")
-            logger.info(f"BACKENDM -> FRONTEND (LLM Direct): {final_response}")
-            return final_response
+    logger.info(f"FRONTEND -> BACKENDM: [User Query] {query}")
 
-        if action == "REQUEST_CLARIFICATION":
-            question = args.get("question", "Can you clarify what you mean?")
-            logger.info(f"BACKENDM -> FRONTEND (Clarification Request): {question}")
-            return question
+    speculator = None
+    predictions = []
+    if speculate and not routed_tool:
+        # Start the predictable first tool call while the planner LLM is still generating
+        predictions = predict_tool_calls(query, context)
+        speculator = SpeculativeExecutor(perform_action)
+        speculator.start(predictions)
 
-        result = perform_action(action, args)
-        logger.info(f"BACKEND -> BACKENDM: [Action Result] {result}")
+    try:
+        for step in range(max_steps):
+            with timed_event("loop_turn", step=step) as event:
+                logger.debug(f"Step {step} of backend manager loop")
+                if step == 0 and routed_tool:
+                    # The intent router already picked the first tool, so skip one planner call
+                    parsed = {"action": routed_tool, "args": extract_args_for_tool(routed_tool, context, query)}
+                    event["routed"] = True
+                else:
+                    builder = first_step_prompt(query, predictions) if step == 0 else follow_up_prompt(query, context)
+                    planner_prompt = builder.build()
+                    logger.debug("Planner prompt: %s", Payload(planner_prompt))
+                    with span("planner", step=step):
+                        planner_response = backend_planner_llm(planner_prompt)
+                    logger.debug("Planner response: %s", Payload(planner_response))
+                    event["prompt_tokens"] = builder.tokens
+                    event["response_tokens"] = estimate_tokens(planner_response)
 
-        context.update_with_action_result(action, result)
-        logger.debug(f"Updated context with action result")
+                    try:
+                        parsed = json.loads(planner_response)
+                    except Exception as e:
+                        logger.error(f"Failed to parse planner response: {e}")
+                        event["status"] = "error"
+                        break
 
-        if end_turn_agent.should_end_turn(query, context):
-            logger.info("BACKENDM: [End Turn Condition Met]")
-            break
+                action = parsed.get("action")
+                args = parsed.get("args", {})
+                event["action"] = action
+                logger.debug(f"Parsed action: {action}, args: {args}")
+
+                if action == "END_TURN":
+                    logger.info("BACKENDM: [End Turn Condition Met]")
+                    break
+
+                if action == "LLM_ANSWER":
+                    final_response = args.get("response", "I'm not sure how to answer that.")
+                    logger.info(f"BACKENDM -> FRONTEND (LLM Direct): {final_response}")
+                    return final_response
+
+                if action == "REQUEST_CLARIFICATION":
+                    question = args.get("question", "Can you clarify what you mean?")
+                    logger.info(f"BACKENDM -> FRONTEND (Clarification Request): {question}")
+                    return question
+
+                result = None
+                if speculator:
+                    # Only the first planner call overlaps with speculation
+                    result = speculator.claim(action, args)
+                    event["cache_hit"] = result is not None
+                    speculator.abandon()
+                    speculator = None
+                if result is None:
+                    result = perform_action(action, args)
+                logger.info("BACKEND -> BACKENDM: [Action Result] %s", Payload(result))
+
+                context.update_with_action_result(action, result)
+                logger.debug(f"Updated context with action result")
+
+                with span("end_turn_agent"):
+                    end_of_turn = end_turn_agent.should_end_turn(query, context)
+                if end_of_turn:
+                    logger.info("BACKENDM: [End Turn Condition Met]")
+                    break
+    finally:
+        if speculator:
+            speculator.abandon()
 
     final_response = context.final_response()
-    logger.info(f"BACKENDM -> FRONTEND: [Final Response] {final_response}")
+    logger.info("BACKENDM -> FRONTEND: [Final Response] %s", Payload(final_response))
+
+    return final_response
+
+PLAN_INSTRUCTIONS = """
+You are Riley2's Backend Manager LLM.
+Solve the user's request by writing a complete plan of tool calls up front.
+
+""" + TOOL_LIST + """
+
+Each step has an "id". To pass the output of an earlier step into an argument,
+use the string "$<id>" as the argument value. Steps that do not depend on each
+other will run in parallel.
+""" + FREE_SLOTS_HINT + "\n"
+
+PLAN_FORMAT = """Respond STRICTLY in JSON:
+{
+  "steps": [
+    {"id": "s1", "tool": "email_download_chunk", "args": {"start_date": "YYYY/MM/DD", "end_date": "YYYY/MM/DD"}},
+    {"id": "s2", "tool": "email_filter_by_sender", "args": {"raw_emails": "$s1", "sender_email": "..."}},
+    {"id": "s3", "tool": "email_summarize_batch", "args": {"raw_emails": "$s2"}}
+  ]
+}
+"""
+
+def plan_prompt(query, failure_note=""):
+    """Prompt asking for a whole plan; failure_note explains why the previous plan was rejected."""
+    return (PromptBuilder("planner")
+            .add("instructions", PLAN_INSTRUCTIONS)
+            .add("query", f'User\'s request: "{query}"', budget=QUERY_BUDGET, policy=KEEP_START)
+            .add("failure_note", failure_note, budget=NOTE_BUDGET, policy=KEEP_START)
+            .add("format", PLAN_FORMAT))
+
+def plan_response(sink_results):
+    """One answer covering every terminal step, so parallel branches are not dropped."""
+    if len(sink_results) == 1:
+        tool, result = sink_results[0]
+        return f"Based on the last action [{tool}], here is what I found: {result}"
+    findings = "\n".join(f"- [{tool}]: {result}" for tool, result in sink_results)
+    return f"Based on the planned actions, here is what I found:\n{findings}"
+
+def backend_manager_plan_v2(query, context, max_replans=2, max_workers=4):
+    """Plan-then-execute: one planner call emits a DAG of tool calls, replanning only on failure."""
+    logger.info(f"FRONTEND -> BACKENDM (plan mode): [User Query] {query}")
+    failure_note = ""
+    # Successful calls survive a replan: (tool, args) -> result
+    completed = {}
+    sink_results = []
+
+    for attempt in range(max_replans + 1):
+        builder = plan_prompt(query, failure_note)
+        planner_prompt = builder.build()
+        logger.debug("Plan attempt %d, prompt: %s", attempt, Payload(planner_prompt))
+        with timed_event("planner_call", attempt=attempt, mode="plan") as event, span("planner", attempt=attempt):
+            planner_response = backend_planner_llm(planner_prompt)
+            event["prompt_tokens"] = builder.tokens
+            event["response_tokens"] = estimate_tokens(planner_response)
+
+        try:
+            steps = parse_plan(planner_response)
+        except PlanError as e:
+            logger.error(f"Failed to parse plan: {e}")
+            failure_note = f"\nYour previous plan was rejected: {e}\n"
+            continue
+
+        outcome = execute_plan(steps, perform_action, max_workers=max_workers, completed=completed)
+        by_id = {step.id: step for step in steps}
+        sinks = [step.id for step in sink_steps(steps)]
+        for step_id in outcome.order:
+            result = outcome.results.get(step_id, outcome.failed.get(step_id))
+            context.update_with_action_result(by_id[step_id].tool, result)
+        sink_results = [(by_id[step_id].tool, outcome.results[step_id])
+                        for step_id in sinks if step_id in outcome.results]
+
+        if outcome.ok:
+            break
+
+        failures = "; ".join(f"{step_id}: {error}" for step_id, error in outcome.failed.items())
+        logger.info(f"BACKENDM: [Replanning after failure] {failures}")
+        succeeded = [f"{by_id[step_id].tool} {json.dumps(by_id[step_id].args)}" for step_id in outcome.results]
+        failure_note = (f"\nYour previous plan failed at: {failures}\n"
+                        f"These calls succeeded and are reused if repeated with the same args: {succeeded}\n")
 
-    return final_response
\ No newline at end of file
+    final_response = plan_response(sink_results) if sink_results else context.final_response()
+    logger.info("BACKENDM -> FRONTEND: [Final Response] %s", Payload(final_response))
+    return final_response
@@ -1,44 +1,300 @@
+import heapq
+import itertools
 import logging
+import os
+import threading
+import time
+from bisect import bisect_left, insort
 from datetime import datetime, timedelta
-from riley2.core.logger_utils import logger
+from google.auth.transport.requests import Request
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from pathlib import Path
+from riley2.core.logger_utils import logger, Payload
+from riley2.core.calendar_store import (
+    CalendarStore, CalendarWriter, days_covered, event_bounds, free_intervals, is_timed,
+)
+from riley2.core.calendar_sync import CalendarSync
+from riley2.core.date_args import local_now, parse_date, parse_duration, parse_time_of_day
+from riley2.core.metrics import registry
+from riley2.core.tool_results import EventList, FreeSlots
+
+# calendar.events covers reading and the writes calendar_create makes
+SCOPES = ['https://www.googleapis.com/auth/calendar.events']
+SECRETS_PATH = Path(__file__).resolve().parent.parent / "secrets"
+
+# "sample" serves the built-in events below; "google" syncs the user's primary calendar
+CALENDAR_BACKEND = os.environ.get('RILEY2_CALENDAR_BACKEND', 'sample')
+CALENDAR_CACHE_PATH = os.environ.get('RILEY2_CALENDAR_CACHE', str(SECRETS_PATH / "calendar_cache.json"))
+# Slot holds taken while a booking is being finalized lapse after this long unless released
+RESERVATION_TIMEOUT_SECONDS = float(os.environ.get('RILEY2_RESERVATION_TIMEOUT', 30))
+
+RESERVATION_LOCKS = registry.gauge("riley2_reservation_locks", "Calendar slot holds currently active")
+RESERVATION_EXPIRED = registry.counter(
+    "riley2_reservation_expired_total", "Calendar slot holds that lapsed without being released")
+
+# calendar_free_slots looks inside these hours unless constraints say otherwise
+FREE_SLOT_DEFAULTS = {"day_start": "09:00", "day_end": "17:00", "weekdays_only": False, "attendees": [], "limit": 10}
+
+DEFAULT_EVENTS = [
+    {"title": "Italy Trip", "date": "2025/05/12"},
+    {"title": "William Lunch", "date": "2025/04/27"},
+    {"title": "Doctor Appointment", "date": "2025/05/04"},
+]
+
+# Parsed and indexed once; scans no longer touch every event
+calendar_store = CalendarStore(DEFAULT_EVENTS if CALENDAR_BACKEND == "sample" else ())
+calendar_writer = CalendarWriter(calendar_store)
+calendar_sync = None
+_calendar_sync_lock = threading.Lock()
+
+def authenticate_calendar():
+    logger.debug("Authenticating Google Calendar API...")
+    creds = None
+    token_path = SECRETS_PATH / "token_calendar.json"
+    creds_path = SECRETS_PATH / "credentials.json"
+    if token_path.exists():
+        logger.debug("Loading calendar credentials from token file.")
+        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            logger.debug("Refreshing expired calendar credentials.")
+            creds.refresh(Request())
+        else:
+            logger.debug("Initiating new calendar OAuth flow.")
+            flow = InstalledAppFlow.from_client_secrets_file(str(creds_path), SCOPES)
+            creds = flow.run_local_server(port=0)
+        with open(token_path, 'w') as token:
+            logger.debug("Saving new calendar credentials to token file.")
+            token.write(creds.to_json())
+    logger.info("Google Calendar API authenticated successfully.")
+    return build('calendar', 'v3', credentials=creds)
+
+def get_calendar_sync():
+    """Create the sync for the configured backend on first use; None for the sample calendar."""
+    global calendar_sync
+    if CALENDAR_BACKEND == "sample":
+        return None
+    if calendar_sync is None:
+        with _calendar_sync_lock:
+            if calendar_sync is None:
+                if CALENDAR_BACKEND != "google":
+                    raise ValueError(f"Unknown calendar backend: {CALENDAR_BACKEND}")
+                calendar_sync = CalendarSync(authenticate_calendar(), calendar_store, state_path=CALENDAR_CACHE_PATH)
+                calendar_writer.persist = calendar_sync.create_event
+    return calendar_sync
 
 def calendar_scan(start_date, end_date, query=None):
     logger.debug(f"Scanning calendar events from {start_date} to {end_date} with query: {query}")
-    events = [
-        {"title": "Italy Trip", "date": "2025/05/12"},
-        {"title": "William Lunch", "date": "2025/04/27"},
-        {"title": "Doctor Appointment", "date": "2025/05/04"},
-    ]
-
-    # Handle both date formats (YYYY/MM/DD and YYYY-MM-DD)
-    try:
-        start = datetime.strptime(start_date, "%Y/%m/%d")
-    except ValueError:
-        # Try alternate format with hyphens
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        
-    try:
-        end = datetime.strptime(end_date, "%Y/%m/%d")
-    except ValueError:
-        # Try alternate format with hyphens
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-
-    matched = []
-    for event in events:
-        event_date = datetime.strptime(event["date"], "%Y/%m/%d")
-        if start <= event_date <= end:
-            if query:
-                if query.lower() in event["title"].lower():
-                    matched.append(event)
-            else:
-                matched.append(event)
-
-    logger.info(f"Scanned {len(events)} events, found {len(matched)} matching events.")
-
-    if not matched:
-        logger.debug("No matching events found.")
-        return "No matching events found."
-
-    result = f"Found events: {matched}"
-    logger.debug(f"Calendar scan result: {result}")
-    return result
\ No newline at end of file
+
+    # Typed dates pass straight through; strings and phrases go through the shared memoized parser
+    start = datetime.combine(parse_date(start_date), datetime.min.time())
+    end = datetime.combine(parse_date(end_date, end=True), datetime.min.time())
+
+    sync = get_calendar_sync()
+    if sync:
+        # Answered from the local store; the API is only asked for changes once per interval
+        sync.refresh()
+
+    # end_date is inclusive, so the range runs to the following midnight
+    matched = calendar_store.scan(start, end + timedelta(days=1), query)
+
+    logger.info(f"Searched {len(calendar_store)} indexed events, found {len(matched)} matching events.")
+
+    result = EventList(matched)
+    logger.debug("Calendar scan result: %s", Payload(result))
+    return result
+
+def _free_slot_windows(first_day, last_day, day_start, day_end, weekdays_only, not_before):
+    day = first_day
+    while day <= last_day:
+        if not weekdays_only or day.weekday() < 5:
+            midnight = datetime.combine(day, datetime.min.time())
+            start = max(midnight + timedelta(minutes=day_start), not_before)
+            end = midnight + timedelta(minutes=day_end)
+            if start < end:
+                yield start, end
+        day += timedelta(days=1)
+
+def calendar_free_slots(start_date, end_date, duration=60, constraints=None):
+    """Free time of at least `duration` between the two dates, inclusive, in one call.
+
+    constraints may set day_start/day_end ("HH:MM"), weekdays_only, limit, and
+    attendees: calendar ids whose busy time is intersected with ours (Google backend).
+    """
+    logger.debug(f"Finding free slots from {start_date} to {end_date} for {duration} with {constraints}")
+    options = dict(FREE_SLOT_DEFAULTS, **(constraints or {}))
+    min_length = parse_duration(duration)
+    first_day = parse_date(start_date)
+    last_day = parse_date(end_date, end=True)
+
+    sync = get_calendar_sync()
+    if sync:
+        sync.refresh()
+    # "Now" in the zone the store and free/busy use, not the server's
+    now = local_now()
+    windows = list(_free_slot_windows(
+        first_day, last_day, parse_time_of_day(options["day_start"]), parse_time_of_day(options["day_end"]),
+        options["weekdays_only"], now.replace(second=0, microsecond=0)))
+    if not windows:
+        logger.info("No working hours left in the requested range.")
+        return FreeSlots([], min_length)
+    range_start, range_end = windows[0][0], windows[-1][1]
+
+    # Timed events only; all-day entries such as trips are not busy time here either
+    busy_lists = [[(entry.start, entry.end) for entry in calendar_store.entries_between(range_start, range_end)
+                   if is_timed(entry.event)]]
+    attendees = list(options["attendees"])
+    unchecked = attendees
+    if attendees and sync:
+        attendee_busy = sync.free_busy(attendees, range_start, range_end)
+        busy_lists.extend(attendee_busy.values())
+        unchecked = [attendee for attendee in attendees if attendee not in attendee_busy]
+
+    slots = list(itertools.islice(free_intervals(busy_lists, windows, min_length), int(options["limit"])))
+    logger.info(f"Found {len(slots)} free slots across {len(windows)} days and {len(busy_lists)} calendars.")
+
+    return FreeSlots(slots, min_length, unchecked)
+
+
+class ReservationManager:
+    """Short-lived holds on calendar slots while an agent finishes a booking.
+
+    Each day has a list of held intervals sorted by start. Holds never overlap, so an
+    acquire only checks its two neighbours after a bisect: O(log n) however many holds
+    exist. Expiry is one background thread sleeping on a heap of deadlines rather
+    than a timer thread per hold; released holds are skipped when they surface.
+    """
+
+    def __init__(self, default_timeout=RESERVATION_TIMEOUT_SECONDS, clock=time.monotonic):
+        self.default_timeout = default_timeout
+        self.clock = clock
+        self._locks = {}
+        self._days = {}
+        self._deadlines = []
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._expiry_thread = None
+
+    def __len__(self):
+        return len(self._locks)
+
+    def _conflict(self, start, end, days, ignore_lock_id=None):
+        for day in days:
+            held = self._days.get(day, [])
+            # Holds on a day never overlap, so only the one before start can reach into [start, end)
+            i = max(bisect_left(held, (start,)) - 1, 0)
+            while i < len(held) and held[i][0] < end:
+                if held[i][1] > start and held[i][2] != ignore_lock_id:
+                    return self._locks[held[i][2]]
+                i += 1
+        return None
+
+    def acquire_lock(self, agent_id, slot, timeout=None):
+        """Hold slot for agent_id; a non-positive timeout holds until released."""
+        timeout = self.default_timeout if timeout is None else timeout
+        start, end = event_bounds(slot)
+        days = list(days_covered(start, end))
+        with self._condition:
+            existing = self._conflict(start, end, days)
+            if existing:
+                logger.warning(f"Agent {agent_id} failed to lock slot: overlaps with {existing['lock_id']}")
+                return {"success": False, "reason": "slot_locked", "locking_agent": existing["agent_id"]}
+
+            lock_id = f"lock_{next(self._ids)}"
+            entry = {"lock_id": lock_id, "agent_id": agent_id, "slot": slot, "start": start, "end": end,
+                     "days": days, "expires_at": time.time() + timeout if timeout > 0 else None}
+            self._locks[lock_id] = entry
+            for day in days:
+                insort(self._days.setdefault(day, []), (start, end, lock_id))
+            if timeout > 0:
+                deadline = self.clock() + timeout
+                entry["deadline"] = deadline
+                heapq.heappush(self._deadlines, (deadline, lock_id))
+                self._ensure_expiry_thread()
+                if self._deadlines[0][1] == lock_id:
+                    self._condition.notify()
+            RESERVATION_LOCKS.set(len(self._locks))
+        logger.info(f"Agent {agent_id} acquired lock {lock_id} for slot {slot['date']} "
+                    f"{slot.get('start_time')}-{slot.get('end_time')}")
+        return {"success": True, "lock_id": lock_id, "expires_at": entry["expires_at"]}
+
+    def _remove(self, lock_id):
+        entry = self._locks.pop(lock_id, None)
+        if entry is None:
+            return None
+        for day in entry["days"]:
+            held = self._days[day]
+            del held[bisect_left(held, (entry["start"], entry["end"], lock_id))]
+            if not held:
+                del self._days[day]
+        RESERVATION_LOCKS.set(len(self._locks))
+        return entry
+
+    def release_lock(self, lock_id):
+        with self._condition:
+            entry = self._remove(lock_id)
+        if entry is None:
+            return {"success": False, "reason": "invalid_lock_id"}
+        logger.info(f"Lock {lock_id} released by agent {entry['agent_id']}")
+        return {"success": True}
+
+    def holder(self, slot, ignore_lock_id=None):
+        """The hold overlapping slot, if any, other than ignore_lock_id."""
+        start, end = event_bounds(slot)
+        with self._condition:
+            existing = self._conflict(start, end, days_covered(start, end), ignore_lock_id)
+            return dict(existing) if existing else None
+
+    def is_locked(self, slot):
+        """True when any hold overlaps slot."""
+        return self.holder(slot) is not None
+
+    def _ensure_expiry_thread(self):
+        if self._expiry_thread is None:
+            self._expiry_thread = threading.Thread(
+                target=self._expire_loop, name="riley2-reservation-expiry", daemon=True)
+            self._expiry_thread.start()
+
+    def _expire_loop(self):
+        with self._condition:
+            while True:
+                if not self._deadlines:
+                    self._condition.wait()
+                    continue
+                deadline, lock_id = self._deadlines[0]
+                remaining = deadline - self.clock()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._deadlines)
+                entry = self._locks.get(lock_id)
+                # Released (or re-issued) holds are left in the heap and skipped here
+                if entry is not None and entry.get("deadline") == deadline:
+                    self._remove(lock_id)
+                    RESERVATION_EXPIRED.inc()
+                    logger.info(f"Lock {lock_id} expired for agent {entry['agent_id']}")
+
+
+reservation_manager = ReservationManager()
+
+
+def calendar_create(event_data, lock_id=None):
+    """Book an event unless it overlaps an existing timed event or another agent's hold.
+
+    Pass the lock_id from reservation_manager.acquire_lock to book a slot you hold.
+    Returns {"status": "success", "event", "event_id"} or {"status": "conflict",
+    "event", "conflicting_with"}.
+    """
+    logger.debug("Creating calendar event: %s", Payload(event_data))
+    get_calendar_sync()
+
+    def held_by_other(event):
+        hold = reservation_manager.holder(event, ignore_lock_id=lock_id)
+        if hold:
+            logger.warning(f"Slot for {event.get('title')} is held by {hold['agent_id']}")
+            return {"reservation": hold["lock_id"], "agent_id": hold["agent_id"]}
+        return None
+
+    return calendar_writer.create(event_data, blocked=held_by_other)
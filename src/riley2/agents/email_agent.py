@@ -6,7 +6,9 @@ from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from pathlib import Path
 from riley2.core.llm_backend import summarize_text
-from riley2.core.logger_utils import logger
+from riley2.core.logger_utils import logger, Payload
+from riley2.core.tracing import span
+from riley2.core.date_args import DateFormatError, format_date, parse_date
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
@@ -33,15 +35,21 @@ def authenticate_gmail():
     logger.info("Gmail API authenticated successfully.")
     return build('gmail', 'v1', credentials=creds)
 
-def email_download_chunk(start_date: str, end_date: str):
+def email_download_chunk(start_date, end_date):
     logger.debug(f"Downloading emails from {start_date} to {end_date}.")
-    
+    try:
+        start, end = parse_date(start_date), parse_date(end_date, end=True)
+    except DateFormatError as e:
+        logger.error(f"Invalid email date range: {e}")
+        return f"Error: {e}"
+
     try:
         service = authenticate_gmail()
-        query = f"after:{start_date} before:{end_date}"
+        query = f"after:{format_date(start)} before:{format_date(end)}"
         
         try:
-            results = service.users().messages().list(userId='me', q=query, maxResults=20).execute()
+            with span("gmail.list"):
+                results = service.users().messages().list(userId='me', q=query, maxResults=20).execute()
             messages = results.get('messages', [])
             logger.info(f"Retrieved {len(messages)} emails.")
         except Exception as e:
@@ -51,7 +59,8 @@ def email_download_chunk(start_date: str, end_date: str):
         output = []
         for msg in messages:
             try:
-                msg_data = service.users().messages().get(userId='me', id=msg['id'], format='full').execute()
+                with span("gmail.get"):
+                    msg_data = service.users().messages().get(userId='me', id=msg['id'], format='full').execute()
                 headers = msg_data.get("payload", {}).get("headers", [])
                 subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '(No Subject)')
                 sender = next((h['value'] for h in headers if h['name'] == 'From'), '(Unknown Sender)')
@@ -77,5 +86,5 @@ def email_filter_by_sender(raw_emails: str, sender_email: str):
 def email_summarize_batch(raw_emails: str):
     logger.debug(f"Summarizing email batch of size: {len(raw_emails)} characters.")
     summary = summarize_text(raw_emails)
-    logger.debug(f"Email summary: {summary}")
+    logger.debug("Email summary: %s", Payload(summary))
     return summary
\ No newline at end of file
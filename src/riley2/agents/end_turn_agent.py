@@ -1,11 +1,139 @@
-from riley2.core.llm_backend import backend_llm
+import calendar
+import re
+import threading
+from riley2.core.logger_utils import logger
+from riley2.core.metrics import registry
+from riley2.core.query_classifier import compile_patterns
+from riley2.core.tool_results import ToolResult, is_error_result
+
+# Which tools can satisfy a request, keyed by the phrases that signal the intent.
+# Phrases match on word boundaries ("date" does not fire inside "update").
+# Checked in order; the first matching intent wins.
+INTENT_TOOLS = [
+    (("summarize", "summarise", "summary", "digest", "recap"), {"email_summarize_batch"}),
+    (("email", "emails", "inbox", "mail"), {"email_download_chunk", "email_filter_by_sender", "email_summarize_batch"}),
+    (("free", "available", "availability", "free time", "open slot"), {"calendar_free_slots"}),
+    (("calendar", "event", "events", "meeting", "meetings", "trip", "schedule", "appointment"), {"calendar_scan"}),
+    (("what can you", "capabilities", "what tools"), {"meta_query"}),
+    (("time", "date", "today"), {"get_current_time"}),
+]
+INTENT_PATTERNS = [(compile_patterns(keywords), tools) for keywords, tools in INTENT_TOOLS]
+
+# Steps that only feed a later tool: finishing one of these means the turn must go on
+PREREQUISITES = {
+    "email_download_chunk": {"email_filter_by_sender", "email_summarize_batch"},
+    "email_filter_by_sender": {"email_summarize_batch"},
+}
+
+# "emails from jess" names a sender; "emails from last week" or "from May 3" is a date range
+_TIME_WORDS = ["last", "this", "past", "next", "yesterday", "today", "tomorrow", "earlier", "recently",
+               r"the\s+(?:past|last)"] + [name.lower() for name in calendar.day_name[:] + calendar.month_name[1:]]
+SENDER_PATTERN = re.compile(rf"\bfrom\s+(?!(?:{'|'.join(_TIME_WORDS)})\b|\d)\S", re.IGNORECASE)
+
+END_TURN_DECISIONS = registry.counter(
+    "riley2_end_turn_decisions_total",
+    "End-of-turn decisions by source; rule_end + rule_continue are planner LLM hops saved", ("source",))
+
+
+class EndTurnStats:
+    """Counts how each end-of-turn decision was made, so saved LLM hops are visible."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rule_end = 0
+        self.rule_continue = 0
+        self.llm_escalations = 0
+
+    def record(self, source):
+        with self._lock:
+            setattr(self, source, getattr(self, source) + 1)
+        END_TURN_DECISIONS.labels(source).inc()
+
+    @property
+    def llm_hops_saved(self):
+        return self.rule_end + self.rule_continue
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "rule_end": self.rule_end,
+                "rule_continue": self.rule_continue,
+                "llm_escalations": self.llm_escalations,
+                "llm_hops_saved": self.llm_hops_saved,
+            }
+
+
+end_turn_stats = EndTurnStats()
+
+
+def expected_tools(query):
+    lowered = query.lower()
+    for pattern, tools in INTENT_PATTERNS:
+        if pattern.search(lowered):
+            if "email_download_chunk" in tools and SENDER_PATTERN.search(lowered):
+                # "emails from X" is only answered once the batch has been filtered
+                return tools - {"email_download_chunk"}
+            return tools
+    return set()
+
+
+def is_empty_result(result):
+    if isinstance(result, ToolResult):
+        return result.is_empty
+    if not result:
+        return True
+    if isinstance(result, str):
+        lowered = result.strip().lower()
+        return lowered.startswith("no ") and "found" in lowered
+    return False
+
 
 class EndTurnAgent:
+    def __init__(self, stats=None):
+        self.stats = stats or end_turn_stats
+
+    def evaluate(self, query, context):
+        """Decide from the shape of the last tool result.
+
+        Returns (True | False | None, reason); None means the rules are not sure.
+        Only clear-cut cases are decided here: whether to retry after an error or how
+        to recover from an unexpected tool is left to the LLM.
+        """
+        last_action, last_result = context.last_action_result()
+        if is_error_result(last_result):
+            return None, f"{last_action} returned an error"
+
+        tools = expected_tools(query)
+        if not tools:
+            return None, "could not infer the intent of the query"
+        if last_action in tools:
+            if is_empty_result(last_result):
+                # The filter may just have been too narrow; the LLM decides whether to retry broader
+                return None, f"{last_action} answers the query but found nothing"
+            return True, f"{last_action} answers the query and returned results"
+        if PREREQUISITES.get(last_action, set()) & tools and not is_empty_result(last_result):
+            return False, f"{last_action} only feeds the tools the query needs ({sorted(tools)})"
+        return None, f"{last_action} was not expected for this query (expecting one of {sorted(tools)})"
+
     def should_end_turn(self, query, context):
+        decision, reason = self.evaluate(query, context)
+        if decision is not None:
+            self.stats.record("rule_end" if decision else "rule_continue")
+            logger.debug(f"EndTurnAgent rule decision: {'end' if decision else 'continue'} - {reason}")
+            return decision
+
+        self.stats.record("llm_escalations")
+        logger.debug(f"EndTurnAgent escalating to LLM: {reason}")
+        return self._ask_llm(query, context)
+
+    def _ask_llm(self, query, context):
+        # Imported lazily: the LLM stack is only needed when the rules are unsure
+        from riley2.core.llm_backend import backend_llm
+
         prompt = f"""
         User asked: {query}
         Progress so far: {context.actions_log()}
         Do we have enough information to answer the user's query? Answer with "yes" or "no" only.
         """
         decision = backend_llm.get_decision(prompt)
-        return decision.lower().strip() == "yes"
\ No newline at end of file
+        return decision.lower().strip() == "yes"
@@ -0,0 +1,363 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from operator import attrgetter
+from datetime import datetime, timedelta
+from riley2.core.logger_utils import logger
+from riley2.core.date_args import format_date, parse_date
+from riley2.core.recurrence import parse_recurrence
+
+TITLE_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Calendar writes serialize per day on one of this many locks
+WRITE_LOCK_STRIPES = int(os.environ.get('RILEY2_CALENDAR_WRITE_STRIPES', 64))
+# Events longer than this (trips, semesters) are indexed apart so they don't widen every range scan
+LONG_EVENT_DURATION = timedelta(days=1)
+
+
+def title_tokens(text):
+    return set(TITLE_TOKEN_PATTERN.findall(text.lower()))
+
+
+def event_bounds(event):
+    """Return the [start, end) datetimes an event occupies.
+
+    Events without times take whole days; "end_date" makes them span several days.
+    """
+    day = datetime.combine(parse_date(event["date"]), datetime.min.time())
+    last_day = datetime.combine(parse_date(event["end_date"]), datetime.min.time()) if event.get("end_date") else day
+    if event.get("start_time") and not event.get("is_all_day"):
+        start = day + _time_offset(event["start_time"])
+        end = last_day + _time_offset(event["end_time"]) if event.get("end_time") else start + timedelta(hours=1)
+    else:
+        start = day
+        end = last_day + timedelta(days=1)
+    # Zero-length events still occupy an instant, so range queries can find them
+    return start, max(end, start + timedelta(microseconds=1))
+
+
+def days_covered(start, end):
+    """The dates a [start, end) interval touches."""
+    day = start.date()
+    while datetime.combine(day, datetime.min.time()) < end:
+        yield day
+        day += timedelta(days=1)
+
+
+def is_timed(event):
+    return bool(event.get("start_time")) and not event.get("is_all_day")
+
+
+def free_intervals(busy_lists, windows, min_length):
+    """Gaps of at least min_length inside windows that no busy interval covers.
+
+    busy_lists holds one start-sorted sequence of (start, end) per calendar, and
+    windows are sorted and disjoint. heapq.merge interleaves the calendars lazily,
+    which intersects everyone's free time in O(n log k), and a single sweep carries
+    one cursor through the windows and the busy time together.
+    """
+    busy = heapq.merge(*busy_lists)
+    pending = next(busy, None)
+    for window_start, window_end in windows:
+        cursor = window_start
+        while pending is not None and pending[0] < window_end:
+            start, end = pending
+            if end > cursor:
+                if start - cursor >= min_length:
+                    yield cursor, start
+                cursor = end
+            if end > window_end:
+                # Still busy when the next window opens
+                break
+            pending = next(busy, None)
+        if window_end - cursor >= min_length:
+            yield cursor, window_end
+
+
+def _time_offset(value):
+    hours, minutes = value.split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes))
+
+
+class _Entry:
+    __slots__ = ("event_id", "event", "start", "end", "key", "tokens", "title")
+
+    def __init__(self, event_id, event, sequence):
+        self.event_id = event_id
+        self.event = event
+        self.start, self.end = event_bounds(event)
+        # The sequence number keeps keys unique when several events start together
+        self.key = (self.start, sequence)
+        self.title = event.get("title", "").lower()
+        self.tokens = title_tokens(self.title)
+
+
+class _Series:
+    """A recurring event: the master event and its rule, never its expanded occurrences."""
+
+    __slots__ = ("event_id", "event", "rule", "start", "duration", "sequence", "tokens", "title", "template")
+
+    def __init__(self, event_id, event, rule, sequence):
+        self.event_id = event_id
+        self.event = event
+        self.rule = rule
+        self.start, end = event_bounds(event)
+        self.duration = end - self.start
+        self.sequence = sequence
+        self.title = event.get("title", "").lower()
+        self.tokens = title_tokens(self.title)
+        self.template = {key: value for key, value in event.items() if key not in ("recurrence", "end_date")}
+
+    def occurrences(self, start, end, excluded):
+        """Entries for the occurrences overlapping [start, end), in start order."""
+        for occurrence_start in self.rule.occurrences(self.start, start - self.duration, end):
+            occurrence_end = occurrence_start + self.duration
+            if occurrence_end <= start or occurrence_start in excluded:
+                continue
+            event = dict(self.template, id=f"{self.event_id}_{occurrence_start:%Y%m%dT%H%M%S}",
+                         date=format_date(occurrence_start), recurring_event_id=self.event_id)
+            last_day = (occurrence_end - timedelta(microseconds=1)).date()
+            if last_day > occurrence_start.date() and not is_timed(event):
+                event["end_date"] = format_date(last_day)
+            yield _Occurrence(event, occurrence_start, occurrence_end, self.sequence, self.title)
+
+
+class _Occurrence:
+    __slots__ = ("event_id", "event", "start", "end", "key", "title")
+
+    def __init__(self, event, start, end, sequence, title):
+        self.event_id = event["id"]
+        self.event = event
+        self.start = start
+        self.end = end
+        self.key = (start, sequence)
+        self.title = title
+
+
+class CalendarStore:
+    """In-memory calendar indexed for range and title lookups.
+
+    Events are parsed once on insert. Events of at most LONG_EVENT_DURATION live in a
+    list sorted by start time that answers range queries with two bisects: any of
+    them overlapping [start, end) must begin after start - LONG_EVENT_DURATION, so
+    only that slice is checked. Longer events (trips, semesters) are kept in their
+    own sorted list and checked directly, so one of them never widens the slice:
+    scans cost O(log N + k + L) for L long events. An inverted index of title
+    words narrows keyword searches before the substring check.
+
+    Recurring events are kept as one series each and expanded only inside the
+    queried window, so a month's lookup costs that month's occurrences.
+    Cancelled or moved instances are recorded as exclusions on their series.
+    """
+
+    def __init__(self, events=()):
+        self._entries = {}
+        self._keys = []
+        self._long_keys = []
+        self._by_key = {}
+        self._title_index = {}
+        self._series = {}
+        self._exclusions = {}
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+        for event in events:
+            self.insert(event)
+
+    def __len__(self):
+        return len(self._entries) + len(self._series)
+
+    def insert(self, event, event_id=None):
+        """Add or replace an event and return its id."""
+        with self._lock:
+            event_id = event_id or event.get("id") or f"local-{next(self._sequence)}"
+            if event_id in self._entries or event_id in self._series:
+                self.delete(event_id, keep_exclusions=True)
+            if event.get("recurring_event_id") and event.get("original_start"):
+                # A moved instance replaces its original occurrence in the series
+                self.exclude_occurrence(event["recurring_event_id"], datetime.fromisoformat(event["original_start"]))
+            rule = parse_recurrence(event["recurrence"]) if event.get("recurrence") else None
+            if rule:
+                series = _Series(event_id, event, rule, next(self._sequence))
+                self._series[event_id] = series
+                for token in series.tokens:
+                    self._title_index.setdefault(token, set()).add(event_id)
+                return event_id
+            entry = _Entry(event_id, event, next(self._sequence))
+            self._entries[event_id] = entry
+            insort(self._keys_for(entry), entry.key)
+            self._by_key[entry.key] = entry
+            for token in entry.tokens:
+                self._title_index.setdefault(token, set()).add(event_id)
+        return event_id
+
+    def _keys_for(self, entry):
+        return self._long_keys if entry.end - entry.start > LONG_EVENT_DURATION else self._keys
+
+    def delete(self, event_id, keep_exclusions=False):
+        """Remove an event or a whole series; returns False when the id is unknown."""
+        with self._lock:
+            entry = self._entries.pop(event_id, None) or self._series.pop(event_id, None)
+            if entry is None:
+                return False
+            if isinstance(entry, _Entry):
+                keys = self._keys_for(entry)
+                del keys[bisect_left(keys, entry.key)]
+                del self._by_key[entry.key]
+            elif not keep_exclusions:
+                self._exclusions.pop(event_id, None)
+            for token in entry.tokens:
+                ids = self._title_index[token]
+                ids.discard(event_id)
+                if not ids:
+                    del self._title_index[token]
+            return True
+
+    def replace(self, events, exclusions=()):
+        """Swap in a new set of events; concurrent scans see either the old or the new set.
+
+        exclusions are (series id, occurrence start) pairs, as exclude_occurrence takes.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._long_keys.clear()
+            self._by_key.clear()
+            self._title_index.clear()
+            self._series.clear()
+            self._exclusions.clear()
+            for event in events:
+                self.insert(event)
+            for series_id, start in exclusions:
+                self.exclude_occurrence(series_id, start)
+
+    def exclude_occurrence(self, series_id, start):
+        """Drop one occurrence of a series, e.g. a cancelled or moved instance."""
+        with self._lock:
+            self._exclusions.setdefault(series_id, set()).add(start)
+
+    def exclusions(self):
+        """Every excluded occurrence as (series id, start) pairs."""
+        with self._lock:
+            return [(series_id, start) for series_id, starts in self._exclusions.items() for start in sorted(starts)]
+
+    def events(self):
+        """Every stored event in start order, recurring series by their first occurrence."""
+        with self._lock:
+            entries = heapq.merge((self._by_key[key] for key in heapq.merge(self._keys, self._long_keys)),
+                                  sorted(self._series.values(), key=attrgetter("start")), key=attrgetter("start"))
+            return [entry.event for entry in entries]
+
+    def get(self, event_id):
+        entry = self._entries.get(event_id) or self._series.get(event_id)
+        return entry.event if entry else None
+
+    def _title_candidates(self, query):
+        """Ids whose title contains every word of the query, before the exact substring check."""
+        candidates = None
+        for word in title_tokens(query):
+            ids = self._title_index.get(word)
+            if ids is None:
+                # Partial words ("ital") match through the vocabulary, which is far smaller than the calendar
+                ids = set().union(*(ids for token, ids in self._title_index.items() if word in token))
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates
+
+    def _range_slice(self, start, end):
+        """Bounds of the short events that may overlap [start, end)."""
+        lo = bisect_left(self._keys, (start - LONG_EVENT_DURATION,))
+        hi = bisect_left(self._keys, (end,))
+        return lo, hi
+
+    def _one_offs_between(self, start, end):
+        lo, hi = self._range_slice(start, end)
+        short = (self._by_key[key] for key in self._keys[lo:hi])
+        long = (self._by_key[key] for key in self._long_keys[:bisect_left(self._long_keys, (end,))])
+        return [entry for entry in heapq.merge(short, long, key=attrgetter("key")) if entry.end > start]
+
+    def _occurrences_between(self, series, start, end):
+        return heapq.merge(*(s.occurrences(start, end, self._exclusions.get(s.event_id, ())) for s in series),
+                           key=attrgetter("key"))
+
+    def entries_between(self, start, end):
+        """Entries overlapping [start, end), recurring occurrences included, in start order."""
+        with self._lock:
+            return list(heapq.merge(self._one_offs_between(start, end),
+                                    self._occurrences_between(self._series.values(), start, end),
+                                    key=attrgetter("key")))
+
+    def scan(self, start, end, query=None):
+        """Events overlapping [start, end) whose title contains query, in start order."""
+        with self._lock:
+            if not query:
+                return [entry.event for entry in self.entries_between(start, end)]
+
+            needle = query.lower()
+            candidates = self._title_candidates(query) if title_tokens(query) else set(self._entries) | set(self._series)
+            one_offs = [event_id for event_id in candidates if event_id in self._entries]
+            lo, hi = self._range_slice(start, end)
+            if len(one_offs) < hi - lo + len(self._long_keys):
+                entries = sorted((self._entries[event_id] for event_id in one_offs), key=lambda e: e.key)
+                entries = [entry for entry in entries if entry.start < end and entry.end > start]
+            else:
+                entries = self._one_offs_between(start, end)
+            series = [self._series[event_id] for event_id in candidates if event_id in self._series]
+            entries = heapq.merge(entries, self._occurrences_between(series, start, end), key=attrgetter("key"))
+            matched = [entry.event for entry in entries if needle in entry.title]
+        logger.debug(f"Calendar store scan matched {len(matched)} of {len(self)} events")
+        return matched
+
+
+class CalendarWriter:
+    """Conflict-checked inserts into a CalendarStore, serialized per day.
+
+    A write takes the lock stripes of the days it covers, in index order so multi-day
+    events cannot deadlock, checks the store's interval index for overlapping timed
+    events and then persists. The store's own lock only covers the in-memory index
+    update; the persist step (an API call for real calendars) runs under the day
+    stripes alone. Days map to stripes by ordinal, so bookings on days less than
+    `stripes` days apart never wait for each other; days exactly a multiple of
+    `stripes` apart share a stripe and serialize.
+    """
+
+    def __init__(self, store, stripes=WRITE_LOCK_STRIPES, persist=None):
+        self.store = store
+        self.persist = persist
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+
+    def _locks_for(self, days):
+        return [self._stripes[i] for i in sorted({day.toordinal() % len(self._stripes) for day in days})]
+
+    def create(self, event, blocked=None):
+        """Insert event unless a timed event overlaps it or blocked(event) returns a reason.
+
+        Returns {"status": "success", "event", "event_id"} or
+        {"status": "conflict", "event", "conflicting_with"}. All-day events such as
+        trips or holidays are not treated as busy time.
+        """
+        start, end = event_bounds(event)
+        locks = self._locks_for(days_covered(start, end))
+        for lock in locks:
+            lock.acquire()
+        try:
+            if is_timed(event):
+                for entry in self.store.entries_between(start, end):
+                    if is_timed(entry.event):
+                        logger.warning(f"Conflict detected between events: {entry.event.get('title')} "
+                                       f"and {event.get('title')}")
+                        return {"status": "conflict", "event": event, "conflicting_with": entry.event}
+            reason = blocked(event) if blocked else None
+            if reason:
+                return {"status": "conflict", "event": event, "conflicting_with": reason}
+            if self.persist:
+                event = self.persist(event)
+            event_id = self.store.insert(event)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        logger.info(f"Event added to calendar: {event.get('title')}")
+        return {"status": "success", "event": event, "event_id": event_id}
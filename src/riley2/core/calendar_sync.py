@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from riley2.core.logger_utils import logger
+from riley2.core.date_args import CALENDAR_TIMEZONE, DEFAULT_TIMEZONE, format_date, parse_date, set_time_zone
+from riley2.core.tracing import span
+
+# Scans answer from the local store; it is refreshed from the API at most this often
+SYNC_INTERVAL_SECONDS = float(os.environ.get('RILEY2_CALENDAR_SYNC_SECONDS', 60))
+SYNC_PAGE_SIZE = 250
+
+
+class SyncTokenExpired(Exception):
+    """The server no longer accepts the stored sync token; a full sync is needed."""
+
+
+def _is_gone(error):
+    # googleapiclient.errors.HttpError carries the HTTP status on resp
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return str(status) == "410"
+
+
+def _split_google_time(value, zone=None):
+    """Return (date, "HH:MM" or None) from a Google {"date"} or {"dateTime"} field.
+
+    Times are converted to zone; without one they keep the event's own offset.
+    """
+    if "dateTime" in value:
+        moment = datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+        if zone is not None and moment.tzinfo is not None:
+            moment = moment.astimezone(zone)
+        return moment.date(), moment.strftime("%H:%M")
+    return parse_date(value["date"]), None
+
+
+def _original_start(item, zone=None):
+    """Naive start, in zone, of the series occurrence a moved or cancelled instance stands in for."""
+    day, start_time = _split_google_time(item["originalStartTime"], zone)
+    return datetime.combine(day, datetime.strptime(start_time, "%H:%M").time() if start_time else datetime.min.time())
+
+
+def google_event_to_local(item, zone=None):
+    """Convert a Google Calendar API event into the store's event dict, with timed events in zone."""
+    start_day, start_time = _split_google_time(item["start"], zone)
+    end_day, end_time = _split_google_time(item.get("end") or item["start"], zone)
+    event = {"id": item["id"], "title": item.get("summary", "(No title)"), "date": format_date(start_day)}
+    if start_time:
+        event["start_time"] = start_time
+        event["end_time"] = end_time
+    else:
+        # All-day end dates are exclusive in the API
+        end_day -= timedelta(days=1)
+        event["is_all_day"] = True
+    if end_day > start_day:
+        event["end_date"] = format_date(end_day)
+    for field in ("location", "recurrence"):
+        if item.get(field):
+            event[field] = item[field]
+    if item.get("recurringEventId") and item.get("originalStartTime"):
+        event["recurring_event_id"] = item["recurringEventId"]
+        event["original_start"] = _original_start(item, zone).isoformat()
+    return event
+
+
+def local_event_to_google(event, time_zone=DEFAULT_TIMEZONE):
+    """Convert a store event dict, with times in time_zone, into a Calendar API event body."""
+    first_day = parse_date(event["date"])
+    last_day = parse_date(event["end_date"]) if event.get("end_date") else first_day
+    body = {"summary": event.get("title", "")}
+    if event.get("start_time") and not event.get("is_all_day"):
+        end_time = event.get("end_time") or event["start_time"]
+        body["start"] = {"dateTime": f"{first_day.isoformat()}T{event['start_time']}:00", "timeZone": time_zone}
+        body["end"] = {"dateTime": f"{last_day.isoformat()}T{end_time}:00", "timeZone": time_zone}
+    else:
+        body["start"] = {"date": first_day.isoformat()}
+        body["end"] = {"date": (last_day + timedelta(days=1)).isoformat()}
+    if event.get("location"):
+        body["location"] = event["location"]
+    return body
+
+
+class CalendarSync:
+    """Keeps a CalendarStore in step with a Google Calendar through sync tokens.
+
+    The first sync pages through every event; later syncs ask only for changes since
+    the last nextSyncToken. The events and token are snapshotted to state_path, so a
+    restart resumes incrementally instead of downloading the whole calendar again.
+
+    Timed events are stored as naive times in one zone: time_zone if given, otherwise
+    the calendar's own zone from the API. Conflict checks and free-slot sweeps can
+    then compare store times and free/busy times directly.
+    """
+
+    def __init__(self, service, store, calendar_id="primary", state_path=None, interval=SYNC_INTERVAL_SECONDS,
+                 time_zone=CALENDAR_TIMEZONE):
+        self.service = service
+        self.store = store
+        self.calendar_id = calendar_id
+        self.state_path = state_path
+        self.interval = interval
+        self._fixed_zone = time_zone is not None
+        self.time_zone = time_zone or DEFAULT_TIMEZONE
+        set_time_zone(self.time_zone)
+        self.sync_token = None
+        self.last_sync = None
+        self._sync_lock = threading.Lock()
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable calendar cache {self.state_path}: {e}")
+            return
+        if not self._fixed_zone:
+            self.time_zone = state.get("time_zone", self.time_zone)
+            set_time_zone(self.time_zone)
+        for event in state.get("events", []):
+            self.store.insert(event)
+        for series_id, start in state.get("exclusions", []):
+            self.store.exclude_occurrence(series_id, datetime.fromisoformat(start))
+        self.sync_token = state.get("sync_token")
+        logger.info(f"Loaded {len(self.store)} cached calendar events from {self.state_path}")
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        state = {"sync_token": self.sync_token, "time_zone": self.time_zone, "events": self.store.events(),
+                 "exclusions": [(series_id, start.isoformat()) for series_id, start in self.store.exclusions()]}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _pages(self, **params):
+        page_token = None
+        while True:
+            with span("gcal.events.list"):
+                try:
+                    response = self.service.events().list(
+                        calendarId=self.calendar_id, pageToken=page_token, maxResults=SYNC_PAGE_SIZE,
+                        showDeleted=True, **params).execute()
+                except Exception as e:
+                    if _is_gone(e):
+                        raise SyncTokenExpired() from e
+                    raise
+            reported = response.get("timeZone")
+            if not self._fixed_zone and reported and reported != self.time_zone:
+                logger.info(f"Calendar time zone is {reported}; storing events in it instead of {self.time_zone}")
+                self.time_zone = reported
+                set_time_zone(reported)
+                if "syncToken" in params:
+                    # Stored events are in the old zone; only a full sync converts them all
+                    raise SyncTokenExpired()
+            yield response
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    @property
+    def zone(self):
+        return ZoneInfo(self.time_zone)
+
+    def _apply(self, items):
+        zone = self.zone
+        for item in items:
+            if item.get("status") == "cancelled":
+                self.store.delete(item["id"])
+                if item.get("recurringEventId") and item.get("originalStartTime"):
+                    self.store.exclude_occurrence(item["recurringEventId"], _original_start(item, zone))
+            else:
+                self.store.insert(google_event_to_local(item, zone))
+
+    def sync(self):
+        """Pull changes (or everything, the first time) into the store; returns the number applied."""
+        with self._sync_lock:
+            return self._sync_locked()
+
+    def _sync_locked(self):
+        full = self.sync_token is None
+        try:
+            applied, token = self._pull(full)
+        except SyncTokenExpired:
+            logger.warning("Calendar sync token expired; running a full sync")
+            full = True
+            applied, token = self._pull(full)
+        self.sync_token = token
+        self.last_sync = time.monotonic()
+        self._save_state()
+        logger.info(f"{'Full' if full else 'Incremental'} calendar sync applied {applied} changes")
+        return applied
+
+    def _pull(self, full):
+        if full:
+            # Collect first so a failed full sync leaves the current store untouched
+            items, token = [], None
+            for page in self._pages():
+                items.extend(page.get("items", []))
+                token = page.get("nextSyncToken", token)
+            # Recurring events stay one series each; cancelled instances become exclusions
+            zone = self.zone
+            self.store.replace(
+                (google_event_to_local(item, zone) for item in items if item.get("status") != "cancelled"),
+                [(item["recurringEventId"], _original_start(item, zone)) for item in items
+                 if item.get("status") == "cancelled" and item.get("recurringEventId") and item.get("originalStartTime")])
+            return len(items), token
+
+        applied, token = 0, self.sync_token
+        for page in self._pages(syncToken=self.sync_token):
+            items = page.get("items", [])
+            self._apply(items)
+            applied += len(items)
+            token = page.get("nextSyncToken", token)
+        return applied, token
+
+    def create_event(self, event):
+        """Insert event through the API and return it as the store will hold it, with the API's id."""
+        with span("gcal.events.insert"):
+            created = self.service.events().insert(
+                calendarId=self.calendar_id, body=local_event_to_google(event, self.time_zone)).execute()
+        return google_event_to_local(created, self.zone)
+
+    def free_busy(self, attendees, start, end):
+        """Busy (start, end) intervals per attendee, sorted, as naive times in the store's zone.
+
+        Attendees whose calendars the API will not share are left out.
+        """
+        zone = self.zone
+        body = {"timeMin": start.replace(tzinfo=zone).isoformat(), "timeMax": end.replace(tzinfo=zone).isoformat(),
+                "items": [{"id": attendee} for attendee in attendees]}
+        with span("gcal.freebusy.query"):
+            response = self.service.freebusy().query(body=body).execute()
+
+        def local(value):
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(zone).replace(tzinfo=None)
+
+        busy = {}
+        for attendee, calendar in response.get("calendars", {}).items():
+            if calendar.get("errors"):
+                logger.warning(f"No free/busy access for {attendee}: {calendar['errors']}")
+                continue
+            busy[attendee] = sorted((local(b["start"]), local(b["end"])) for b in calendar.get("busy", []))
+        return busy
+
+    def refresh(self):
+        """Sync if the store is older than the interval.
+
+        The first sync blocks so the answer is complete; later ones run in the
+        background and the current query is answered from the store as it is.
+        """
+        if self.last_sync is None and self.sync_token is None:
+            self.sync()
+        elif self.last_sync is None or time.monotonic() - self.last_sync >= self.interval:
+            # Taking the lock here, not in the thread, means only one caller ever starts a sync
+            if self._sync_lock.acquire(blocking=False):
+                try:
+                    threading.Thread(target=self._background_sync, name="riley2-calendar-sync", daemon=True).start()
+                except BaseException:
+                    self._sync_lock.release()
+                    raise
+
+    def _background_sync(self):
+        try:
+            self._sync_locked()
+        except Exception as e:
+            logger.error(f"Background calendar sync failed: {e}")
+        finally:
+            self._sync_lock.release()
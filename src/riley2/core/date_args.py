@@ -0,0 +1,162 @@
+import os
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from riley2.core.logger_utils import logger
+
+# The one format tools and prompts exchange; parse_date also accepts YYYY-MM-DD and phrases
+DATE_FORMAT = "%Y/%m/%d"
+
+ABSOLUTE_DATE_PATTERN = re.compile(r"^(\d{4})[/-](\d{1,2})[/-](\d{1,2})$")
+RELATIVE_OFFSET_PATTERN = re.compile(r"^(?:in (\d+) (day|week)s?|(\d+) (day|week)s? ago)$")
+WEEKDAY_PATTERN = re.compile(r"^(?:(this|next|last) )?(monday|tuesday|wednesday|thursday|friday|saturday|sunday)$")
+SPAN_PATTERN = re.compile(r"^(this|next|last) (week|weekend|month)$")
+DURATION_PATTERN = re.compile(
+    r"^(?:(\d+(?:\.\d+)?) ?(?:h|hr|hrs|hours?))?\s*(?:(\d+) ?(?:m|min|mins|minutes?))?$")
+TIME_OF_DAY_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+SINGLE_DAYS = {"today": 0, "tomorrow": 1, "yesterday": -1}
+SPAN_SHIFT = {"this": 0, "next": 1, "last": -1}
+
+# Zone the calendar keeps its times in. Unset means the calendar's own zone as the API
+# reports it; until calendar sync has seen it, UTC.
+CALENDAR_TIMEZONE = os.environ.get('RILEY2_CALENDAR_TIMEZONE')
+DEFAULT_TIMEZONE = 'UTC'
+# Every "now" and "today" comes from this one clock, so date phrases resolve to the same
+# day whichever code path parses them
+_clock_zone = ZoneInfo(CALENDAR_TIMEZONE or DEFAULT_TIMEZONE)
+
+
+class DateFormatError(ValueError):
+    """Raised for a date argument that is neither a known format nor a known phrase."""
+
+
+def set_time_zone(name):
+    """Point the shared clock at the calendar's zone; calendar sync calls this when it learns it."""
+    global _clock_zone
+    _clock_zone = ZoneInfo(name)
+
+
+def local_now():
+    """The current time as a naive datetime in the calendar's zone."""
+    return datetime.now(_clock_zone).replace(tzinfo=None)
+
+
+def local_today():
+    return local_now().date()
+
+
+def format_date(value):
+    return value.strftime(DATE_FORMAT)
+
+
+def parse_duration(value):
+    """Normalize a duration argument to a timedelta; bare numbers are minutes.
+
+    Accepts "90", "1h", "1.5 hours", "45 min" and "1h30m".
+    """
+    if isinstance(value, timedelta):
+        duration = value
+    elif isinstance(value, (int, float)):
+        duration = timedelta(minutes=value)
+    else:
+        duration = _parse_duration_text(value)
+    if duration <= timedelta(0):
+        raise DateFormatError(f"Duration must be positive, got {value!r}")
+    return duration
+
+
+def _parse_duration_text(value):
+    text = str(value).strip().lower()
+    if text.replace(".", "", 1).isdigit():
+        return timedelta(minutes=float(text))
+    match = DURATION_PATTERN.match(text)
+    if not text or not match or not any(match.groups()):
+        raise DateFormatError(f"Unrecognized duration format: {value!r}; expected minutes or a phrase like '1h30m'")
+    hours, minutes = match.groups()
+    return timedelta(hours=float(hours or 0), minutes=int(minutes or 0))
+
+
+def parse_time_of_day(value):
+    """Normalize "HH:MM" to minutes after midnight; "24:00" is the end of the day."""
+    match = TIME_OF_DAY_PATTERN.match(str(value).strip())
+    if not match or int(match.group(2)) > 59 or int(match.group(1)) * 60 + int(match.group(2)) > 24 * 60:
+        raise DateFormatError(f"Unrecognized time format: {value!r}; expected HH:MM")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def parse_date(value, today=None, end=False):
+    """Normalize a tool date argument to a datetime.date.
+
+    Accepts date/datetime objects, YYYY/MM/DD, YYYY-MM-DD and relative phrases such as
+    "tomorrow", "next friday", "in 3 days" or "next weekend". For phrases covering
+    several days, end=True returns the last day instead of the first. Results are
+    memoized, so the planner repeating the same arguments costs a dict lookup.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = " ".join(str(value).strip().lower().split())
+    parsed = _parse_absolute(text)
+    if parsed is None:
+        parsed = _parse_relative(text, today or local_today(), end)
+    if parsed is None:
+        raise DateFormatError(
+            f"Unrecognized date format: {value!r}; expected YYYY/MM/DD, YYYY-MM-DD or a phrase like 'next weekend'")
+    return parsed
+
+
+@lru_cache(maxsize=4096)
+def _parse_absolute(text):
+    match = ABSOLUTE_DATE_PATTERN.match(text)
+    if not match:
+        return None
+    try:
+        return date(*map(int, match.groups()))
+    except ValueError as e:
+        raise DateFormatError(f"Invalid date {text!r} for format YYYY/MM/DD: {e}") from None
+
+
+@lru_cache(maxsize=1024)
+def _parse_relative(text, today, end):
+    if text in SINGLE_DAYS:
+        return today + timedelta(days=SINGLE_DAYS[text])
+
+    match = RELATIVE_OFFSET_PATTERN.match(text)
+    if match:
+        ahead_count, ahead_unit, ago_count, ago_unit = match.groups()
+        count = int(ahead_count or ago_count) * (7 if (ahead_unit or ago_unit) == "week" else 1)
+        return today + timedelta(days=count if ahead_count else -count)
+
+    match = WEEKDAY_PATTERN.match(text)
+    if match:
+        which, name = match.groups()
+        delta = WEEKDAYS.index(name) - today.weekday()
+        if which == "last":
+            return today + timedelta(days=delta - 7 if delta >= 0 else delta)
+        if which == "next":
+            # The one in next week, not merely the coming one
+            return today + timedelta(days=delta + 7)
+        return today + timedelta(days=delta % 7)
+
+    match = SPAN_PATTERN.match(text)
+    if match:
+        which, unit = match.groups()
+        shift = SPAN_SHIFT[which]
+        if unit == "month":
+            month_index = today.year * 12 + today.month - 1 + shift
+            first = date(month_index // 12, month_index % 12 + 1, 1)
+            if not end:
+                return first
+            following = date((month_index + 1) // 12, (month_index + 1) % 12 + 1, 1)
+            return following - timedelta(days=1)
+        monday = today - timedelta(days=today.weekday()) + timedelta(weeks=shift)
+        if unit == "weekend":
+            return monday + timedelta(days=6 if end else 5)
+        return monday + timedelta(days=6 if end else 0)
+
+    logger.debug(f"No relative date phrase matched {text!r}")
+    return None
@@ -0,0 +1,158 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from riley2.core.logger_utils import CompressingRotatingFileHandler, attach_queue_listener, log_dir
+
+# One JSON object per line; rotated and archived like the text logs
+EVENT_LOG_PATH = os.environ.get('RILEY2_EVENT_LOG', os.path.join(log_dir, "riley2_events.jsonl"))
+EVENT_LOG_ENABLED = os.environ.get('RILEY2_EVENT_LOG_ENABLED', '1') not in ('0', 'false', 'False')
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+_trace_id = contextvars.ContextVar("riley2_trace_id", default=None)
+_span_id = contextvars.ContextVar("riley2_span_id", default=None)
+
+
+def new_id():
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id=None):
+    """Tag every event emitted inside this block (one user request) with the same trace_id."""
+    token = _trace_id.set(trace_id or new_id())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+class EventLog:
+    """Structured event stream written as JSON lines by a background listener.
+
+    The file and writer thread are only created when the first event is emitted.
+    """
+
+    def __init__(self, path=EVENT_LOG_PATH, enabled=EVENT_LOG_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        # Standalone logger so events never reach the riley2 console/file handlers
+        self._logger = logging.Logger("riley2.events", logging.INFO)
+        self._handler = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._handler = CompressingRotatingFileHandler(self.path)
+                    self._handler.setFormatter(logging.Formatter("%(message)s"))
+                    self._listener = attach_queue_listener(self._logger, self._handler)
+
+    def emit(self, stage, duration_ms=None, span_id=None, **fields):
+        if not self.enabled:
+            return
+        event = {
+            "ts": round(time.time(), 6),
+            "trace_id": _trace_id.get(),
+            "span_id": span_id or new_id(),
+            "parent_id": _span_id.get(),
+            "stage": stage,
+        }
+        if duration_ms is not None:
+            event["duration_ms"] = round(duration_ms, 3)
+        event.update(fields)
+        self._ensure_listener()
+        self._logger.info(json.dumps(event, default=str))
+
+    @contextmanager
+    def timed(self, stage, **fields):
+        """Emit one event with duration_ms when the block exits.
+
+        Yields the fields dict so the block can add tool names, token counts or cache hits.
+        Events emitted inside the block record this span as their parent_id.
+        """
+        if not self.enabled:
+            yield fields
+            return
+        span_id = new_id()
+        token = _span_id.set(span_id)
+        status = "ok"
+        started = time.perf_counter()
+        try:
+            yield fields
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            _span_id.reset(token)
+            self.emit(stage, duration_ms=duration_ms, span_id=span_id, **{"status": status, **fields})
+
+    def close(self):
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._handler.close()
+                self._listener = None
+                self._handler = None
+
+
+event_log = EventLog()
+
+
+def emit_event(stage, **fields):
+    event_log.emit(stage, **fields)
+
+
+def timed_event(stage, **fields):
+    return event_log.timed(stage, **fields)
+
+
+def read_events(path=EVENT_LOG_PATH):
+    """Yield events from a JSON-lines file, skipping lines that do not parse."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def latency_percentiles(events, percentiles=DEFAULT_PERCENTILES):
+    """Return {stage: {"count", "p50", ..., "max"}} over events that carry a duration."""
+    durations = {}
+    for event in events:
+        if "duration_ms" in event:
+            durations.setdefault(event.get("stage"), []).append(event["duration_ms"])
+
+    summary = {}
+    for stage, values in durations.items():
+        values.sort()
+        stats = {"count": len(values)}
+        for pct in percentiles:
+            stats[f"p{pct}"] = percentile(values, pct)
+        stats["max"] = values[-1]
+        summary[stage] = stats
+    return summary
@@ -1,19 +1,26 @@
 import logging
-from .logger_utils import logger
+from .logger_utils import logger, Payload
+from .tracing import span
+from .metrics import record_llm_call
+from .prompt_builder import KEEP_START, QUERY_BUDGET, PromptBuilder
 from langchain_ollama import ChatOllama
 
-def frontend_llm_response(user_query):
-    logger.debug(f"Frontend LLM called with user query: {user_query}")
-    llm = ChatOllama(model="mistral", temperature=0.7)  # Higher temperature for natural talk
-    prompt = f"""
+FRONTEND_INSTRUCTIONS = """
 You are Riley2's Frontend LLM.
 You handle casual conversation with the user and polish structured backend results nicely.
 
-User says:
-"{user_query}"
+User says:"""
 
-Respond naturally, warmly, and conversationally.
-"""
-    response = llm.invoke(prompt).content
-    logger.debug(f"Frontend LLM response: {response}")
+def frontend_llm_response(user_query):
+    logger.debug(f"Frontend LLM called with user query: {user_query}")
+    llm = ChatOllama(model="mistral", temperature=0.7)  # Higher temperature for natural talk
+    prompt = (PromptBuilder("frontend")
+              .add("instructions", FRONTEND_INSTRUCTIONS)
+              .add("query", f'"{user_query}"', budget=QUERY_BUDGET, policy=KEEP_START)
+              .add("format", "\nRespond naturally, warmly, and conversationally.\n")
+              .build())
+    with span("llm.frontend"):
+        response = llm.invoke(prompt).content
+    record_llm_call("frontend", prompt, response)
+    logger.debug("Frontend LLM response: %s", Payload(response))
     return response
\ No newline at end of file
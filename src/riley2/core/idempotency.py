@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from riley2.core.logger_utils import logger
+from riley2.core.metrics import CACHE_LOOKUPS
+
+# Twilio gives up retrying well within this window; longer only costs memory
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get('RILEY2_IDEMPOTENCY_TTL', 600))
+IDEMPOTENCY_MAX_ENTRIES = int(os.environ.get('RILEY2_IDEMPOTENCY_MAX_ENTRIES', 10000))
+
+
+class IdempotencyCache:
+    """Runs compute() once per key; repeats within the TTL get the same result.
+
+    A duplicate that arrives while the first call is still running waits on it instead
+    of starting a second one. Failures are not cached, so a later retry computes again.
+    Entries expire in insertion order, which matches expiry order because the TTL is fixed.
+    """
+
+    def __init__(self, ttl_seconds=IDEMPOTENCY_TTL_SECONDS, max_entries=IDEMPOTENCY_MAX_ENTRIES, name="idempotency"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.name = name
+        self._entries = OrderedDict()  # key -> (expires_at, future)
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._entries:
+            key, (expires_at, future) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and (expires_at > now or not future.done()):
+                break
+            del self._entries[key]
+
+    def run(self, key, compute):
+        """Return compute()'s result, computing it at most once per key within the TTL."""
+        if not key:
+            return compute()
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                future = Future()
+                self._entries[key] = (now + self.ttl_seconds, future)
+            else:
+                future = entry[1]
+
+        if not owner:
+            CACHE_LOOKUPS.labels(self.name, "hit").inc()
+            logger.info(f"Duplicate delivery for {key}; reusing {'running' if not future.done() else 'finished'} call")
+            return future.result()
+
+        CACHE_LOOKUPS.labels(self.name, "miss").inc()
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key, (None, None))[1] is future:
+                    del self._entries[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,100 @@
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from riley2.core.logger_utils import logger
+
+INTENT_CORPUS_PATH = Path(__file__).resolve().parents[3] / "data" / "intent_corpus.json"
+
+# Confidence is the cosine margin between the best and second-best intent.
+# Below this the caller should fall back to the LLM router. Tuned with
+# scripts/benchmark_routing.py (leave-one-out over the 180-query corpus):
+#   0.05 -> 83.8% accurate when confident, 21 misrouted, 27.8% fall back
+#   0.10 -> 90.4%,  9 misrouted, 47.8% fall back
+#   0.15 -> 94.6%,  4 misrouted, 58.9% fall back
+# A misroute sends the wrong first tool with no LLM check, so accuracy wins.
+DEFAULT_CONFIDENCE_THRESHOLD = 0.15
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = {
+    "a", "an", "the", "my", "me", "i", "to", "of", "in", "on", "for", "is", "are", "was",
+    "what", "what's", "do", "does", "did", "have", "has", "got", "any", "please", "about",
+    "this", "that", "it", "you", "your", "be", "at", "with", "and", "or", "there",
+}
+
+
+def _stem(word):
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > 4 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    return [_stem(word) for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+
+class IntentClassifier:
+    """TF-IDF nearest-centroid classifier; pure Python so it runs anywhere the app does."""
+
+    def __init__(self, threshold=DEFAULT_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.idf = {}
+        self.centroids = {}
+
+    def fit(self, samples):
+        documents = [(Counter(tokenize(s["query"])), s["label"]) for s in samples]
+        document_frequency = Counter(term for counts, _ in documents for term in counts)
+        total = len(documents)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+        sums = defaultdict(lambda: defaultdict(float))
+        for counts, label in documents:
+            for term, weight in self._vectorize(counts).items():
+                sums[label][term] += weight
+        self.centroids = {label: _normalize(vector) for label, vector in sums.items()}
+        logger.debug(f"Trained intent classifier on {total} samples, {len(self.centroids)} intents")
+        return self
+
+    def _vectorize(self, counts):
+        return _normalize({term: count * self.idf[term] for term, count in counts.items() if term in self.idf})
+
+    def predict(self, query):
+        """Return (label, confidence); label is None when confidence is under the threshold."""
+        vector = self._vectorize(Counter(tokenize(query)))
+        scores = sorted(
+            (sum(weight * centroid.get(term, 0.0) for term, weight in vector.items()), label)
+            for label, centroid in self.centroids.items()
+        )
+        best_score, best_label = scores[-1]
+        confidence = best_score - (scores[-2][0] if len(scores) > 1 else 0.0)
+        if best_score == 0.0 or confidence < self.threshold:
+            return None, confidence
+        return best_label, confidence
+
+
+def load_intent_corpus(path=INTENT_CORPUS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_intent_model():
+    """Train once per process and keep the model hot in memory."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = IntentClassifier().fit(load_intent_corpus())
+    return _model
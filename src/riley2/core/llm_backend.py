@@ -1,62 +1,107 @@
+import os
 from langchain_ollama import ChatOllama
-from langchain.prompts import PromptTemplate
-from riley2.core.logger_utils import logger, log_agent_interaction
+from riley2.core.logger_utils import logger, log_agent_interaction, Payload
+from riley2.core.tracing import span
+from riley2.core.metrics import record_llm_call
+from riley2.core.prompt_builder import (
+    KEEP_START, NOTE_BUDGET, SUMMARIZE, TOOL_RESULT_BUDGET, PromptBuilder, truncate_tokens,
+)
+from riley2.core.session_memory import estimate_tokens
 
 # Initialize LLM
 llm = ChatOllama(model="mistral", temperature=0.4)
 
-backend_prompt = PromptTemplate(
-    input_variables=["tool", "args", "output"],
-    template="""
+SUMMARIZE_INSTRUCTIONS = """
 You are Riley2, a helpful AI assistant. Your task is to interpret the results of tools and explain them to the user in natural language.
 
-Tool used: {tool}
-Arguments: {args}
-Raw tool output:
-{output}
-
-Please turn this into a human-readable, conversational response.
-"""
-)
+Tool used: summarize_email
+Raw tool output:"""
+
+SUMMARIZE_FORMAT = "\nPlease turn this into a human-readable, conversational response.\n"
+
+# Tokens of email text one summarize prompt carries; larger batches are summarized in chunks first
+SUMMARY_TEXT_BUDGET = int(os.environ.get('RILEY2_SUMMARY_TEXT_BUDGET', 1024))
+# Chunk summaries per batch; emails beyond these are reported as omitted rather than summarized
+MAX_SUMMARY_CHUNKS = int(os.environ.get('RILEY2_MAX_SUMMARY_CHUNKS', 8))
+# email_download_chunk joins messages with this
+BATCH_SEPARATOR = "\n---\n"
+OMITTED_NOTE_TOKENS = 16
+
+def _summary_prompt(text, summarizer=None):
+    return (PromptBuilder("summarize")
+            .add("instructions", SUMMARIZE_INSTRUCTIONS)
+            .add("text", text, budget=SUMMARY_TEXT_BUDGET, policy=SUMMARIZE if summarizer else KEEP_START,
+                 summarizer=summarizer)
+            .add("format", SUMMARIZE_FORMAT)
+            .build())
+
+def _invoke_summary(prompt, role):
+    with span("llm.summarize", role=role):
+        result = llm.invoke(prompt).content
+    record_llm_call(role, prompt, result)
+    return result
 
-backend_chain = backend_prompt | llm
+def _pack(items, budget):
+    """Group items, in order, into chunks of at most budget tokens; an oversized item gets a chunk to itself."""
+    chunks, current, used = [], [], 0
+    for item in items:
+        tokens = estimate_tokens(item + BATCH_SEPARATOR)
+        if current and used + tokens > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def condense_batch(text, budget):
+    """Map step for an over-budget batch: summarize chunks of whole emails, then pass on the partial summaries.
+
+    Anything left out is stated in the result, so the final summary never silently covers
+    only the first emails.
+    """
+    items = [item for item in text.split(BATCH_SEPARATOR) if item.strip()]
+    chunks = _pack(items, budget)
+    kept, dropped = chunks[:MAX_SUMMARY_CHUNKS], chunks[MAX_SUMMARY_CHUNKS:]
+    logger.info(f"Summarizing {len(items)} emails in {len(kept)} chunks first")
+    part_budget = max((budget - OMITTED_NOTE_TOKENS) // len(kept), 1)
+    parts = []
+    for number, chunk in enumerate(kept, 1):
+        summary = _invoke_summary(_summary_prompt(BATCH_SEPARATOR.join(chunk)), "summarize_chunk")
+        parts.append(truncate_tokens(f"Part {number} ({len(chunk)} emails): {summary.strip()}", part_budget))
+    omitted = sum(len(chunk) for chunk in dropped)
+    if omitted:
+        parts.append(f"({omitted} emails omitted)")
+    return "\n".join(parts)
 
 def summarize_text(text, verbose=False):
-    logger.debug(f"Summarize text called with: {text[:100]}{'...' if len(text) > 100 else ''}")
-    if verbose: logger.info(f"[LLM Prompt Input] {text}")
-    raw_result = backend_chain.invoke({
-        "tool": "summarize_email",
-        "args": text,
-        "output": text
-    })
-    logger.debug(f"Summarization result: {raw_result}")
-    if verbose: logger.info(f"[LLM Raw Output] {raw_result}")
-    result = raw_result.content
-    if verbose: logger.info(f"[LLM Final Output]: {result}")
+    logger.debug("Summarize text called with: %s", Payload(text, limit=100))
+    if verbose: logger.info("[LLM Prompt Input] %s", Payload(text))
+    prompt = _summary_prompt(text, summarizer=condense_batch)
+    result = _invoke_summary(prompt, "summarize")
+    logger.debug("Summarization result: %s", Payload(result))
+    if verbose: logger.info("[LLM Final Output]: %s", Payload(result))
     return result
 
 def interpret_tool_command(tool_name, args, result):
-    logger.debug(f"Interpreting tool command: {tool_name} with args: {args} and result: {result}")
-    logger.debug(f"[interpret_tool_command] tool_name: {tool_name}, args: {args}, result: {result}")
+    logger.debug("[interpret_tool_command] tool_name: %s, args: %s, result: %s", tool_name, Payload(args), Payload(result))
 
     local_llm = ChatOllama(model="mistral", temperature=0.7)
 
-    prompt = PromptTemplate.from_template(
-        "You are Riley2. A user asked to use the tool '{tool_name}' with arguments {args}. "
-        "The tool returned this result:\n\n{result}\n\n"
-        "Craft a clear, human-sounding response to summarize the result to the user."
-    )
-
-    local_backend_chain = prompt | local_llm
+    prompt = (PromptBuilder("interpret")
+              .add("request", f"You are Riley2. A user asked to use the tool '{tool_name}' with arguments {args}. "
+                              "The tool returned this result:\n", budget=NOTE_BUDGET, policy=KEEP_START)
+              .add("tool_result", result, budget=TOOL_RESULT_BUDGET, policy=KEEP_START)
+              .add("format", "\nCraft a clear, human-sounding response to summarize the result to the user.")
+              .build())
 
-    output = local_backend_chain.invoke({
-        "tool_name": tool_name,
-        "args": args,
-        "result": result
-    }).content
+    with span("llm.interpret", tool=tool_name):
+        output = local_llm.invoke(prompt).content
+    record_llm_call("interpret", prompt, output)
 
     logger.debug(f"Interpretation complete for tool: {tool_name}")
-    logger.debug(f"[interpret_tool_command] Final Response: {output}")
+    logger.debug("[interpret_tool_command] Final Response: %s", Payload(output))
     return output
 
 # Smarter backend agent logic
@@ -78,7 +123,7 @@ class BackendLLM:
         return action
 
     def get_decision(self, prompt):
-        logger.debug(f"Getting decision for prompt: {prompt}")
+        logger.debug("Getting decision for prompt: %s", Payload(prompt))
         if "enough information" in prompt.lower():
             decision = "yes"
         else:
@@ -89,11 +134,13 @@ class BackendLLM:
 backend_llm = BackendLLM()
 
 def backend_planner_llm(prompt, verbose=False):
-    logger.debug(f"Backend planner LLM called with prompt: {prompt}")
+    logger.debug("Backend planner LLM called with prompt: %s", Payload(prompt))
     local_llm = ChatOllama(model="mistral", temperature=0.2)
-    result = local_llm.invoke(prompt).content
+    with span("llm.planner"):
+        result = local_llm.invoke(prompt).content
+    record_llm_call("planner", prompt, result)
 
-    logger.debug(f"Planner LLM result: {result}")
+    logger.debug("Planner LLM result: %s", Payload(result))
 
     if verbose:
         print("\n[LLM RESPONSE]")
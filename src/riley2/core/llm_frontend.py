@@ -1,14 +1,19 @@
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableSequence
 from langchain_community.chat_models import ChatOllama
-from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from riley2.core.intent_classifier import get_intent_model
+from riley2.core.logger_utils import logger
+from riley2.core.session_memory import SessionMemoryStore
+from riley2.core.tracing import span
+from riley2.core.metrics import record_llm_call
 
 
 # Define the LLM used for routing
 llm = ChatOllama(model="mistral", temperature=0.1)
 
-# Basic conversational memory (can later be persisted)
-memory = ConversationBufferMemory(return_messages=True)
+# Per-session conversational memory: token-budgeted window plus rolling summary, LRU-evicted
+session_memories = SessionMemoryStore()
 
 # Prompt to guide the router LLM to choose the correct tool
 router_prompt = ChatPromptTemplate.from_messages([
@@ -38,3 +43,36 @@ router_prompt = ChatPromptTemplate.from_messages([
 
 # Tool routing chain
 router_chain = RunnableSequence(router_prompt | llm)
+
+def chat_history_messages(session_memory):
+    summary, messages = session_memory.history()
+    history = [SystemMessage(content=f"Summary of earlier conversation: {summary}")] if summary else []
+    for role, text in messages:
+        history.append(HumanMessage(content=text) if role == "human" else AIMessage(content=text))
+    return history
+
+def route_tool(user_input, session_id="default", use_llm=True):
+    """Pick a tool name with the local intent model, asking the router LLM only when it is unsure.
+
+    With use_llm=False an unsure intent model gives None instead of an LLM call.
+    """
+    session_memory = session_memories.get(session_id)
+    label, confidence = get_intent_model().predict(user_input)
+    if label is not None:
+        logger.debug(f"Intent model routed to {label} (confidence {confidence:.2f})")
+    elif not use_llm:
+        logger.debug(f"Intent model unsure (confidence {confidence:.2f}), not routing")
+        return None
+    else:
+        logger.debug(f"Intent model unsure (confidence {confidence:.2f}), falling back to router LLM")
+        logger.debug(f"Router prompt history for session {session_id}: ~{session_memory.prompt_tokens()} tokens")
+        with span("llm.router"):
+            response = router_chain.invoke({
+                "user_input": user_input,
+                "chat_history": chat_history_messages(session_memory),
+            })
+        label = response.content.strip().lower()
+        record_llm_call("router", user_input, response.content)
+
+    session_memory.save_turn(user_input, label)
+    return label
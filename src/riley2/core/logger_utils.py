@@ -6,9 +6,15 @@ import inspect
 import traceback
 import platform
 import shutil
+import queue
+import atexit
+import copy
+import gzip
+import threading
+import time
 from datetime import datetime
 from colorama import Fore, Style, Back, init as colorama_init
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from typing import List, Dict, Any, Optional, Union
 
 colorama_init(autoreset=True)
@@ -22,6 +28,26 @@ TEST_PREFIX = '⟩⟩ TEST:'
 
 TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# Records waiting for the background writer. When the queue is full, records
+# below LOG_BLOCK_LEVEL are dropped; warnings and errors wait up to LOG_BLOCK_TIMEOUT.
+LOG_QUEUE_SIZE = int(os.environ.get('RILEY2_LOG_QUEUE_SIZE', 10000))
+LOG_BLOCK_LEVEL = logging.WARNING
+LOG_BLOCK_TIMEOUT = 1.0
+
+# Threshold for the riley2 logger; set to INFO in production so DEBUG payloads are never built
+LOG_LEVEL = os.environ.get('RILEY2_LOG_LEVEL', 'DEBUG').upper()
+# Longest rendering of a single large payload (prompt, tool result, email batch) in a log line
+MAX_PAYLOAD_CHARS = int(os.environ.get('RILEY2_LOG_PAYLOAD_CHARS', 2000))
+
+# Log files roll over when they reach LOG_MAX_BYTES or are LOG_MAX_AGE_HOURS old (0 disables either).
+# Rolled files are gzipped in the background; at most LOG_BACKUP_COUNT archives are kept,
+# none older than LOG_RETENTION_DAYS.
+LOG_MAX_BYTES = int(os.environ.get('RILEY2_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_MAX_AGE_HOURS = float(os.environ.get('RILEY2_LOG_MAX_AGE_HOURS', 24))
+LOG_BACKUP_COUNT = int(os.environ.get('RILEY2_LOG_BACKUP_COUNT', 10))
+LOG_RETENTION_DAYS = float(os.environ.get('RILEY2_LOG_RETENTION_DAYS', 14))
+LOG_COMPRESS = os.environ.get('RILEY2_LOG_COMPRESS', '1') not in ('0', 'false', 'False')
+
 LOG_COLORS = {
     'DEBUG': Fore.CYAN,
     'INFO': Fore.GREEN,
@@ -85,6 +111,77 @@ class PlainFormatter(logging.Formatter):
             record.msg = str(record.msg)
         return super().format(record)
 
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Rotates by size or age to timestamped archives, gzips them off-thread and prunes old ones"""
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, max_age_hours=LOG_MAX_AGE_HOURS,
+                 backup_count=LOG_BACKUP_COUNT, retention_days=LOG_RETENTION_DAYS,
+                 compress=LOG_COMPRESS, encoding='utf-8'):
+        super().__init__(filename, mode='a', maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.max_age_seconds = max_age_hours * 3600
+        self.retention_seconds = retention_days * 86400
+        self.compress = compress
+        # Like TimedRotatingFileHandler, rotate on fixed wall-clock boundaries: a restart lands in
+        # the same period, so frequent restarts never postpone rotation. A file last written in an
+        # earlier period rotates on its first write.
+        last_write = os.path.getmtime(self.baseFilename) if os.path.exists(self.baseFilename) else time.time()
+        self.rollover_at = self._period_end(last_write)
+        self._archivers = []
+
+    def _period_end(self, moment):
+        """The first max_age boundary (counted from the epoch, so UTC midnight for 24h) after moment."""
+        if self.max_age_seconds <= 0:
+            return float("inf")
+        return (moment // self.max_age_seconds + 1) * self.max_age_seconds
+
+    def shouldRollover(self, record):
+        if self.max_age_seconds > 0 and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            archive = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            os.rename(self.baseFilename, archive)
+            archiver = threading.Thread(target=self._archive, args=(archive,), name="riley2-log-archiver", daemon=True)
+            archiver.start()
+            self._archivers = [t for t in self._archivers if t.is_alive()] + [archiver]
+        self.rollover_at = self._period_end(time.time())
+        self.stream = self._open()
+
+    def _archive(self, path):
+        try:
+            if self.compress:
+                with open(path, 'rb') as source, gzip.open(path + '.gz.tmp', 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.replace(path + '.gz.tmp', path + '.gz')
+                os.remove(path)
+            self.prune_archives()
+        except OSError as e:
+            # Never let archiving break logging; the next rollover retries pruning
+            sys.stderr.write(f"riley2 log archiving failed for {path}: {e}\n")
+
+    def archives(self):
+        directory, base = os.path.split(self.baseFilename)
+        names = [n for n in os.listdir(directory) if n.startswith(base + '.') and not n.endswith('.tmp')]
+        paths = [os.path.join(directory, n) for n in names]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def prune_archives(self):
+        cutoff = time.time() - self.retention_seconds
+        for index, path in enumerate(self.archives()):
+            too_many = self.backupCount > 0 and index >= self.backupCount
+            too_old = self.retention_seconds > 0 and os.path.getmtime(path) < cutoff
+            if too_many or too_old:
+                os.remove(path)
+
+    def wait_for_archives(self, timeout=None):
+        for archiver in self._archivers:
+            archiver.join(timeout)
+
 # Filter to exclude httpcore debug logs during testing
 class HttpcoreFilter(logging.Filter):
     def filter(self, record):
@@ -92,7 +189,7 @@ class HttpcoreFilter(logging.Filter):
 
 # Create main logger
 logger = logging.getLogger("riley2")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
 logger.propagate = False
 
 # Create test-specific logger for compatibility
@@ -116,20 +213,122 @@ log_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.d
 os.makedirs(log_dir, exist_ok=True)
 
 # Add file handler with plain formatter to avoid encoding issues
-file_handler = logging.FileHandler(os.path.join(log_dir, "riley2.log"), mode='a', encoding='utf-8')
+file_handler = CompressingRotatingFileHandler(os.path.join(log_dir, "riley2.log"))
 file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(PlainFormatter("%(asctime)s - %(levelname)s - %(message)s"))
 
-# Add handlers to loggers
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
-test_logger.addHandler(console_handler)
-
 # Create test log file handler
-test_file_handler = logging.FileHandler(os.path.join(log_dir, "riley2_test.log"), mode='a', encoding='utf-8')
+test_file_handler = CompressingRotatingFileHandler(os.path.join(log_dir, "riley2_test.log"))
 test_file_handler.setLevel(logging.DEBUG)
 test_file_handler.setFormatter(PlainFormatter("%(asctime)s - %(levelname)s - %(message)s"))
-test_logger.addHandler(test_file_handler)
+
+class BoundedQueueHandler(QueueHandler):
+    """Hands records to a background listener; never blocks the caller on file I/O."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.drop_counter = None
+
+    def count_drops(self, counter):
+        """Also report dropped records to a metrics counter, including those dropped so far."""
+        dropped, self.drop_counter = self.dropped, counter
+        counter.inc(dropped)
+
+    def prepare(self, record):
+        """Merge the arguments into the message, as the stdlib QueueHandler does.
+
+        The caller may mutate a dict or list argument as soon as the call returns, so
+        the listener must not render it later. Payload arguments of records below the
+        logger's level still cost nothing: those records never reach this handler.
+        A shallow copy keeps other handlers on the caller's side from seeing changes.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if record.levelno >= LOG_BLOCK_LEVEL:
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.drop_counter is not None:
+                self.drop_counter.inc()
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+def attach_queue_listener(target_logger, *handlers):
+    """Route target_logger through a bounded queue to handlers running on a writer thread"""
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    target_logger.addHandler(BoundedQueueHandler(log_queue))
+    listener = DrainingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+# All console and file output happens on the listener threads, off the request path
+log_listener = attach_queue_listener(logger, console_handler, file_handler)
+test_log_listener = attach_queue_listener(test_logger, console_handler, test_file_handler)
+
+# Process-wide, because this module can be imported twice (as riley2.core.logger_utils
+# and src.riley2.core.logger_utils) and each copy starts its own listeners
+_logging_state = logger.__dict__.setdefault("_riley2_logging_state", {"listeners": [], "registered": False})
+_logging_state["listeners"].extend([log_listener, test_log_listener])
+
+def queue_handlers():
+    """(logger name, BoundedQueueHandler) pairs for the loggers routed through a listener"""
+    return [(target.name, handler) for target in (logger, test_logger)
+            for handler in target.handlers if isinstance(handler, BoundedQueueHandler)]
+
+def shutdown_logging():
+    """Flush every queued record to its handlers and stop the writer threads"""
+    for listener in _logging_state["listeners"]:
+        if listener._thread is not None:
+            listener.stop()
+        for handler in listener.handlers:
+            # Like logging.shutdown: streams may already be closed (e.g. pytest's capture)
+            try:
+                handler.flush()
+            except (ValueError, OSError):
+                pass
+            if isinstance(handler, CompressingRotatingFileHandler):
+                handler.wait_for_archives(timeout=5)
+
+if not _logging_state["registered"]:
+    atexit.register(shutdown_logging)
+    _logging_state["registered"] = True
+
+class Payload:
+    """Log argument that is only rendered if the record is emitted, and capped in size.
+
+    Usage: logger.debug("Planner prompt: %s", Payload(prompt))
+    The value may also be a zero-argument callable that builds it on demand.
+    """
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = limit if limit is not None else MAX_PAYLOAD_CHARS
+
+    def __str__(self):
+        value = self.value() if callable(self.value) else self.value
+        if isinstance(value, str):
+            text = value
+        elif isinstance(value, (dict, list, tuple)):
+            text = json.dumps(value, default=str)
+        else:
+            text = str(value)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... [+{len(text) - self.limit} chars]"
+        return text
 
 def log_system_event(event_type: str, description: str):
     """Log system-level events like startup, shutdown, or configuration changes"""
@@ -186,26 +385,30 @@ def log_llm_call(model: str, prompt: str, response: str = None, metadata: dict =
     """Log LLM API calls with prompt, response and metadata"""
     timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
     print(f"{Fore.MAGENTA}[LLM CALL] {timestamp} - Model: {model}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}PROMPT:{Style.RESET_ALL}")
-    print(f"{prompt[:500]}..." if len(prompt) > 500 else prompt)
+    # Payloads are only rendered, on the console or in the file, when DEBUG is enabled
+    verbose = logger.isEnabledFor(logging.DEBUG)
+    if verbose:
+        print(f"{Fore.YELLOW}PROMPT:{Style.RESET_ALL}")
+        print(f"{prompt[:500]}..." if len(prompt) > 500 else prompt)
     
-    if response:
+    if response and verbose:
         print(f"{Fore.GREEN}RESPONSE:{Style.RESET_ALL}")
         print(f"{response[:500]}..." if len(response) > 500 else response)
     
-    if metadata:
+    if metadata and verbose:
         print(f"{Fore.BLUE}METADATA:{Style.RESET_ALL}")
         log_json_block(metadata)
     
     print(SECTION_BORDER)
     
     # Also log to file for reference
-    logger.debug(f"LLM Call - Model: {model}")
-    logger.debug(f"Prompt: {prompt}")
-    if response:
-        logger.debug(f"Response: {response}")
-    if metadata:
-        logger.debug(f"Metadata: {json.dumps(metadata)}")
+    if verbose:
+        logger.debug("LLM Call - Model: %s", model)
+        logger.debug("Prompt: %s", Payload(prompt))
+        if response:
+            logger.debug("Response: %s", Payload(response))
+        if metadata:
+            logger.debug("Metadata: %s", Payload(metadata))
 
 def log_decision_point(component: str, decision: str, options: List[str] = None, reason: str = None):
     """Log a decision point in the application flow with reasoning"""
@@ -296,12 +499,13 @@ def log_tool_usage(tool_name: str, inputs: Dict[str, Any] = None, outputs: Dict[
     color = Fore.GREEN if success else Fore.RED
     
     print(f"{color}[TOOL] {tool_name} - {status}{Style.RESET_ALL}")
+    verbose = logger.isEnabledFor(logging.DEBUG)
     
-    if inputs:
+    if inputs and verbose:
         print(f"{Fore.YELLOW}Inputs:{Style.RESET_ALL}")
         log_json_block(inputs)
     
-    if outputs:
+    if outputs and verbose:
         print(f"{Fore.CYAN}Outputs:{Style.RESET_ALL}")
         # If outputs is large, truncate it for display
         if isinstance(outputs, dict) and any(isinstance(v, str) and len(v) > 500 for v in outputs.values()):
@@ -319,24 +523,26 @@ def log_tool_usage(tool_name: str, inputs: Dict[str, Any] = None, outputs: Dict[
     
     # Log to file
     logger.info(f"Tool {tool_name} used - {status}")
-    if inputs:
-        logger.debug(f"Tool inputs: {json.dumps(inputs, default=str)}")
-    if outputs:
-        logger.debug(f"Tool outputs: {json.dumps(outputs, default=str)}")
+    if verbose:
+        if inputs:
+            logger.debug("Tool inputs: %s", Payload(inputs))
+        if outputs:
+            logger.debug("Tool outputs: %s", Payload(outputs))
 
 def log_component_interaction(source: str, target: str, action: str, data: Any = None, result: Any = None, direction: str = None):
     """Log interactions between system components"""
     direction_arrow = direction if direction else f"{source} → {target}"
     print(f"{Fore.BLUE}[COMPONENT] {direction_arrow}: {action}{Style.RESET_ALL}")
+    verbose = logger.isEnabledFor(logging.DEBUG)
     
-    if data:
+    if data and verbose:
         print(f"{Fore.YELLOW}Data sent:{Style.RESET_ALL}")
         if isinstance(data, dict):
             log_json_block(data)
         else:
             print(f"  {data}")
     
-    if result:
+    if result and verbose:
         print(f"{Fore.GREEN}Result:{Style.RESET_ALL}")
         if isinstance(result, dict):
             log_json_block(result)
@@ -347,13 +553,8 @@ def log_component_interaction(source: str, target: str, action: str, data: Any =
     
     # Log to file
     logger.info(f"Component interaction: {source} → {target}: {action}")
-    if data:
-        if isinstance(data, dict):
-            logger.debug(f"Interaction data: {json.dumps(data, default=str)}")
-        else:
-            logger.debug(f"Interaction data: {data}")
-    if result:
-        if isinstance(result, dict):
-            logger.debug(f"Interaction result: {json.dumps(result, default=str)}")
-        else:
-            logger.debug(f"Interaction result: {result}")
+    if verbose:
+        if data:
+            logger.debug("Interaction data: %s", Payload(data))
+        if result:
+            logger.debug("Interaction result: %s", Payload(result))
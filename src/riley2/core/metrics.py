@@ -0,0 +1,284 @@
+import math
+import threading
+import time
+from _thread import get_ident
+from bisect import bisect_left
+from riley2.core.logger_utils import logger, queue_handlers
+from riley2.core.session_memory import estimate_tokens
+
+# Seconds; covers a fast local tool call up to a slow multi-LLM turn
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Shards:
+    """Per-thread accumulators: each thread only writes its own list, so recording takes
+    no lock; readers sum the shards at scrape time."""
+
+    __slots__ = ("width", "by_thread", "_lock")
+
+    def __init__(self, width):
+        self.width = width
+        self.by_thread = {}
+        self._lock = threading.Lock()
+
+    def new_shard(self):
+        shard = [0] * self.width
+        with self._lock:
+            self.by_thread[get_ident()] = shard
+        return shard
+
+    def totals(self):
+        with self._lock:
+            shards = list(self.by_thread.values())
+        return [sum(column) for column in zip(*shards)] if shards else [0] * self.width
+
+
+class _CounterChild:
+    __slots__ = ("_shards", "_by_thread")
+
+    def __init__(self):
+        self._shards = _Shards(1)
+        self._by_thread = self._shards.by_thread
+
+    def inc(self, amount=1):
+        shard = self._by_thread.get(get_ident()) or self._shards.new_shard()
+        shard[0] += amount
+
+    @property
+    def value(self):
+        return self._shards.totals()[0]
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    # Shard layout: one count per bucket (plus +Inf), then sum, then count
+    __slots__ = ("buckets", "_shards", "_by_thread")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._shards = _Shards(len(buckets) + 3)
+        self._by_thread = self._shards.by_thread
+
+    def observe(self, value):
+        shard = self._by_thread.get(get_ident()) or self._shards.new_shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    def snapshot(self):
+        """Return (bucket counts, sum, count)."""
+        totals = self._shards.totals()
+        return totals[:-2], totals[-2], totals[-1]
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._unlabelled = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **labelled):
+        """Return the child series for these label values, creating it on first use."""
+        key = values or tuple(str(labelled[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._unlabelled.inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._unlabelled.set(value)
+
+    def inc(self, amount=1):
+        self._unlabelled.inc(amount)
+
+    def dec(self, amount=1):
+        self._unlabelled.dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._unlabelled.observe(value)
+
+    def time(self):
+        return self._unlabelled.time()
+
+    def _render_child(self, key, child):
+        counts, total, count = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        logger.debug(f"Rendered {len(metrics)} metrics")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Shared metrics, defined here so every module reports under the same names
+REQUEST_SECONDS = registry.histogram(
+    "riley2_request_seconds", "Time spent handling an HTTP request", ("route",))
+REQUESTS = registry.counter(
+    "riley2_requests_total", "HTTP requests handled", ("route", "status"))
+TOOL_SECONDS = registry.histogram(
+    "riley2_tool_seconds", "Time spent executing a tool", ("tool",))
+TOOL_ERRORS = registry.counter(
+    "riley2_tool_errors_total", "Tool calls that returned or raised an error", ("tool",))
+LLM_CALLS = registry.counter(
+    "riley2_llm_calls_total", "LLM invocations", ("role",))
+LLM_TOKENS = registry.counter(
+    "riley2_llm_tokens_total", "Estimated LLM tokens", ("role", "direction"))
+CACHE_LOOKUPS = registry.counter(
+    "riley2_cache_lookups_total", "Cache lookups by outcome; hit ratio = hit / (hit + miss)", ("cache", "result"))
+LOG_RECORDS_DROPPED = registry.counter(
+    "riley2_log_records_dropped_total", "Log records dropped because the log queue was full", ("logger",))
+
+# logger_utils cannot import this module, so the log queues are hooked up from here
+for _name, _handler in queue_handlers():
+    _handler.count_drops(LOG_RECORDS_DROPPED.labels(_name))
+
+
+def record_llm_call(role, prompt, response):
+    """Count one LLM call and its estimated prompt/response tokens."""
+    LLM_CALLS.labels(role).inc()
+    LLM_TOKENS.labels(role, "prompt").inc(estimate_tokens(prompt))
+    LLM_TOKENS.labels(role, "response").inc(estimate_tokens(response))
@@ -0,0 +1,180 @@
+import contextvars
+import json
+import re
+from riley2.core.speculation import call_key
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from riley2.core.logger_utils import logger
+from riley2.core.tool_results import is_error_result
+
+# Step arguments may reference the output of an earlier step as "$<step_id>".
+STEP_REF_PATTERN = re.compile(r"^\$([A-Za-z0-9_\-]+)$")
+
+
+class PlanError(ValueError):
+    """Raised when a planner response cannot be turned into a valid DAG."""
+
+
+class PlanStep:
+    def __init__(self, step_id, tool, args=None, depends_on=None):
+        self.id = step_id
+        self.tool = tool
+        self.args = args or {}
+        self.depends_on = set(depends_on or [])
+        # Anything referenced through "$step" in the args is an implicit dependency
+        for value in self.args.values():
+            ref = _step_ref(value)
+            if ref:
+                self.depends_on.add(ref)
+
+    def resolve_args(self, results):
+        return {key: results[_step_ref(value)] if _step_ref(value) else value
+                for key, value in self.args.items()}
+
+    def __repr__(self):
+        return f"PlanStep({self.id!r}, {self.tool!r}, depends_on={sorted(self.depends_on)})"
+
+
+def _step_ref(value):
+    if isinstance(value, str):
+        match = STEP_REF_PATTERN.match(value.strip())
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_plan(response_text):
+    """Parse a planner response of the form {"steps": [{"id", "tool", "args", "depends_on"}]}.
+
+    Also accepts a bare JSON list of steps. Steps without an id are numbered s1, s2, ...
+    """
+    try:
+        parsed = json.loads(response_text)
+    except json.JSONDecodeError as e:
+        raise PlanError(f"Planner response is not valid JSON: {e}")
+
+    raw_steps = parsed.get("steps") if isinstance(parsed, dict) else parsed
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise PlanError("Planner response contains no steps")
+
+    steps = []
+    for index, raw in enumerate(raw_steps, start=1):
+        if not isinstance(raw, dict) or not raw.get("tool"):
+            raise PlanError(f"Step {index} has no tool: {raw}")
+        steps.append(PlanStep(
+            str(raw.get("id") or f"s{index}"),
+            raw["tool"],
+            raw.get("args") or {},
+            raw.get("depends_on") or [],
+        ))
+    validate_plan(steps)
+    logger.debug(f"Parsed plan with {len(steps)} steps: {steps}")
+    return steps
+
+
+def validate_plan(steps):
+    """Reject duplicate ids, unknown dependencies and cycles."""
+    by_id = {}
+    for step in steps:
+        if step.id in by_id:
+            raise PlanError(f"Duplicate step id: {step.id}")
+        by_id[step.id] = step
+
+    for step in steps:
+        unknown = step.depends_on - by_id.keys()
+        if unknown:
+            raise PlanError(f"Step {step.id} depends on unknown steps: {sorted(unknown)}")
+
+    # Kahn's algorithm: anything left over sits on a cycle
+    remaining = {step.id: set(step.depends_on) for step in steps}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise PlanError(f"Plan contains a dependency cycle between: {sorted(remaining)}")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+class PlanResult:
+    def __init__(self):
+        self.results = {}
+        self.failed = {}
+        self.skipped = []
+        self.order = []
+
+    @property
+    def ok(self):
+        return not self.failed and not self.skipped
+
+
+def execute_plan(steps, perform_action, max_workers=4, completed=None):
+    """Run a validated plan, launching every step as soon as its dependencies finish.
+
+    A failed step does not stop independent branches; its dependents are skipped.
+    completed maps call_key(tool, args) to results from an earlier attempt; matching
+    steps reuse them instead of running again, and new successes are added to it.
+    """
+    completed = {} if completed is None else completed
+    by_id = {step.id: step for step in steps}
+    pending = dict(by_id)
+    outcome = PlanResult()
+    running = {}
+
+    def launch_ready(pool):
+        progressed = True
+        while progressed:
+            progressed = False
+            for step_id, step in list(pending.items()):
+                if step.depends_on & (outcome.failed.keys() | set(outcome.skipped)):
+                    logger.debug(f"Skipping step {step_id}: an upstream step failed")
+                    outcome.skipped.append(step_id)
+                    del pending[step_id]
+                elif step.depends_on <= outcome.results.keys():
+                    args = step.resolve_args(outcome.results)
+                    key = call_key(step.tool, args)
+                    del pending[step_id]
+                    if key in completed:
+                        # Already succeeded in an earlier attempt; its dependents may now be ready
+                        logger.debug(f"Reusing earlier result for step {step_id}: {step.tool}")
+                        outcome.results[step_id] = completed[key]
+                        outcome.order.append(step_id)
+                        progressed = True
+                    else:
+                        logger.debug(f"Launching step {step_id}: {step.tool}")
+                        # Run in a copy of the caller's context so trace_id and parent spans carry over
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, perform_action, step.tool, args)] = (step, key)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        launch_ready(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, key = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = f"Error executing tool '{step.tool}': {e}"
+                if is_error_result(result):
+                    logger.warning(f"Plan step {step.id} ({step.tool}) failed: {result}")
+                    outcome.failed[step.id] = result
+                else:
+                    outcome.results[step.id] = result
+                    completed[key] = result
+                outcome.order.append(step.id)
+            launch_ready(pool)
+
+    # Anything still pending depends on a skipped step that was settled last round
+    outcome.skipped.extend(pending)
+    logger.info(f"Plan finished: {len(outcome.results)} succeeded, {len(outcome.failed)} failed, "
+                f"{len(outcome.skipped)} skipped")
+    return outcome
+
+
+def sink_steps(steps):
+    """Steps no other step depends on; their outputs form the answer."""
+    needed = set()
+    for step in steps:
+        needed |= step.depends_on
+    return [step for step in steps if step.id not in needed]
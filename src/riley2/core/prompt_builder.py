@@ -0,0 +1,129 @@
+import os
+from riley2.core.logger_utils import logger
+from riley2.core.metrics import registry
+from riley2.core.session_memory import estimate_tokens
+from riley2.core.tool_results import PROMPT_ITEM_LIMIT, ToolResult
+
+# Ollama runs mistral with a 2048-token context by default; the rest is left for the response
+DEFAULT_PROMPT_BUDGET = int(os.environ.get('RILEY2_PROMPT_BUDGET', 1536))
+# Per-section budgets shared by the planner, interpreter and summarizer prompts
+QUERY_BUDGET = 256
+TOOL_RESULT_BUDGET = int(os.environ.get('RILEY2_PROMPT_RESULT_BUDGET', 768))
+NOTE_BUDGET = 256
+# A flexible section is never squeezed below this when the whole prompt is over budget
+MIN_SECTION_TOKENS = 32
+
+# How an over-budget section is cut down
+FIXED = "fixed"          # instructions and response formats: never cut
+KEEP_START = "start"     # keep the beginning (tool output, lists)
+KEEP_END = "end"         # keep the end (conversation, logs)
+SUMMARIZE = "summarize"  # hand the text to the section's summarizer
+
+TRUNCATION_MARKER = "…[truncated]"
+
+PROMPT_TOKENS = registry.histogram(
+    "riley2_prompt_tokens", "Estimated tokens per LLM prompt", ("role",),
+    buckets=(64, 128, 256, 512, 1024, 1536, 2048, 4096, 8192))
+PROMPT_TRUNCATIONS = registry.counter(
+    "riley2_prompt_truncations_total", "Prompt sections cut down to fit their token budget", ("role", "section"))
+
+
+def truncate_tokens(text, max_tokens, policy=KEEP_START):
+    """Cut text to about max_tokens, marking where it was cut."""
+    max_chars = max(max_tokens * 4 - len(TRUNCATION_MARKER), 0)
+    if len(text) <= max_tokens * 4:
+        return text
+    if policy == KEEP_END:
+        return TRUNCATION_MARKER + text[len(text) - max_chars:]
+    return text[:max_chars] + TRUNCATION_MARKER
+
+
+class _Section:
+    __slots__ = ("name", "content", "budget", "policy", "summarizer", "text", "tokens")
+
+    def __init__(self, name, content, budget, policy, summarizer):
+        self.name = name
+        self.content = content
+        self.budget = budget
+        self.policy = policy
+        self.summarizer = summarizer
+        self.text = ""
+        self.tokens = 0
+
+
+class PromptBuilder:
+    """Assembles an LLM prompt from named sections under a token budget.
+
+    Each section may have its own budget and a policy for cutting it down. Tool
+    results are re-rendered with fewer items before any text is cut. If the
+    prompt is still over the overall budget, the largest flexible sections shrink
+    first. build() records the prompt's estimated tokens per role, so prompt
+    size per call shows up in /metrics next to the LLM call counts.
+    """
+
+    def __init__(self, role, budget=DEFAULT_PROMPT_BUDGET):
+        self.role = role
+        self.budget = budget
+        self._sections = []
+        self.tokens = 0
+        self.truncated = []
+
+    def add(self, name, content, budget=None, policy=FIXED, summarizer=None):
+        """Append a section; content may be a str or a ToolResult. Returns the builder for chaining."""
+        if policy == SUMMARIZE and summarizer is None:
+            raise ValueError(f"Section {name} uses the summarize policy without a summarizer")
+        self._sections.append(_Section(name, content, budget, policy, summarizer))
+        return self
+
+    def _fit(self, section, budget):
+        content = section.content
+        if isinstance(content, ToolResult):
+            limit = PROMPT_ITEM_LIMIT
+            text = content.render(limit)
+            while budget is not None and estimate_tokens(text) > budget and limit > 0:
+                limit //= 2
+                text = content.render(limit)
+        else:
+            text = "" if content is None else str(content)
+
+        if budget is None or section.policy == FIXED or estimate_tokens(text) <= budget:
+            return text
+        if section.name not in self.truncated:
+            self.truncated.append(section.name)
+            PROMPT_TRUNCATIONS.labels(self.role, section.name).inc()
+        if section.policy == SUMMARIZE:
+            text = section.summarizer(text, budget)
+        return truncate_tokens(text, budget, section.policy)
+
+    def build(self):
+        for section in self._sections:
+            section.text = self._fit(section, section.budget)
+            section.tokens = estimate_tokens(section.text)
+
+        # Sections are joined with newlines, which count towards the budget too
+        over = estimate_tokens("\n".join(s.text for s in self._sections if s.text)) - self.budget
+        flexible = sorted((s for s in self._sections if s.policy != FIXED), key=lambda s: s.tokens, reverse=True)
+        for section in flexible:
+            if over <= 0:
+                break
+            allowed = max(section.tokens - over, MIN_SECTION_TOKENS)
+            if allowed >= section.tokens:
+                continue
+            before = section.tokens
+            section.text = self._fit(section, allowed)
+            section.tokens = estimate_tokens(section.text)
+            over -= before - section.tokens
+
+        prompt = "\n".join(section.text for section in self._sections if section.text)
+        self.tokens = estimate_tokens(prompt)
+        PROMPT_TOKENS.labels(self.role).observe(self.tokens)
+        if self.tokens > self.budget:
+            logger.warning(f"{self.role} prompt is ~{self.tokens} tokens, over its {self.budget} budget")
+        logger.debug(f"Built {self.role} prompt: ~{self.tokens} tokens "
+                     f"({', '.join(f'{s.name}={s.tokens}' for s in self._sections)})"
+                     + (f", truncated {self.truncated}" if self.truncated else ""))
+        return prompt
+
+    def section_tokens(self):
+        """Estimated tokens per section of the last build()."""
+        return {section.name: section.tokens for section in self._sections}
@@ -0,0 +1,82 @@
+import re
+from riley2.core.logger_utils import logger
+from riley2.core.tracing import traced
+
+# Phrase -> weight. Phrases only match on word boundaries, so "hi" no longer
+# fires inside "this" or "which".
+SOCIAL_PATTERNS = {
+    "hi": 1.0,
+    "hey": 1.0,
+    "hello": 1.0,
+    "good morning": 1.0,
+    "how are you": 2.0,
+    "joke": 2.0,
+    "tell me": 0.5,
+    "chat": 1.0,
+    "conversation": 1.0,
+    "thanks": 1.0,
+    "thank you": 1.0,
+    "what can you do": 2.0,
+    "what controls": 2.0,
+    "what tools": 2.0,
+    "how can you help": 2.0,
+}
+
+WORK_PATTERNS = {
+    "email": 2.0,
+    "emails": 2.0,
+    "inbox": 2.0,
+    "mail": 1.5,
+    "unread": 1.5,
+    "sender": 1.0,
+    "summarize": 1.5,
+    "summarise": 1.5,
+    "calendar": 2.0,
+    "schedule": 2.0,
+    "meeting": 2.0,
+    "meetings": 2.0,
+    "event": 1.5,
+    "events": 1.5,
+    "appointment": 2.0,
+    "trip": 1.5,
+    "travel": 1.5,
+    "free": 1.0,
+    "busy": 1.0,
+    "book": 1.0,
+    "next week": 1.0,
+    "tomorrow": 1.0,
+    "today": 0.5,
+    "knowledge": 1.5,
+    "remember": 1.0,
+    "time": 0.5,
+    "date": 0.5,
+}
+
+
+def compile_patterns(*weight_tables):
+    """Build one alternation regex over every phrase, longest phrases first."""
+    phrases = sorted({phrase for table in weight_tables for phrase in table}, key=len, reverse=True)
+    alternation = "|".join(re.escape(phrase).replace(r"\ ", r"\s+") for phrase in phrases)
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+
+ROUTING_PATTERN = compile_patterns(SOCIAL_PATTERNS, WORK_PATTERNS)
+
+
+def score_query(query):
+    """Return {"chat": score, "work": score} for the phrases found in the query."""
+    scores = {"chat": 0.0, "work": 0.0}
+    for match in ROUTING_PATTERN.finditer(query):
+        phrase = " ".join(match.group(0).lower().split())
+        scores["chat"] += SOCIAL_PATTERNS.get(phrase, 0.0)
+        scores["work"] += WORK_PATTERNS.get(phrase, 0.0)
+    return scores
+
+
+@traced("classify_query")
+def classify_query(query):
+    """Route to "chat" only when social phrasing outweighs any work signal."""
+    scores = score_query(query)
+    classification = "chat" if scores["chat"] > scores["work"] else "work"
+    logger.debug(f"Classified query as {classification} with scores {scores}")
+    return classification
@@ -0,0 +1,209 @@
+import calendar
+from datetime import date, datetime, timedelta
+from riley2.core.logger_utils import logger
+
+WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+SUPPORTED_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "WKST"}
+MAX_IDLE_PERIODS = 1000
+
+
+class RecurrenceError(ValueError):
+    """Raised for recurrence lines outside the supported RFC 5545 subset."""
+
+
+def _parse_stamp(value):
+    """RFC 5545 DATE or DATE-TIME ("20250512", "20250512T090000", "...Z") as a naive datetime."""
+    value = value.strip().rstrip("Z")
+    try:
+        if "T" in value:
+            return datetime.strptime(value, "%Y%m%dT%H%M%S")
+        return datetime.strptime(value, "%Y%m%d")
+    except ValueError:
+        raise RecurrenceError(f"Invalid recurrence date {value!r}") from None
+
+
+def _parse_byday(value):
+    """"MO,WE" or "2TU,-1FR" as (ordinal or None, weekday index) pairs."""
+    days = []
+    for part in value.split(","):
+        code = part[-2:].upper()
+        if code not in WEEKDAY_CODES:
+            raise RecurrenceError(f"Invalid BYDAY value {part!r}")
+        ordinal = part[:-2]
+        days.append((int(ordinal) if ordinal else None, WEEKDAY_CODES.index(code)))
+    return days
+
+
+def _add_months(year, month, months):
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+class RecurrenceRule:
+    """One RRULE plus its EXDATEs, expanded lazily.
+
+    Only the rule is stored, never the occurrences. occurrences() jumps arithmetically
+    to the period containing the window, so a lookup costs the occurrences it yields
+    rather than every occurrence since the series began. COUNT is turned into a last
+    start once, on first use.
+    """
+
+    __slots__ = ("freq", "interval", "count", "until", "byday", "bymonthday", "exdates", "_last_start")
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=(), bymonthday=(), exdates=()):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = tuple(byday)
+        self.bymonthday = tuple(bymonthday)
+        self.exdates = frozenset(exdates)
+        self._last_start = None
+
+    @classmethod
+    def parse(cls, lines):
+        """Build a rule from Google-style recurrence lines ("RRULE:...", "EXDATE...:...")."""
+        rule, exdates = None, []
+        for line in lines:
+            name, _, value = line.partition(":")
+            name = name.split(";")[0].upper()
+            if name == "RRULE":
+                if rule is not None:
+                    raise RecurrenceError("Only one RRULE per event is supported")
+                rule = value
+            elif name == "EXDATE":
+                exdates.extend(_parse_stamp(stamp) for stamp in value.split(","))
+            else:
+                raise RecurrenceError(f"Unsupported recurrence line {line!r}")
+        if rule is None:
+            raise RecurrenceError("No RRULE in recurrence")
+
+        parts = dict(part.split("=", 1) for part in rule.split(";") if part)
+        parts = {key.upper(): value for key, value in parts.items()}
+        unsupported = set(parts) - SUPPORTED_PARTS
+        if unsupported:
+            raise RecurrenceError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}")
+        freq = parts.get("FREQ", "").upper()
+        if freq not in FREQUENCIES:
+            raise RecurrenceError(f"Unsupported FREQ {freq!r}")
+        byday = _parse_byday(parts["BYDAY"]) if "BYDAY" in parts else ()
+        if freq in ("DAILY", "WEEKLY", "YEARLY") and any(ordinal for ordinal, _ in byday):
+            raise RecurrenceError(f"Ordinal BYDAY is only supported for MONTHLY rules: {rule}")
+        if freq in ("DAILY", "YEARLY") and (byday or "BYMONTHDAY" in parts):
+            raise RecurrenceError(f"BYDAY/BYMONTHDAY are not supported for {freq} rules")
+        return cls(
+            freq,
+            interval=max(int(parts.get("INTERVAL", 1)), 1),
+            count=int(parts["COUNT"]) if "COUNT" in parts else None,
+            until=_parse_stamp(parts["UNTIL"]) if "UNTIL" in parts else None,
+            byday=byday,
+            bymonthday=[int(day) for day in parts["BYMONTHDAY"].split(",")] if "BYMONTHDAY" in parts else (),
+            exdates=exdates,
+        )
+
+    def _first_period(self, dtstart, lo):
+        if self.freq == "DAILY":
+            elapsed = (lo.date() - dtstart.date()).days
+            step = self.interval
+        elif self.freq == "WEEKLY":
+            week0 = dtstart.date() - timedelta(days=dtstart.weekday())
+            elapsed = (lo.date() - week0).days
+            step = 7 * self.interval
+        elif self.freq == "MONTHLY":
+            elapsed = (lo.year - dtstart.year) * 12 + lo.month - dtstart.month
+            step = self.interval
+        else:
+            elapsed = lo.year - dtstart.year
+            step = self.interval
+        return max(elapsed // step, 0)
+
+    def _period_begin(self, dtstart, period):
+        if self.freq == "DAILY":
+            day = dtstart.date() + timedelta(days=period * self.interval)
+        elif self.freq == "WEEKLY":
+            day = dtstart.date() - timedelta(days=dtstart.weekday()) + timedelta(weeks=period * self.interval)
+        elif self.freq == "MONTHLY":
+            day = date(*_add_months(dtstart.year, dtstart.month, period * self.interval), 1)
+        else:
+            day = date(dtstart.year + period * self.interval, 1, 1)
+        return datetime.combine(day, datetime.min.time())
+
+    def _period_days(self, dtstart, period):
+        """Dates the rule produces in one period, in order."""
+        begin = self._period_begin(dtstart, period).date()
+        if self.freq == "DAILY":
+            return [begin]
+        if self.freq == "WEEKLY":
+            weekdays = sorted({weekday for _, weekday in self.byday}) or [dtstart.weekday()]
+            return [begin + timedelta(days=weekday) for weekday in weekdays]
+        if self.freq == "YEARLY":
+            if dtstart.month == 2 and dtstart.day == 29 and not calendar.isleap(begin.year):
+                return []
+            return [date(begin.year, dtstart.month, dtstart.day)]
+
+        month_length = calendar.monthrange(begin.year, begin.month)[1]
+        days = set()
+        for monthday in self.bymonthday or ([] if self.byday else [dtstart.day]):
+            day = monthday if monthday > 0 else month_length + monthday + 1
+            if 1 <= day <= month_length:
+                days.add(day)
+        for ordinal, weekday in self.byday:
+            first = (weekday - begin.weekday()) % 7 + 1
+            matches = list(range(first, month_length + 1, 7))
+            if ordinal is None:
+                days.update(matches)
+            elif -len(matches) <= ordinal <= len(matches) and ordinal != 0:
+                days.add(matches[ordinal - 1 if ordinal > 0 else ordinal])
+        return [date(begin.year, begin.month, day) for day in sorted(days)]
+
+    def _starts_in(self, dtstart, period):
+        return [start for start in (datetime.combine(day, dtstart.time()) for day in self._period_days(dtstart, period))
+                if start >= dtstart]
+
+    def last_start(self, dtstart):
+        """The final occurrence's start, or None for an open-ended rule."""
+        if self.count is None:
+            return self.until
+        if self._last_start is None:
+            last, seen, period, idle = dtstart, 0, 0, 0
+            # A rule that can never match (BYMONTHDAY=30 every February) gives up after MAX_IDLE_PERIODS
+            while seen < self.count and idle < MAX_IDLE_PERIODS:
+                starts = self._starts_in(dtstart, period)[:self.count - seen]
+                if self.until:
+                    starts = [start for start in starts if start <= self.until]
+                    if not starts and self._period_begin(dtstart, period) > self.until:
+                        break
+                if starts:
+                    last, seen, idle = starts[-1], seen + len(starts), 0
+                else:
+                    idle += 1
+                period += 1
+            self._last_start = last
+        return self._last_start
+
+    def occurrences(self, dtstart, lo, hi):
+        """Starts s of the series with lo <= s < hi, in order, skipping EXDATEs."""
+        last = self.last_start(dtstart)
+        if hi <= dtstart or (last and lo > last):
+            return
+        period = self._first_period(dtstart, max(lo, dtstart))
+        while self._period_begin(dtstart, period) < hi:
+            for start in self._starts_in(dtstart, period):
+                if start >= hi or (last and start > last):
+                    return
+                if start >= lo and start not in self.exdates:
+                    yield start
+            period += 1
+
+    def __repr__(self):
+        return f"RecurrenceRule({self.freq}, interval={self.interval}, count={self.count}, until={self.until})"
+
+
+def parse_recurrence(lines):
+    """RecurrenceRule for an event's recurrence lines, or None when they are unsupported."""
+    try:
+        return RecurrenceRule.parse(lines)
+    except RecurrenceError as e:
+        logger.warning(f"Treating event as a single occurrence: {e}")
+        return None
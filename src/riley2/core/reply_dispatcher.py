@@ -0,0 +1,147 @@
+import os
+import queue
+import threading
+import time
+from riley2.core.logger_utils import logger, Payload
+from riley2.core.metrics import registry
+
+DEFAULT_REPLY_WORKERS = int(os.environ.get('RILEY2_REPLY_WORKERS', 4))
+# Messages waiting for a reply worker; beyond this submit() refuses instead of queueing
+DEFAULT_REPLY_QUEUE = int(os.environ.get('RILEY2_REPLY_QUEUE', 64))
+FAILURE_REPLY = "Sorry, something went wrong while working on that. Please try again."
+
+REPLY_QUEUE_DEPTH = registry.gauge(
+    "riley2_reply_queue_depth", "Inbound messages waiting for a reply worker")
+REPLIES = registry.counter(
+    "riley2_replies_total", "Out-of-band replies by outcome", ("status",))
+REPLY_SECONDS = registry.histogram(
+    "riley2_reply_seconds", "Time from receiving a message to sending its reply")
+
+
+class DispatcherBusy(Exception):
+    """The reply queue is full; the message was not accepted."""
+
+
+class InboundMessage:
+    def __init__(self, sid, from_number, to_number, body):
+        self.sid = sid
+        self.from_number = from_number
+        self.to_number = to_number
+        self.body = body
+        self.received_at = time.monotonic()
+
+    def __repr__(self):
+        return f"InboundMessage(sid={self.sid!r}, from_number={self.from_number!r})"
+
+
+class TwilioSender:
+    """Sends replies through the Twilio REST API; credentials come from the environment."""
+
+    def __init__(self, account_sid=None, auth_token=None):
+        # Imported lazily so the fake sender works without the Twilio SDK installed
+        from twilio.rest import Client
+
+        self.client = Client(account_sid or os.environ["TWILIO_ACCOUNT_SID"],
+                             auth_token or os.environ["TWILIO_AUTH_TOKEN"])
+
+    def send(self, to_number, from_number, body):
+        self.client.messages.create(to=to_number, from_=from_number, body=body)
+
+
+class FakeSender:
+    """Records replies in memory instead of sending them; for tests and local runs."""
+
+    def __init__(self):
+        self.sent = []
+        self._condition = threading.Condition()
+
+    def send(self, to_number, from_number, body):
+        with self._condition:
+            self.sent.append({"to": to_number, "from": from_number, "body": body})
+            self._condition.notify_all()
+        logger.info(f"[FakeSender] -> {to_number}: {body}")
+
+    def wait_for(self, count, timeout=5.0):
+        """Block until at least count replies have been sent; returns whether that happened."""
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.sent) >= count, timeout)
+
+
+def make_sender(kind=None):
+    kind = kind or os.environ.get('RILEY2_REPLY_SENDER', 'twilio')
+    if kind == "fake":
+        return FakeSender()
+    if kind == "twilio":
+        return TwilioSender()
+    raise ValueError(f"Unknown reply sender: {kind}")
+
+
+class AsyncReplyDispatcher:
+    """Acknowledge now, reply later: a worker pool computes replies and hands them to a sender.
+
+    handler(message) produces the reply text for an InboundMessage; sender.send(to_number,
+    from_number, body) delivers it. A failed handler still gets a short apology sent back.
+    The queue is bounded like the server's accept queue: when it is full, submit raises
+    DispatcherBusy so the caller can shed the message instead of piling up LLM work.
+    """
+
+    def __init__(self, handler, sender, workers=DEFAULT_REPLY_WORKERS, queue_size=DEFAULT_REPLY_QUEUE):
+        self.handler = handler
+        self.sender = sender
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"riley2-reply-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            REPLIES.labels("shed").inc()
+            logger.warning(f"Reply queue full; shedding {message}")
+            raise DispatcherBusy(f"Reply queue full ({self._queue.maxsize} waiting)") from None
+        REPLY_QUEUE_DEPTH.inc()
+        logger.debug(f"Queued {message} for an out-of-band reply")
+
+    def _work(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                self._queue.task_done()
+                break
+            REPLY_QUEUE_DEPTH.dec()
+            try:
+                self._reply(message)
+            finally:
+                self._queue.task_done()
+
+    def _reply(self, message):
+        try:
+            reply = self.handler(message)
+            status = "ok"
+        except Exception as e:
+            logger.error(f"Failed to compute reply for {message}: {e}")
+            reply, status = FAILURE_REPLY, "handler_error"
+
+        try:
+            self.sender.send(message.from_number, message.to_number, reply)
+            logger.info("Sent reply to %s: %s", message.from_number, Payload(reply, limit=200))
+        except Exception as e:
+            logger.error(f"Failed to send reply for {message}: {e}")
+            status = "send_error"
+        REPLIES.labels(status).inc()
+        REPLY_SECONDS.observe(time.monotonic() - message.received_at)
+
+    def join(self):
+        """Wait until every queued message has been replied to."""
+        self._queue.join()
+
+    def shutdown(self, wait=True):
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
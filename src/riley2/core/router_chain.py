@@ -1,5 +1,10 @@
-from riley2.agents.backend_manager_v2 import backend_manager_loop_v2
+from riley2.agents.backend_manager_v2 import backend_manager_loop_v2, backend_manager_plan_v2
 from riley2.core.frontend_llm import frontend_llm_response
+from riley2.core.query_classifier import classify_query
+from riley2.core.llm_frontend import route_tool
+from riley2.core.event_log import trace, timed_event
+from riley2.core.tracing import span
+from riley2.core.tool_results import prompt_text
 
 class Context:
     def __init__(self):
@@ -9,7 +14,8 @@ class Context:
         self.actions.append((action, result))
 
     def actions_log(self):
-        return str(self.actions)
+        """Each action and its result in compact prompt form, one per line."""
+        return "\n".join(f"[{action}] {prompt_text(result)}" for action, result in self.actions)
 
     def last_action_result(self):
         if not self.actions:
@@ -22,22 +28,21 @@ class Context:
         last_action, last_result = self.actions[-1]
         return f"Based on the last action [{last_action}], here is what I found: {last_result}"
 
-def classify_query(query):
-    social_keywords = [
-        "hi", "hello", "how are you", "joke", "tell me", "chat",
-        "conversation", "what can you do", "what controls", "what tools", "how can you help"
-    ]
-    lowered = query.lower()
-    if any(word in lowered for word in social_keywords):
-        return "chat"
-    return "work"
-
-def route_user_query(user_query):
+def route_user_query(user_query, plan_mode=False, session_id="default"):
+    """Answer one user message; session_id (e.g. the sender's phone number) keys conversation memory."""
     context = Context()
 
-    classification = classify_query(user_query)
-
-    if classification == "chat":
-        return frontend_llm_response(user_query)
-    else:
-        return backend_manager_loop_v2(user_query, context)
\ No newline at end of file
+    with trace(), timed_event("route_user_query") as event, span("route_user_query"):
+        classification = classify_query(user_query)
+        event["classification"] = classification
+
+        if classification == "chat":
+            return frontend_llm_response(user_query)
+        elif plan_mode:
+            return backend_manager_plan_v2(user_query, context)
+        else:
+            # Only a confident intent-model label skips the first planner call; an unsure one
+            # goes straight to the planner rather than waiting on the router LLM as well
+            route = route_tool(user_query, session_id=session_id, use_llm=False)
+            event["route"] = route
+            return backend_manager_loop_v2(user_query, context, route=route)
\ No newline at end of file
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from riley2.core.logger_utils import logger
+from riley2.core.metrics import registry
+from riley2.core.query_classifier import classify_query
+
+# Concurrent route_user_query calls; the shared Ollama backend is the bottleneck
+BACKEND_CONCURRENCY = int(os.environ.get('RILEY2_BACKEND_CONCURRENCY', 2))
+SENDER_RATE_PER_MINUTE = float(os.environ.get('RILEY2_SENDER_RATE_PER_MIN', 6))
+SENDER_BURST = float(os.environ.get('RILEY2_SENDER_BURST', 5))
+
+# Chat-classified messages up to this length jump the queue; they cost one small LLM call
+SHORT_QUERY_CHARS = 80
+
+# Relative backend cost per sender class, used as the fair-queueing packet size
+CLASS_COSTS = {"short_chat": 1.0, "chat": 1.0, "work": 4.0}
+PRIORITY_CLASSES = ("short_chat",)
+
+# Idle flows and full buckets are forgotten once this many senders are tracked
+MAX_TRACKED_SENDERS = 1024
+
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "riley2_scheduler_wait_seconds", "Time a request waited for a backend slot", ("sender_class",))
+RATE_LIMITED = registry.counter(
+    "riley2_rate_limited_total", "Requests rejected by the per-sender token bucket", ("sender_class",))
+
+
+class RateLimited(Exception):
+    """Raised when a sender has used up their token bucket."""
+
+
+def sender_class(query):
+    classification = classify_query(query)
+    if classification == "chat" and len(query) <= SHORT_QUERY_CHARS:
+        return "short_chat"
+    return classification
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, rate_per_second, now):
+        self.capacity = capacity
+        self.rate = rate_per_second
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now, amount=1.0):
+        self.refill(now)
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class _Ticket:
+    __slots__ = ("sender", "sender_class", "enqueued_at", "granted")
+
+    def __init__(self, sender, sender_class, enqueued_at):
+        self.sender = sender
+        self.sender_class = sender_class
+        self.enqueued_at = enqueued_at
+        self.granted = threading.Event()
+
+
+class FairScheduler:
+    """Admits requests to the backend fairly across senders.
+
+    Each sender has a token bucket; an empty bucket raises RateLimited instead of queueing.
+    Admitted requests wait for one of `concurrency` slots, ordered by priority class and
+    then by self-clocked fair queueing: a request's finish tag is
+    max(virtual time, the sender's previous tag) + cost / weight, so a sender with many
+    queued requests only gets their share while others are waiting.
+    """
+
+    def __init__(self, concurrency=BACKEND_CONCURRENCY, rate_per_minute=SENDER_RATE_PER_MINUTE,
+                 burst=SENDER_BURST, weights=None, clock=time.monotonic):
+        self.concurrency = concurrency
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = burst
+        self.weights = weights or {}
+        self.clock = clock
+        self._buckets = {}
+        self._last_finish = {}
+        self._virtual_time = 0.0
+        self._queue = []
+        self._running = 0
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _admit(self, sender, query):
+        cls = sender_class(query)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(sender)
+            if bucket is None:
+                bucket = self._buckets[sender] = TokenBucket(self.burst, self.rate_per_second, now)
+            if not bucket.take(now):
+                RATE_LIMITED.labels(cls).inc()
+                raise RateLimited(f"Sender {sender} is over {self.rate_per_second * 60:g} requests/minute")
+
+            start = max(self._virtual_time, self._last_finish.get(sender, 0.0))
+            finish = start + CLASS_COSTS.get(cls, 1.0) / self.weights.get(sender, 1.0)
+            self._last_finish[sender] = finish
+            ticket = _Ticket(sender, cls, now)
+            priority = 0 if cls in PRIORITY_CLASSES else 1
+            heapq.heappush(self._queue, (priority, finish, next(self._sequence), ticket))
+            if len(self._buckets) > MAX_TRACKED_SENDERS:
+                self._forget_idle_senders(now)
+            self._dispatch()
+        return ticket
+
+    def _dispatch(self):
+        while self._running < self.concurrency and self._queue:
+            _, finish, _, ticket = heapq.heappop(self._queue)
+            self._virtual_time = max(self._virtual_time, finish)
+            self._running += 1
+            ticket.granted.set()
+
+    def _release(self):
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+
+    def _forget_idle_senders(self, now):
+        for sender, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity and self._last_finish.get(sender, 0.0) <= self._virtual_time:
+                del self._buckets[sender]
+                self._last_finish.pop(sender, None)
+
+    def run(self, sender, query, compute):
+        """Wait for this sender's turn, then return compute(); raises RateLimited when over budget."""
+        ticket = self._admit(sender, query)
+        ticket.granted.wait()
+        waited = self.clock() - ticket.enqueued_at
+        QUEUE_WAIT_SECONDS.labels(ticket.sender_class).observe(waited)
+        logger.debug(f"Scheduled {ticket.sender_class} request from {sender} after {waited * 1000:.0f} ms")
+        try:
+            return compute()
+        finally:
+            self._release()
+
+    @property
+    def queued(self):
+        with self._lock:
+            return len(self._queue)
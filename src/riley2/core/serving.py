@@ -0,0 +1,126 @@
+import os
+import queue
+import signal
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+from riley2.core.logger_utils import logger
+from riley2.core.metrics import registry
+
+DEFAULT_SERVE_WORKERS = int(os.environ.get('RILEY2_SERVE_WORKERS', 8))
+# Requests accepted but waiting for a worker; beyond this we answer 503 instead of queueing
+DEFAULT_SERVE_QUEUE = int(os.environ.get('RILEY2_SERVE_QUEUE', 32))
+DEFAULT_DRAIN_SECONDS = float(os.environ.get('RILEY2_SERVE_DRAIN_SECONDS', 30))
+
+SERVE_QUEUE_DEPTH = registry.gauge(
+    "riley2_serve_queue_depth", "Accepted connections waiting for a server worker")
+SERVE_QUEUE_SECONDS = registry.histogram(
+    "riley2_serve_queue_seconds", "Time a connection waited for a server worker")
+SHED_REQUESTS = registry.counter(
+    "riley2_shed_requests_total", "Connections rejected with 503 because the request queue was full")
+
+SHED_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\n"
+                 b"Retry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Sends the per-request access line to the riley2 log instead of stderr."""
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI server with a fixed worker pool in front of a bounded queue.
+
+    The accept loop only enqueues connections. When the queue is full the
+    connection gets an immediate 503 with Retry-After, so overload turns into
+    fast rejections instead of an ever-growing backlog of slow requests.
+    """
+
+    def __init__(self, address, app, workers=DEFAULT_SERVE_WORKERS, queue_size=DEFAULT_SERVE_QUEUE,
+                 handler_class=QuietRequestHandler):
+        super().__init__(address, handler_class)
+        self.set_app(app)
+        self._pending = queue.Queue(maxsize=queue_size)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"riley2-serve-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        try:
+            self._pending.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            SHED_REQUESTS.inc()
+            logger.debug(f"Request queue full; shedding connection from {client_address[0]}")
+            try:
+                # Never block the accept thread: one non-blocking send fits in the socket buffer
+                request.setblocking(False)
+                request.send(SHED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        SERVE_QUEUE_DEPTH.inc()
+
+    def _work(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            request, client_address, queued_at = item
+            SERVE_QUEUE_DEPTH.dec()
+            SERVE_QUEUE_SECONDS.observe(time.monotonic() - queued_at)
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        logger.exception(f"Unhandled error serving {client_address[0]}")
+
+    def drain(self, timeout=DEFAULT_DRAIN_SECONDS):
+        """Finish every queued request, stop the workers and close the socket.
+
+        Call after serve_forever() has returned so nothing new is accepted.
+        """
+        deadline = time.monotonic() + timeout
+        for _ in self._workers:
+            try:
+                self._pending.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        unfinished = sum(worker.is_alive() for worker in self._workers)
+        if unfinished:
+            logger.warning(f"{unfinished} server workers still busy after {timeout}s drain")
+        self.server_close()
+
+
+def serve(app, host="127.0.0.1", port=5000, workers=DEFAULT_SERVE_WORKERS, queue_size=DEFAULT_SERVE_QUEUE,
+          drain_seconds=DEFAULT_DRAIN_SECONDS, on_shutdown=None):
+    """Serve app until SIGINT/SIGTERM, then drain in-flight requests and run on_shutdown."""
+    server = PooledWSGIServer((host, port), app, workers=workers, queue_size=queue_size)
+
+    def request_stop(signum, frame):
+        logger.info(f"Received signal {signum}; no longer accepting requests")
+        # shutdown() waits for serve_forever to exit, so it cannot run on the serving thread
+        threading.Thread(target=server.shutdown, name="riley2-serve-stop", daemon=True).start()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, request_stop)
+
+    logger.info(f"Serving on http://{host}:{server.server_port} with {workers} workers, queue {queue_size}")
+    try:
+        server.serve_forever()
+    finally:
+        server.drain(drain_seconds)
+        logger.info("Server stopped")
+        if on_shutdown:
+            on_shutdown()
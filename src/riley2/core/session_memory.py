@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from riley2.core.logger_utils import logger
+
+DEFAULT_TOKEN_BUDGET = 1024
+DEFAULT_SUMMARY_BUDGET = 256
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_SECONDS = 60 * 60
+
+
+def estimate_tokens(text):
+    """Rough count (~4 characters per token); good enough to keep prompts bounded."""
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, max_tokens):
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else "..." + text[-(max_chars - 3):]
+
+
+def extractive_summary(summary, evicted):
+    """Default summarizer: fold evicted turns into the running summary as one-line notes."""
+    notes = "; ".join(f"{role}: {text[:80]}" for role, text in evicted)
+    return f"{summary}; {notes}" if summary else notes
+
+
+class SessionMemory:
+    """Sliding window of recent turns plus a rolling summary of everything older.
+
+    The window is kept under token_budget; whenever it overflows, the oldest turns are
+    folded into the summary, which is itself capped at summary_budget tokens.
+    Safe to share between the request threads of one session.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, summary_budget=DEFAULT_SUMMARY_BUDGET,
+                 summarizer=extractive_summary):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summarizer = summarizer
+        self.messages = []
+        self.summary = ""
+        self.window_tokens = 0
+        self.last_used = time.monotonic()
+        self._lock = threading.RLock()
+
+    def add(self, role, text):
+        with self._lock:
+            self._add(role, text)
+
+    def _add(self, role, text):
+        self.messages.append((role, text))
+        self.window_tokens += estimate_tokens(text)
+        self.last_used = time.monotonic()
+
+        evicted = []
+        # Always keep the newest turn, even if it alone is over budget
+        while self.window_tokens > self.token_budget and len(self.messages) > 1:
+            old_role, old_text = self.messages.pop(0)
+            self.window_tokens -= estimate_tokens(old_text)
+            evicted.append((old_role, old_text))
+        if evicted:
+            self.summary = truncate_to_tokens(self.summarizer(self.summary, evicted), self.summary_budget)
+            logger.debug(f"Folded {len(evicted)} old turns into the session summary")
+
+    def save_turn(self, user_text, assistant_text):
+        # One lock for both halves so concurrent turns never interleave
+        with self._lock:
+            self._add("human", user_text)
+            self._add("ai", assistant_text)
+
+    def history(self):
+        """Return (summary, messages) for building a prompt."""
+        with self._lock:
+            self.last_used = time.monotonic()
+            return self.summary, list(self.messages)
+
+    def prompt_tokens(self):
+        with self._lock:
+            return self.window_tokens + estimate_tokens(self.summary)
+
+
+class SessionMemoryStore:
+    """Per-session memories, evicting the least recently used and idle sessions."""
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, idle_seconds=DEFAULT_IDLE_SECONDS, **memory_kwargs):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.memory_kwargs = memory_kwargs
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            self._evict_idle()
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = SessionMemory(**self.memory_kwargs)
+                self._sessions[session_id] = memory
+                while len(self._sessions) > self.max_sessions:
+                    evicted_id, _ = self._sessions.popitem(last=False)
+                    logger.debug(f"Evicted least recently used session memory: {evicted_id}")
+            else:
+                self._sessions.move_to_end(session_id)
+                memory.last_used = time.monotonic()
+            return memory
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        # Sessions are in LRU order, so idle ones are at the front
+        while self._sessions:
+            session_id, memory = next(iter(self._sessions.items()))
+            if memory.last_used >= cutoff:
+                break
+            del self._sessions[session_id]
+            logger.debug(f"Evicted idle session memory: {session_id}")
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
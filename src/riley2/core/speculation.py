@@ -0,0 +1,130 @@
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from riley2.core.logger_utils import logger
+from riley2.core.metrics import CACHE_LOOKUPS
+from riley2.core.date_args import format_date
+
+# Only read-only tools may be started before the planner has chosen them
+SPECULATABLE_TOOLS = {"calendar_scan", "calendar_free_slots", "email_download_chunk", "get_current_time", "meta_query"}
+
+
+def call_key(tool_name, args):
+    # Typed dates key the same as the YYYY/MM/DD strings the planner echoes back
+    return tool_name, json.dumps(args or {}, sort_keys=True, default=format_date)
+
+
+class SpeculationStats:
+    """Process-wide counters so hit rate and wasted work can be inspected."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.launched = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.wasted = 0
+        self.wasted_seconds = 0.0
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.launched if self.launched else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "launched": self.launched,
+                "hits": self.hits,
+                "misses": self.misses,
+                "cancelled": self.cancelled,
+                "wasted": self.wasted,
+                "wasted_seconds": round(self.wasted_seconds, 3),
+                "hit_rate": round(self.hit_rate, 3),
+            }
+
+
+speculation_stats = SpeculationStats()
+
+
+class SpeculativeExecutor:
+    """Starts likely tool calls in the background while the planner LLM is generating.
+
+    claim() hands over a speculative result when the planner picks the same (tool, args);
+    abandon() cancels everything else. Python threads cannot be interrupted, so a call
+    that has already started runs to completion and its runtime is counted as wasted.
+    """
+
+    def __init__(self, perform_action, max_workers=2, stats=None):
+        self.perform_action = perform_action
+        self.stats = stats or speculation_stats
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="riley2-speculate")
+        self._pending = {}
+
+    def start(self, predictions):
+        for tool_name, args in predictions:
+            if tool_name not in SPECULATABLE_TOOLS:
+                logger.debug(f"Not speculating on non read-only tool: {tool_name}")
+                continue
+            key = call_key(tool_name, args)
+            if key in self._pending:
+                continue
+            logger.debug(f"Speculatively starting {tool_name} with args: {args}")
+            # A fresh context copy per call: the speculative work belongs to the caller's trace
+            context = contextvars.copy_context()
+            self._pending[key] = self._pool.submit(context.run, self._timed_call, tool_name, args)
+            self.stats.add(launched=1)
+
+    def _timed_call(self, tool_name, args):
+        started = time.perf_counter()
+        result = self.perform_action(tool_name, args)
+        return result, time.perf_counter() - started
+
+    def claim(self, tool_name, args):
+        """Return the speculative result for this exact call, or None on a miss."""
+        future = self._pending.pop(call_key(tool_name, args), None)
+        if future is None:
+            self.stats.add(misses=1)
+            CACHE_LOOKUPS.labels("speculation", "miss").inc()
+            return None
+        try:
+            result, _ = future.result()
+        except Exception as e:
+            logger.warning(f"Speculative call to {tool_name} raised, running it again: {e}")
+            self.stats.add(misses=1)
+            CACHE_LOOKUPS.labels("speculation", "miss").inc()
+            return None
+        self.stats.add(hits=1)
+        CACHE_LOOKUPS.labels("speculation", "hit").inc()
+        logger.info(f"Speculation hit for {tool_name}")
+        return result
+
+    def abandon(self):
+        for (tool_name, _), future in self._pending.items():
+            if future.cancel():
+                self.stats.add(cancelled=1)
+            else:
+                self.stats.add(wasted=1)
+                future.add_done_callback(self._record_wasted)
+            logger.debug(f"Abandoned speculative call to {tool_name}")
+        self._pending.clear()
+        self._pool.shutdown(wait=False)
+
+    def _record_wasted(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.stats.add(wasted_seconds=future.result()[1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.abandon()
@@ -1,6 +1,5 @@
-
-from datetime import datetime
+from riley2.core.date_args import local_now
 
 def get_current_time():
-    now = datetime.now()
+    now = local_now()
     return now.strftime("%A, %B %d, %Y %H:%M:%S")
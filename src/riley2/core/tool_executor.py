@@ -1,18 +1,28 @@
 from riley2.core.tool_registry import TOOL_FUNCTIONS
+from riley2.core.event_log import timed_event
+from riley2.core.tracing import span
+from riley2.core.metrics import TOOL_ERRORS, TOOL_SECONDS
+from riley2.core.tool_results import ToolError
 import logging
 
 def execute_tool(tool_name, args):
-    tool = TOOL_FUNCTIONS.get(tool_name)
-    if not tool:
-        logging.error(f"Tool {tool_name} not found.")
-        return f"Error: Tool {tool_name} not found."
+    with timed_event("execute_tool", tool=tool_name) as event, span("execute_tool", tool=tool_name), \
+            TOOL_SECONDS.labels(tool_name).time():
+        tool = TOOL_FUNCTIONS.get(tool_name)
+        if not tool:
+            logging.error(f"Tool {tool_name} not found.")
+            event["status"] = "error"
+            TOOL_ERRORS.labels(tool_name).inc()
+            return ToolError(f"Error: Tool {tool_name} not found.")
 
-    try:
-        if args:
-            result = tool(**args)
-        else:
-            result = tool()
-        return result
-    except Exception as e:
-        logging.error(f"Error executing tool {tool_name}: {e}")
-        return f"Error executing tool '{tool_name}': {e}"
\ No newline at end of file
+        try:
+            if args:
+                result = tool(**args)
+            else:
+                result = tool()
+            return result
+        except Exception as e:
+            logging.error(f"Error executing tool {tool_name}: {e}")
+            event["status"] = "error"
+            TOOL_ERRORS.labels(tool_name).inc()
+            return ToolError(f"Error executing tool '{tool_name}': {e}")
@@ -1,4 +1,4 @@
-from riley2.agents.calendar_agent import calendar_scan
+from riley2.agents.calendar_agent import calendar_free_slots, calendar_scan
 from riley2.agents.email_agent import (
     email_download_chunk,
     email_filter_by_sender,
@@ -9,6 +9,7 @@ from riley2.core.meta_agent import meta_query
 
 TOOL_FUNCTIONS = {
     "calendar_scan": calendar_scan,
+    "calendar_free_slots": calendar_free_slots,
     "email_download_chunk": email_download_chunk,
     "email_filter_by_sender": email_filter_by_sender,
     "email_summarize_batch": email_summarize_batch,
@@ -0,0 +1,143 @@
+import os
+
+# Events a calendar tool keeps per call; the rest are only counted
+MAX_RESULT_EVENTS = int(os.environ.get('RILEY2_MAX_RESULT_EVENTS', 50))
+# Events or slots rendered into a planner prompt
+PROMPT_ITEM_LIMIT = int(os.environ.get('RILEY2_PROMPT_ITEM_LIMIT', 15))
+
+
+def _restore(cls, text, fields):
+    result = str.__new__(cls, text)
+    result.__dict__.update(fields)
+    return result
+
+
+class ToolResult(str):
+    """Base for structured tool results.
+
+    A ToolResult is also the compact text it renders to, so code that only wants
+    text (SMS replies, substring checks) keeps working. Code that needs the data
+    reads the fields, and prompts use render() with a smaller item limit, so
+    nothing has to parse the text back.
+    """
+
+    is_error = False
+
+    @property
+    def is_empty(self):
+        return False
+
+    def render(self, limit=None):
+        return str(self)
+
+    def __reduce__(self):
+        # str's default pickling would call __new__ with only the text
+        return _restore, (type(self), str(self), self.__dict__)
+
+
+class ToolError(ToolResult):
+    is_error = True
+
+    def __new__(cls, message):
+        result = str.__new__(cls, message)
+        result.message = message
+        return result
+
+
+def _event_line(event):
+    when = event.get("date", "")
+    if event.get("end_date"):
+        when += f"-{event['end_date']}"
+    if event.get("start_time") and not event.get("is_all_day"):
+        when += f" {event['start_time']}"
+        if event.get("end_time"):
+            when += f"-{event['end_time']}"
+    line = f"- {when} {event.get('title', '(No title)')}"
+    if event.get("location"):
+        line += f" @ {event['location']}"
+    return line
+
+
+class EventList(ToolResult):
+    """Events from a calendar lookup, in start order.
+
+    total counts every match; events holds at most the first MAX_RESULT_EVENTS
+    of them, and truncated says whether any were dropped.
+    """
+
+    def __new__(cls, events, total=None, limit=MAX_RESULT_EVENTS):
+        events = list(events)
+        total = len(events) if total is None else total
+        kept = events[:limit]
+        result = str.__new__(cls, cls._text(kept, total, None))
+        result.events = kept
+        result.total = total
+        result.truncated = total > len(kept)
+        return result
+
+    @staticmethod
+    def _text(events, total, limit):
+        if not total:
+            return "No matching events found."
+        shown = events if limit is None else events[:limit]
+        lines = [f"Found events ({total}):"] + [_event_line(event) for event in shown]
+        if total > len(shown):
+            lines.append(f"... and {total - len(shown)} more")
+        return "\n".join(lines)
+
+    @property
+    def is_empty(self):
+        return not self.total
+
+    def render(self, limit=None):
+        return self._text(self.events, self.total, limit)
+
+
+class FreeSlots(ToolResult):
+    """Free (start, end) datetimes of at least min_length, plus attendees whose calendars could not be read."""
+
+    def __new__(cls, slots, min_length, unchecked=()):
+        slots = list(slots)
+        unchecked = list(unchecked)
+        result = str.__new__(cls, cls._text(slots, min_length, unchecked, None))
+        result.slots = slots
+        result.min_length = min_length
+        result.unchecked = unchecked
+        return result
+
+    @staticmethod
+    def _text(slots, min_length, unchecked, limit):
+        minutes = int(min_length.total_seconds() // 60)
+        if slots:
+            shown = slots if limit is None else slots[:limit]
+            lines = [f"Free slots of at least {minutes} min:"]
+            lines += [f"- {start.strftime('%a %Y/%m/%d %H:%M')}-{end.strftime('%H:%M')}" for start, end in shown]
+            if len(slots) > len(shown):
+                lines.append(f"... and {len(slots) - len(shown)} more")
+        else:
+            lines = [f"No free slots of at least {minutes} min found."]
+        if unchecked:
+            lines.append(f"Could not check availability for: {', '.join(unchecked)}")
+        return "\n".join(lines)
+
+    @property
+    def is_empty(self):
+        # No slots is not a complete answer while some attendees' calendars went unchecked
+        return not self.slots and not self.unchecked
+
+    def render(self, limit=None):
+        return self._text(self.slots, self.min_length, self.unchecked, limit)
+
+
+def is_error_result(result):
+    if isinstance(result, ToolResult):
+        return result.is_error
+    # Tools that still return plain text (the email agent) signal errors by prefix
+    return isinstance(result, str) and result.lstrip().lower().startswith("error")
+
+
+def prompt_text(result, limit=PROMPT_ITEM_LIMIT):
+    """The compact form of a tool result for an LLM prompt."""
+    if isinstance(result, ToolResult):
+        return result.render(limit)
+    return str(result)
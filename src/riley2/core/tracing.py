@@ -0,0 +1,191 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from riley2.core.logger_utils import logger, log_dir
+
+# Off by default; when disabled span() returns a shared no-op and records nothing
+TRACE_ENABLED = os.environ.get('RILEY2_TRACE', '0') in ('1', 'true', 'True')
+TRACE_EXPORT_PATH = os.environ.get('RILEY2_TRACE_FILE', os.path.join(log_dir, "riley2_trace.json"))
+# A long-running server never resets the tracer, so it keeps only the most recent spans
+MAX_SPANS = int(os.environ.get('RILEY2_TRACE_MAX_SPANS', 100000))
+
+FLAME_BAR_WIDTH = 30
+
+_current_span = contextvars.ContextVar("riley2_current_span", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "parent", "thread_id", "start_ns", "end_ns", "_token")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.thread_id = None
+        self.start_ns = None
+        self.end_ns = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self.thread_id = threading.get_ident()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def path(self):
+        names = []
+        span = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return tuple(reversed(names))
+
+
+class Tracer:
+    """In-process span recorder.
+
+    Spans nest through a context variable, so code only needs `with span("name"):`.
+    Work handed to a thread pool starts a new root unless it is submitted through
+    contextvars.copy_context().run, as the plan executor and speculator do.
+    """
+
+    def __init__(self, enabled=TRACE_ENABLED, max_spans=MAX_SPANS):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.spans = deque(maxlen=max_spans)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def traced(self, name=None):
+        """Decorator form of span(); the enabled check happens on every call."""
+        def decorate(fn):
+            span_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _finish(self, span):
+        with self._lock:
+            full = len(self.spans) == self.max_spans
+            if full:
+                self.dropped += 1
+            self.spans.append(span)
+        if full and self.dropped == 1:
+            logger.warning(f"Trace buffer holds {self.max_spans} spans; dropping the oldest from now on")
+
+    def reset(self):
+        """Clear and return the spans recorded so far, oldest first."""
+        with self._lock:
+            spans, self.spans = list(self.spans), deque(maxlen=self.max_spans)
+            self.dropped = 0
+        return spans
+
+    def to_chrome_trace(self, spans=None):
+        """Chrome trace event format; load the file in chrome://tracing or Perfetto."""
+        spans = self.spans if spans is None else spans
+        pid = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": "riley2",
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": span.attrs,
+        } for span in spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path=TRACE_EXPORT_PATH, spans=None):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(spans), f, default=str)
+        logger.info(f"Exported {len(spans if spans is not None else self.spans)} trace spans to {path}")
+        return path
+
+    def flame_summary(self, spans=None):
+        """Indented call tree with total time, share of the root time and call count per path."""
+        spans = self.spans if spans is None else spans
+        totals = {}
+        children = {}
+        for span in spans:
+            path = span.path()
+            total_ns, count = totals.get(path, (0, 0))
+            totals[path] = (total_ns + span.end_ns - span.start_ns, count + 1)
+            children.setdefault(path[:-1], set()).add(path)
+
+        root_ns = sum(totals[path][0] for path in children.get((), ()))
+        if not root_ns:
+            return "No spans recorded."
+
+        lines = []
+
+        def render(path):
+            total_ns, count = totals[path]
+            share = total_ns / root_ns
+            label = "  " * (len(path) - 1) + path[-1]
+            bar = "█" * max(1, round(share * FLAME_BAR_WIDTH))
+            lines.append(f"{label:<40} {total_ns / 1e6:>10.1f} ms {share * 100:>5.1f}% x{count:<4} {bar}")
+            for child in sorted(children.get(path, ()), key=lambda p: -totals[p][0]):
+                render(child)
+
+        for root in sorted(children.get((), ()), key=lambda p: -totals[p][0]):
+            render(root)
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+
+
+def span(name, **attrs):
+    return tracer.span(name, **attrs)
+
+
+def traced(name=None):
+    return tracer.traced(name)
@@ -0,0 +1,103 @@
+# File: tests/mocks/calendar_service_mock.py
+
+import copy
+import itertools
+from types import SimpleNamespace
+from riley2.core.calendar_sync import SYNC_PAGE_SIZE
+
+
+class FakeHttpError(Exception):
+    """Shaped like googleapiclient.errors.HttpError: the status is on resp."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.resp = SimpleNamespace(status=status)
+
+
+class _FakeRequest:
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self):
+        return self._run()
+
+
+class FakeCalendarService:
+    """In-memory stand-in for the Calendar API's events() and freebusy() with paging and sync tokens.
+
+    Mutate it with put()/remove(); expire_tokens() makes the next incremental call fail
+    with 410 like the real API does. busy maps attendee ids to their {"start", "end"} busy blocks;
+    time_zone is the calendar's zone, reported on every list page like the real API.
+    """
+
+    def __init__(self, items=(), page_size=None, busy=None, time_zone="UTC"):
+        self.page_size = page_size
+        self.busy = busy or {}
+        self.time_zone = time_zone
+        self.calls = []
+        self._version = itertools.count(1)
+        self._items = {}
+        self._changes = []  # (version, item), newest last
+        self._token_floor = 0
+        for item in items:
+            self.put(item)
+
+    def put(self, item):
+        item = copy.deepcopy(item)
+        item.setdefault("status", "confirmed")
+        self._items[item["id"]] = item
+        self._changes.append((next(self._version), item))
+
+    def remove(self, event_id):
+        self._items.pop(event_id, None)
+        self._changes.append((next(self._version), {"id": event_id, "status": "cancelled"}))
+
+    def expire_tokens(self):
+        self._token_floor = self._changes[-1][0] if self._changes else 0
+
+    def events(self):
+        return self
+
+    def list(self, calendarId, pageToken=None, maxResults=SYNC_PAGE_SIZE, syncToken=None, **params):
+        self.calls.append({"syncToken": syncToken, "pageToken": pageToken})
+        return _FakeRequest(lambda: self._list(pageToken, self.page_size or maxResults, syncToken))
+
+    def insert(self, calendarId, body):
+        def run():
+            item = dict(body, id=f"fake-{len(self._changes) + 1}")
+            self.put(item)
+            return copy.deepcopy(self._items[item["id"]])
+        return _FakeRequest(run)
+
+    def freebusy(self):
+        return self
+
+    def query(self, body):
+        calendars = {}
+        for item in body["items"]:
+            if item["id"] in self.busy:
+                calendars[item["id"]] = {"busy": copy.deepcopy(self.busy[item["id"]])}
+            else:
+                calendars[item["id"]] = {"errors": [{"domain": "global", "reason": "notFound"}]}
+        return _FakeRequest(lambda: {"calendars": calendars})
+
+    def _list(self, page_token, page_size, sync_token):
+        current = self._changes[-1][0] if self._changes else 0
+        if sync_token is not None:
+            since = int(sync_token)
+            if since < self._token_floor:
+                raise FakeHttpError(410, "Sync token is no longer valid, a full sync is required.")
+            latest = {}
+            for version, item in self._changes:
+                if version > since:
+                    latest[item["id"]] = item
+            items = list(latest.values())
+        else:
+            items = list(self._items.values())
+        offset = int(page_token or 0)
+        page = {"items": [copy.deepcopy(item) for item in items[offset:offset + page_size]], "timeZone": self.time_zone}
+        if offset + page_size < len(items):
+            page["nextPageToken"] = str(offset + page_size)
+        else:
+            page["nextSyncToken"] = str(current)
+        return page
@@ -0,0 +1,119 @@
+"""
+Test module for the indexed calendar store behind calendar_scan.
+
+Verifies range queries over single-day, timed and multi-day events, title
+lookups through the word index (including partial words), that inserts and
+deletes keep every index current, that one long event does not widen every
+range scan, and that results match a brute-force scan.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from riley2.core.calendar_store import CalendarStore, event_bounds
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+def day(text):
+    return datetime.strptime(text, "%Y/%m/%d")
+
+
+class TestCalendarStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CalendarStore([
+            {"title": "Italy Trip", "date": "2025/05/12"},
+            {"title": "Spring Conference", "date": "2025/05/10", "end_date": "2025/05/12"},
+            {"title": "Team Meeting", "date": "2025/05/20", "start_time": "10:00", "end_time": "11:00"},
+            {"title": "Doctor Appointment", "date": "2025/05/04"},
+        ])
+
+    def titles(self, start, end, query=None):
+        return [event["title"] for event in self.store.scan(day(start), day(end) + timedelta(days=1), query)]
+
+    def test_range_queries_include_overlapping_events(self):
+        log_test_step("Testing range queries over single-day, timed and multi-day events")
+        self.assertEqual(self.titles("2025/05/11", "2025/05/11"), ["Spring Conference"])
+        self.assertEqual(self.titles("2025/05/12", "2025/05/15"), ["Spring Conference", "Italy Trip"])
+        self.assertEqual(self.titles("2025/05/20", "2025/05/20"), ["Team Meeting"])
+        self.assertEqual(self.titles("2025/05/15", "2025/05/01"), [], "Flipped ranges match nothing")
+        entry = self.store.entries_between(day("2025/05/20"), day("2025/05/21"))[0]
+        self.assertEqual((entry.start, entry.end), (datetime(2025, 5, 20, 10, 0), datetime(2025, 5, 20, 11, 0)))
+        log_test_success("test_range_queries_include_overlapping_events")
+
+    def test_title_index_matches_like_substring_search(self):
+        log_test_step("Testing keyword lookups through the title index")
+        self.assertEqual(self.titles("2025/05/01", "2025/05/31", "ITALY"), ["Italy Trip"])
+        self.assertEqual(self.titles("2025/05/01", "2025/05/31", "ital"), ["Italy Trip"])
+        self.assertEqual(self.titles("2025/05/01", "2025/05/31", "team meet"), ["Team Meeting"])
+        self.assertEqual(self.titles("2025/05/01", "2025/05/31", "meeting team"), [],
+                         "Words must appear in order, as with a plain substring search")
+        self.assertEqual(self.titles("2025/06/01", "2025/06/30", "italy"), [])
+        log_test_success("test_title_index_matches_like_substring_search")
+
+    def test_insert_and_delete_keep_indexes_current(self):
+        log_test_step("Testing incremental insert and delete")
+        event_id = self.store.insert({"title": "Italy Debrief", "date": "2025/05/21"})
+        self.assertEqual(self.titles("2025/05/01", "2025/05/31", "italy"), ["Italy Trip", "Italy Debrief"])
+
+        self.assertTrue(self.store.delete(event_id))
+        self.assertFalse(self.store.delete(event_id))
+        self.assertEqual(self.titles("2025/05/01", "2025/05/31", "debrief"), [])
+
+        self.store.insert({"title": "Moved Trip", "date": "2025/06/02"}, event_id="trip")
+        self.store.insert({"title": "Moved Trip", "date": "2025/06/09"}, event_id="trip")
+        self.assertEqual(self.titles("2025/06/01", "2025/06/05"), [], "Re-inserting an id replaces the event")
+        self.assertEqual(self.titles("2025/06/08", "2025/06/10"), ["Moved Trip"])
+        log_test_success("test_insert_and_delete_keep_indexes_current")
+
+    def test_long_events_do_not_widen_range_scans(self):
+        log_test_step("Testing that a semester-long event keeps range scans narrow")
+        start = day("2025/01/01")
+        for i in range(1000):
+            self.store.insert({"title": f"Standup {i}", "date": (start + timedelta(days=i % 300)).strftime("%Y/%m/%d"),
+                               "start_time": "09:00", "end_time": "09:15"})
+        self.store.insert({"id": "semester", "title": "Semester", "date": "2025/01/06", "end_date": "2025/06/30"})
+
+        lo, hi = self.store._range_slice(day("2025/05/20"), day("2025/05/21"))
+        self.assertLess(hi - lo, 10, "Only events near the window are in the bisected slice")
+        self.assertIn("Semester", self.titles("2025/05/20", "2025/05/20"))
+        self.assertEqual(self.titles("2025/05/20", "2025/05/20", "semester"), ["Semester"])
+        self.assertEqual(self.titles("2025/07/01", "2025/07/01", "semester"), [])
+
+        self.assertTrue(self.store.delete("semester"))
+        self.assertNotIn("Semester", self.titles("2025/05/20", "2025/05/20"))
+        self.assertEqual(len(self.store.events()), 1004)
+        log_test_success("test_long_events_do_not_widen_range_scans")
+
+    def test_matches_brute_force_scan(self):
+        log_test_step("Testing the index against a linear scan on random calendars")
+        rng = random.Random(7)
+        words = ["lunch", "review", "trip", "standup", "dentist", "offsite"]
+        store = CalendarStore()
+        events, ids = [], []
+        for i in range(500):
+            first = datetime(2025, 1, 1) + timedelta(days=rng.randrange(365))
+            event = {"title": f"{rng.choice(words)} {rng.choice(words)} {i}", "date": first.strftime("%Y/%m/%d")}
+            if rng.random() < 0.1:
+                event["end_date"] = (first + timedelta(days=rng.randrange(1, 6))).strftime("%Y/%m/%d")
+            elif rng.random() < 0.5:
+                event.update(start_time=f"{rng.randrange(8, 17):02d}:00", end_time=f"{rng.randrange(17, 20):02d}:30")
+            events.append(event)
+            ids.append(store.insert(event))
+        for event_id in ids[::5]:
+            store.delete(event_id)
+        live = [event for i, event in enumerate(events) if i % 5]
+
+        for _ in range(100):
+            start = datetime(2025, 1, 1) + timedelta(days=rng.randrange(365))
+            end = start + timedelta(days=rng.randrange(1, 30))
+            query = rng.choice([None, rng.choice(words), rng.choice(words)[:3]])
+            expected = [e for e in live if event_bounds(e)[0] < end and event_bounds(e)[1] > start
+                        and (not query or query in e["title"])]
+            self.assertEqual(sorted(map(id, store.scan(start, end, query))), sorted(map(id, expected)))
+        log_test_success("test_matches_brute_force_scan")
+
+
+if __name__ == "__main__":
+    unittest.main()
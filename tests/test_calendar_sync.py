@@ -0,0 +1,159 @@
+"""
+Test module for the Google Calendar sync into the local indexed store.
+
+Runs against the in-memory FakeCalendarService. Verifies the paged initial
+full sync, incremental syncs that only fetch changes, recovery from an
+expired sync token, resuming from the on-disk snapshot, conversion of API
+events into the calendar's own time zone, that only one background sync
+starts at a time, and that calendar_scan answers from the store without an
+API call per query.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from riley2.agents import calendar_agent
+from riley2.core import date_args
+from riley2.core.calendar_store import CalendarStore
+from riley2.core.calendar_sync import CalendarSync, google_event_to_local
+from riley2.core.logger_utils import log_test_step, log_test_success
+from tests.mocks.calendar_service_mock import FakeCalendarService
+
+
+def api_event(event_id, summary, day, end_day=None):
+    return {"id": event_id, "summary": summary, "start": {"date": day}, "end": {"date": end_day or day}}
+
+
+class TestCalendarSync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, "calendar_cache.json")
+        self.service = FakeCalendarService([
+            api_event("e1", "Italy Trip", "2025-05-12", "2025-05-13"),
+            api_event("e2", "William Lunch", "2025-04-27", "2025-04-28"),
+            api_event("e3", "Doctor Appointment", "2025-05-04", "2025-05-05"),
+        ], page_size=2)
+        self.store = CalendarStore()
+        # Syncing points the shared clock at the fake calendar's zone; put it back afterwards
+        patcher = patch.object(date_args, "_clock_zone", date_args._clock_zone)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def titles(self, store=None):
+        return sorted(event["title"] for event in (store or self.store).events())
+
+    def test_full_then_incremental_sync(self):
+        log_test_step("Testing a paged full sync followed by change-only syncs")
+        sync = CalendarSync(self.service, self.store, state_path=self.state_path)
+        self.assertEqual(sync.sync(), 3)
+        self.assertEqual(len(self.service.calls), 2, "Three events at two per page")
+        self.assertEqual(self.titles(), ["Doctor Appointment", "Italy Trip", "William Lunch"])
+
+        self.service.put(api_event("e1", "Italy Trip (moved)", "2025-05-19", "2025-05-20"))
+        self.service.remove("e2")
+        self.service.calls.clear()
+        self.assertEqual(sync.sync(), 2, "Only the two changes are fetched")
+        self.assertIsNotNone(self.service.calls[0]["syncToken"])
+        self.assertEqual(self.titles(), ["Doctor Appointment", "Italy Trip (moved)"])
+        self.assertEqual(self.store.get("e1")["date"], "2025/05/19")
+        log_test_success("test_full_then_incremental_sync")
+
+    def test_expired_token_falls_back_to_full_sync(self):
+        log_test_step("Testing recovery from a 410 on an expired sync token")
+        sync = CalendarSync(self.service, self.store)
+        sync.sync()
+        self.service.remove("e3")
+        self.service.expire_tokens()
+        sync.sync()
+        self.assertEqual(self.titles(), ["Italy Trip", "William Lunch"])
+        log_test_success("test_expired_token_falls_back_to_full_sync")
+
+    def test_restart_resumes_from_snapshot(self):
+        log_test_step("Testing that a restart loads the snapshot and syncs incrementally")
+        CalendarSync(self.service, self.store, state_path=self.state_path).sync()
+        self.service.put(api_event("e4", "Board Meeting", "2025-05-20", "2025-05-21"))
+        self.service.calls.clear()
+
+        restarted_store = CalendarStore()
+        restarted = CalendarSync(self.service, restarted_store, state_path=self.state_path)
+        self.assertEqual(len(restarted_store), 3, "Events come back from disk before any API call")
+        self.assertEqual(restarted.sync(), 1)
+        self.assertIsNotNone(self.service.calls[0]["syncToken"])
+        self.assertIn("Board Meeting", self.titles(restarted_store))
+        log_test_success("test_restart_resumes_from_snapshot")
+
+    def test_event_conversion(self):
+        log_test_step("Testing conversion of all-day, multi-day and timed API events")
+        self.assertEqual(google_event_to_local(api_event("a", "Holiday", "2025-05-25", "2025-05-26")),
+                         {"id": "a", "title": "Holiday", "date": "2025/05/25", "is_all_day": True})
+        self.assertEqual(google_event_to_local(api_event("b", "Offsite", "2025-05-10", "2025-05-13"))["end_date"],
+                         "2025/05/12")
+        timed = google_event_to_local({"id": "c", "summary": "Standup",
+                                       "start": {"dateTime": "2025-05-20T09:00:00-07:00"},
+                                       "end": {"dateTime": "2025-05-20T09:15:00-07:00"}})
+        self.assertEqual((timed["date"], timed["start_time"], timed["end_time"]), ("2025/05/20", "09:00", "09:15"))
+        log_test_success("test_event_conversion")
+
+    def test_timed_events_share_the_calendar_zone(self):
+        log_test_step("Testing that timed events from any offset are stored in the calendar's zone")
+        service = FakeCalendarService([
+            {"id": "ny", "summary": "Call NY", "start": {"dateTime": "2025-05-20T09:00:00-04:00"},
+             "end": {"dateTime": "2025-05-20T10:00:00-04:00"}},
+            {"id": "utc", "summary": "Late UTC", "start": {"dateTime": "2025-05-20T23:30:00Z"},
+             "end": {"dateTime": "2025-05-21T00:00:00Z"}},
+        ], time_zone="Europe/Paris")
+        sync = CalendarSync(service, self.store, time_zone=None, state_path=self.state_path)
+        sync.sync()
+        self.assertEqual(sync.time_zone, "Europe/Paris")
+        self.assertEqual(date_args.local_today(), datetime.now(sync.zone).date(),
+                         "'today' in date phrases follows the calendar's zone")
+        ny, late = self.store.get("ny"), self.store.get("utc")
+        self.assertEqual((ny["date"], ny["start_time"], ny["end_time"]), ("2025/05/20", "15:00", "16:00"))
+        self.assertEqual((late["date"], late["start_time"]), ("2025/05/21", "01:30"))
+        self.assertEqual(CalendarSync(service, CalendarStore(), time_zone=None,
+                                      state_path=self.state_path).time_zone, "Europe/Paris")
+
+        # A zone change makes the stored times stale, so it forces a full sync
+        service.time_zone = "America/New_York"
+        service.calls.clear()
+        sync.sync()
+        self.assertIsNone(service.calls[-1]["syncToken"])
+        self.assertEqual(self.store.get("ny")["start_time"], "09:00")
+        log_test_success("test_timed_events_share_the_calendar_zone")
+
+    def test_refresh_starts_one_background_sync(self):
+        log_test_step("Testing that concurrent refreshes start a single background sync")
+        sync = CalendarSync(self.service, self.store, interval=0)
+        sync.sync()
+        started = []
+        with patch.object(threading.Thread, "start", lambda thread: started.append(thread)):
+            for _ in range(8):
+                sync.refresh()
+        self.assertEqual(len(started), 1, "The lock is held until the started sync finishes")
+        started[0].run()
+        self.assertFalse(sync._sync_lock.locked())
+        log_test_success("test_refresh_starts_one_background_sync")
+
+    def test_scans_are_answered_locally(self):
+        log_test_step("Testing that calendar_scan syncs once and then answers from the store")
+        sync = CalendarSync(self.service, self.store, interval=3600)
+        with patch.object(calendar_agent, "CALENDAR_BACKEND", "google"), \
+                patch.object(calendar_agent, "calendar_store", self.store), \
+                patch.object(calendar_agent, "calendar_sync", sync):
+            for _ in range(5):
+                result = calendar_agent.calendar_scan("2025/05/01", "2025/05/31", "italy")
+        self.assertIn("Italy Trip", result)
+        self.assertEqual(len(self.service.calls), 2, "Only the first scan's full sync hits the API")
+        log_test_success("test_scans_are_answered_locally")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Test module for conflict-checked calendar writes.
+
+Verifies CalendarWriter's interval-index conflict check, that bookings on
+different days do not serialize on each other, that calendar_create honours
+reservation holds, and that writes for the Google backend go through the API.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.agents import calendar_agent
+from riley2.core.calendar_store import CalendarStore, CalendarWriter
+from riley2.core.calendar_sync import CalendarSync
+from riley2.core.date_args import parse_date
+from riley2.core.logger_utils import log_test_step, log_test_success
+from tests.mocks.calendar_service_mock import FakeCalendarService
+
+
+def meeting(title, date, start, end):
+    return {"title": title, "date": date, "start_time": start, "end_time": end}
+
+
+class TestCalendarWriter(unittest.TestCase):
+
+    def test_conflicts_with_timed_events_only(self):
+        log_test_step("Testing overlap detection against timed and all-day events")
+        writer = CalendarWriter(CalendarStore([{"title": "Italy Trip", "date": "2025/05/20"}]))
+        first = writer.create(meeting("Team Meeting", "2025/05/20", "10:00", "11:00"))
+        self.assertEqual(first["status"], "success", "All-day events are not busy time")
+
+        clash = writer.create(meeting("Client Call", "2025/05/20", "10:30", "11:30"))
+        self.assertEqual(clash["status"], "conflict")
+        self.assertEqual(clash["conflicting_with"]["title"], "Team Meeting")
+        self.assertEqual(writer.create(meeting("Client Call", "2025/05/20", "11:00", "12:00"))["status"], "success")
+        self.assertEqual(len(writer.store), 3)
+        log_test_success("test_conflicts_with_timed_events_only")
+
+    def test_concurrent_overlapping_bookings_have_one_winner(self):
+        log_test_step("Testing racing bookings for overlapping times")
+        writer = CalendarWriter(CalendarStore())
+        barrier = threading.Barrier(6)
+        results = []
+
+        def book(i):
+            barrier.wait()
+            results.append(writer.create(meeting(f"Meeting {i}", "2025/05/21", "09:00", f"09:{30 + i:02d}")))
+
+        threads = [threading.Thread(target=book, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([r["status"] for r in results].count("success"), 1)
+        log_test_success("test_concurrent_overlapping_bookings_have_one_winner")
+
+    def test_different_days_do_not_contend(self):
+        log_test_step("Testing that slow writes on different days run in parallel")
+
+        def slow_persist(event):
+            time.sleep(0.1)
+            return event
+
+        writer = CalendarWriter(CalendarStore(), persist=slow_persist)
+
+        def book_days(days):
+            threads = [threading.Thread(target=writer.create, args=(meeting("Standup", day, "09:00", "09:15"),))
+                       for day in days]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return time.perf_counter() - started
+
+        # Consecutive days always land on different stripes
+        days = [f"2025/06/{n:02d}" for n in range(1, 5)]
+        self.assertEqual(len({id(writer._locks_for([parse_date(day)])[0]) for day in days}), 4)
+        self.assertLess(book_days(days[:4]), 0.3)
+        self.assertEqual(len(writer.store), 4)
+        log_test_success("test_different_days_do_not_contend")
+
+
+class TestCalendarCreate(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CalendarStore()
+        self.manager = calendar_agent.ReservationManager()
+        self.patchers = [
+            patch.object(calendar_agent, "calendar_store", self.store),
+            patch.object(calendar_agent, "calendar_writer", CalendarWriter(self.store)),
+            patch.object(calendar_agent, "reservation_manager", self.manager),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_holds_block_other_agents(self):
+        log_test_step("Testing that calendar_create respects reservation holds")
+        slot = {"date": "2025/05/29", "start_time": "13:00", "end_time": "14:00"}
+        hold = self.manager.acquire_lock("agent1", slot)
+        event = dict(slot, title="Important Meeting")
+
+        blocked = calendar_agent.calendar_create(event)
+        self.assertEqual(blocked["status"], "conflict")
+        self.assertEqual(blocked["conflicting_with"]["agent_id"], "agent1")
+
+        booked = calendar_agent.calendar_create(event, lock_id=hold["lock_id"])
+        self.assertEqual(booked["status"], "success")
+        self.manager.release_lock(hold["lock_id"])
+        self.assertIn("Important Meeting", calendar_agent.calendar_scan("2025/05/29", "2025/05/29"))
+        log_test_success("test_holds_block_other_agents")
+
+    def test_google_backend_writes_through_the_api(self):
+        log_test_step("Testing that bookings on the Google backend are inserted through the API")
+        service = FakeCalendarService()
+        sync = CalendarSync(service, self.store)
+        calendar_agent.calendar_writer.persist = sync.create_event
+        with patch.object(calendar_agent, "CALENDAR_BACKEND", "google"), \
+                patch.object(calendar_agent, "calendar_sync", sync):
+            result = calendar_agent.calendar_create(meeting("Dentist", "2025/06/03", "08:30", "09:00"))
+            self.assertEqual(result["status"], "success")
+            self.assertTrue(result["event_id"].startswith("fake-"))
+            sync.sync()
+        self.assertEqual(len(self.store), 1, "The synced copy replaces the local one")
+        stored = self.store.get(result["event_id"])
+        self.assertEqual((stored["date"], stored["start_time"], stored["end_time"]), ("2025/06/03", "08:30", "09:00"))
+        log_test_success("test_google_backend_writes_through_the_api")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Test module for the shared date-argument normalizer.
+
+Verifies both absolute formats, relative phrases (including ranges such as
+"next weekend"), pass-through of typed dates, memoization, that invalid
+input raises a format error, that "today" comes from one clock, and that calendar_scan accepts typed dates
+and phrases.
+"""
+
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from riley2.core import date_args
+from riley2.core.date_args import DateFormatError, format_date, parse_date
+from riley2.core.speculation import call_key
+from riley2.agents.backend_manager_v2 import extract_args_for_tool, first_step_prompt
+from riley2.agents.calendar_agent import calendar_scan
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+# A Wednesday
+TODAY = date(2025, 5, 14)
+
+
+class TestParseDate(unittest.TestCase):
+
+    def test_absolute_formats_and_typed_dates(self):
+        log_test_step("Testing absolute formats and typed dates")
+        self.assertEqual(parse_date("2025/05/01"), date(2025, 5, 1))
+        self.assertEqual(parse_date("2025-5-1"), date(2025, 5, 1))
+        self.assertEqual(parse_date(" 2025/05/01 "), date(2025, 5, 1))
+        self.assertEqual(parse_date(datetime(2025, 5, 1, 9, 30)), date(2025, 5, 1))
+        self.assertEqual(format_date(parse_date(date(2025, 5, 1))), "2025/05/01")
+        log_test_success("test_absolute_formats_and_typed_dates")
+
+    def test_relative_phrases(self):
+        log_test_step("Testing relative date phrases")
+        cases = {
+            "today": date(2025, 5, 14),
+            "Tomorrow": date(2025, 5, 15),
+            "yesterday": date(2025, 5, 13),
+            "in 3 days": date(2025, 5, 17),
+            "2 weeks ago": date(2025, 4, 30),
+            "friday": date(2025, 5, 16),
+            "monday": date(2025, 5, 19),
+            "next friday": date(2025, 5, 23),
+            "last friday": date(2025, 5, 9),
+            "this week": date(2025, 5, 12),
+            "next weekend": date(2025, 5, 24),
+            "next month": date(2025, 6, 1),
+        }
+        for phrase, expected in cases.items():
+            self.assertEqual(parse_date(phrase, today=TODAY), expected, phrase)
+        self.assertEqual(parse_date("next weekend", today=TODAY, end=True), date(2025, 5, 25))
+        self.assertEqual(parse_date("this week", today=TODAY, end=True), date(2025, 5, 18))
+        self.assertEqual(parse_date("last month", today=TODAY, end=True), date(2025, 4, 30))
+        self.assertEqual(parse_date("next month", today=date(2025, 12, 3), end=True), date(2026, 1, 31))
+        log_test_success("test_relative_phrases")
+
+    def test_invalid_dates_raise_format_errors(self):
+        log_test_step("Testing that unknown input raises DateFormatError")
+        for value in ("not-a-date", "25/05/01", "", "2025/13/01", "2025.05.01"):
+            with self.assertRaises(DateFormatError) as context:
+                parse_date(value)
+            self.assertIn("format", str(context.exception).lower())
+        log_test_success("test_invalid_dates_raise_format_errors")
+
+    def test_durations_and_times_of_day(self):
+        log_test_step("Testing duration and HH:MM arguments")
+        for value, minutes in ((60, 60), ("90", 90), ("1h", 60), ("1.5 hours", 90), ("45 min", 45), ("1h30m", 90)):
+            self.assertEqual(date_args.parse_duration(value), timedelta(minutes=minutes), value)
+        self.assertEqual(date_args.parse_time_of_day("09:30"), 570)
+        self.assertEqual(date_args.parse_time_of_day("24:00"), 1440)
+        for bad in ("", "soon", 0, -30, "0", "0h", timedelta(0)):
+            with self.assertRaises(DateFormatError):
+                date_args.parse_duration(bad)
+        with self.assertRaises(DateFormatError):
+            date_args.parse_time_of_day("25:00")
+        log_test_success("test_durations_and_times_of_day")
+
+    def test_today_comes_from_one_clock(self):
+        log_test_step("Testing that every code path resolves 'today' from the calendar's clock")
+        with patch.object(date_args, "local_now", return_value=datetime(2025, 5, 14, 23, 30)):
+            self.assertEqual(parse_date("tomorrow"), date(2025, 5, 15))
+            self.assertEqual(extract_args_for_tool("calendar_scan", None, "what's on?")["start_date"], TODAY)
+            self.assertIn("Today's date is 2025/05/14.", first_step_prompt("what's on?", []).build())
+        log_test_success("test_today_comes_from_one_clock")
+
+    def test_parsing_is_memoized(self):
+        log_test_step("Testing that repeated arguments hit the cache")
+        parse_date("2031/01/02")
+        hits = date_args._parse_absolute.cache_info().hits
+        parse_date("2031/01/02")
+        self.assertEqual(date_args._parse_absolute.cache_info().hits, hits + 1)
+        log_test_success("test_parsing_is_memoized")
+
+    def test_typed_dates_flow_into_tools(self):
+        log_test_step("Testing that tools take typed dates and phrases")
+        self.assertIn("Italy Trip", calendar_scan(date(2025, 5, 1), date(2025, 5, 31), "italy"))
+        self.assertEqual(call_key("calendar_scan", {"start_date": date(2025, 5, 1)}),
+                         call_key("calendar_scan", {"start_date": "2025/05/01"}),
+                         "Speculated typed args must match the planner's string args")
+        log_test_success("test_typed_dates_flow_into_tools")
+
+
+if __name__ == "__main__":
+    unittest.main()
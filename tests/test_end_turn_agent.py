@@ -0,0 +1,96 @@
+"""
+Test module for the deterministic end-of-turn evaluator.
+
+Verifies that EndTurnAgent decides from tool result structure when it can,
+leaves "nothing found" from the right tool to the LLM so it can retry broader,
+escalates errors, unexpected tools and unclear intents, and counts how each
+decision was made.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from riley2.agents.end_turn_agent import EndTurnAgent, EndTurnStats, expected_tools
+from riley2.core.logger_utils import log_test_step, log_test_success
+from riley2.core.metrics import registry
+
+
+class FakeContext:
+    def __init__(self, *actions):
+        self.actions = list(actions)
+
+    def last_action_result(self):
+        return self.actions[-1] if self.actions else ("None", "None")
+
+    def actions_log(self):
+        return str(self.actions)
+
+
+class TestEndTurnAgent(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = EndTurnStats()
+        self.agent = EndTurnAgent(stats=self.stats)
+
+    def test_matching_tool_with_results_ends_turn(self):
+        log_test_step("Testing that a matching, non-empty result ends the turn")
+        context = FakeContext(("calendar_scan", "Found events: [{'title': 'Italy Trip', 'date': '2025/05/12'}]"))
+        self.assertTrue(self.agent.should_end_turn("When is my Italy trip?", context))
+        self.assertEqual(self.stats.snapshot()["rule_end"], 1)
+        log_test_success("test_matching_tool_with_results_ends_turn")
+
+    def test_empty_result_from_matching_tool_escalates(self):
+        log_test_step("Testing that 'nothing found' from the right tool is left to the LLM")
+        for result in ["No matching events found.", ""]:
+            context = FakeContext(("calendar_scan", result))
+            decision, reason = self.agent.evaluate("Any meetings next week?", context)
+            self.assertIsNone(decision, result)
+            self.assertIn("found nothing", reason)
+        log_test_success("test_empty_result_from_matching_tool_escalates")
+
+    def test_errors_and_mismatches_escalate(self):
+        log_test_step("Testing that errors and unexpected tools are left to the LLM")
+        cases = [
+            ("calendar_scan", "Error executing tool 'calendar_scan': boom"),
+            ("get_current_time", "2025-05-12 10:00"),
+            ("meta_query", "No tools found."),
+        ]
+        for action in cases:
+            self.assertIsNone(self.agent.evaluate("Any meetings next week?", FakeContext(action))[0], action)
+        log_test_success("test_errors_and_mismatches_escalate")
+
+    def test_intermediate_email_step_continues(self):
+        log_test_step("Testing that a download is not enough when a summary was requested")
+        context = FakeContext(("email_download_chunk", "From: boss@x.com\nSubject: Update\n..."))
+        self.assertFalse(self.agent.should_end_turn("Summarize my emails from the boss", context))
+        context.actions.append(("email_summarize_batch", "Your boss sent a project update."))
+        self.assertTrue(self.agent.should_end_turn("Summarize my emails from the boss", context))
+        log_test_success("test_intermediate_email_step_continues")
+
+    def test_sender_queries_require_filtering(self):
+        log_test_step("Testing the intent mapping for sender-specific email queries")
+        self.assertEqual(expected_tools("show emails from jess"), {"email_filter_by_sender", "email_summarize_batch"})
+        self.assertIn("email_download_chunk", expected_tools("check my inbox"))
+        self.assertIn("email_download_chunk", expected_tools("show my emails from last week"))
+        self.assertIn("email_download_chunk", expected_tools("any emails from May 3?"))
+        self.assertNotIn("email_download_chunk", expected_tools("emails from jess@example.com"))
+        self.assertEqual(expected_tools("tell me something"), set())
+        # Substrings of other words must not trigger an intent
+        self.assertEqual(expected_tools("any update to prevent this?"), set())
+        log_test_success("test_sender_queries_require_filtering")
+
+    def test_unclear_intent_escalates_to_llm(self):
+        log_test_step("Testing escalation to the LLM when rules are unsure")
+        context = FakeContext(("meta_query", "I can do lots of things"))
+        with patch.object(EndTurnAgent, "_ask_llm", return_value=True) as ask_llm:
+            self.assertTrue(self.agent.should_end_turn("Hmm, thoughts?", context))
+        ask_llm.assert_called_once()
+        self.assertIn('riley2_end_turn_decisions_total{source="llm_escalations"}', registry.render())
+        self.assertEqual(self.stats.snapshot(), {
+            "rule_end": 0, "rule_continue": 0, "llm_escalations": 1, "llm_hops_saved": 0,
+        })
+        log_test_success("test_unclear_intent_escalates_to_llm")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Test module for the structured JSON-lines event log.
+
+Verifies that timed events carry trace and span IDs and nest correctly, that
+failures are recorded with an error status, that a disabled log writes
+nothing, and that latency percentiles are aggregated per stage.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from riley2.core.event_log import EventLog, latency_percentiles, percentile, read_events, trace
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "events.jsonl")
+        self.events = EventLog(self.path, enabled=True)
+
+    def tearDown(self):
+        self.events.close()
+        self.tmp.cleanup()
+
+    def read(self):
+        self.events.close()
+        return list(read_events(self.path))
+
+    def test_nested_spans_share_trace(self):
+        log_test_step("Testing trace and span IDs on nested timed events")
+        with trace("t1"):
+            with self.events.timed("loop_turn", step=0) as turn:
+                turn["prompt_tokens"] = 12
+                with self.events.timed("execute_tool", tool="calendar_scan"):
+                    pass
+
+        tool_event, turn_event = self.read()
+        self.assertEqual(tool_event["stage"], "execute_tool")
+        self.assertEqual(tool_event["tool"], "calendar_scan")
+        self.assertEqual(tool_event["parent_id"], turn_event["span_id"])
+        self.assertEqual({tool_event["trace_id"], turn_event["trace_id"]}, {"t1"})
+        self.assertIsNone(turn_event["parent_id"])
+        self.assertEqual(turn_event["prompt_tokens"], 12)
+        self.assertEqual(turn_event["status"], "ok")
+        self.assertGreaterEqual(turn_event["duration_ms"], tool_event["duration_ms"])
+        log_test_success("test_nested_spans_share_trace")
+
+    def test_exception_marks_error(self):
+        log_test_step("Testing that an exception inside a span is recorded as an error")
+        with self.assertRaises(RuntimeError):
+            with self.events.timed("execute_tool", tool="broken"):
+                raise RuntimeError("boom")
+        (event,) = self.read()
+        self.assertEqual(event["status"], "error")
+        log_test_success("test_exception_marks_error")
+
+    def test_disabled_log_writes_nothing(self):
+        log_test_step("Testing that a disabled event log never creates its file")
+        disabled = EventLog(self.path, enabled=False)
+        with disabled.timed("loop_turn") as event:
+            event["action"] = "calendar_scan"
+        disabled.emit("execute_tool")
+        self.assertFalse(os.path.exists(self.path))
+        log_test_success("test_disabled_log_writes_nothing")
+
+
+class TestLatencyPercentiles(unittest.TestCase):
+
+    def test_percentiles_per_stage(self):
+        log_test_step("Testing latency aggregation per stage")
+        events = [{"stage": "execute_tool", "duration_ms": float(ms)} for ms in range(1, 101)]
+        events += [{"stage": "loop_turn", "duration_ms": 500.0}, {"stage": "marker"}]
+
+        summary = latency_percentiles(events)
+        self.assertEqual(set(summary), {"execute_tool", "loop_turn"})
+        self.assertEqual(summary["execute_tool"]["count"], 100)
+        self.assertEqual(summary["execute_tool"]["p50"], 50.0)
+        self.assertEqual(summary["execute_tool"]["p99"], 99.0)
+        self.assertEqual(summary["execute_tool"]["max"], 100.0)
+        self.assertEqual(summary["loop_turn"]["p90"], 500.0)
+        self.assertIsNone(percentile([], 50))
+        log_test_success("test_percentiles_per_stage")
+
+    def test_read_events_skips_bad_lines(self):
+        log_test_step("Testing that unparseable lines are skipped")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"stage": "a"}) + "\n\nnot json\n" + json.dumps({"stage": "b"}) + "\n")
+            self.assertEqual([e["stage"] for e in read_events(path)], ["a", "b"])
+        log_test_success("test_read_events_skips_bad_lines")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Test module for the calendar_free_slots tool.
+
+Verifies the sweep over merged busy intervals, working-hour windows and
+constraints, and intersection with other attendees' free/busy through the
+Google backend, all in a single tool call.
+"""
+
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from riley2.agents import calendar_agent
+from riley2.core.calendar_store import CalendarStore, free_intervals
+from riley2.core.calendar_sync import CalendarSync
+from riley2.core.date_args import format_date
+from riley2.core.logger_utils import log_test_step, log_test_success
+from riley2.core.tool_results import FreeSlots
+from tests.mocks.calendar_service_mock import FakeCalendarService
+
+
+def at(day, hhmm):
+    hours, minutes = map(int, hhmm.split(":"))
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hours, minutes=minutes)
+
+
+class TestFreeIntervals(unittest.TestCase):
+
+    def test_sweep_merges_calendars_and_windows(self):
+        log_test_step("Testing the sweep across several calendars and day windows")
+        d1, d2 = date(2030, 1, 7), date(2030, 1, 8)
+        windows = [(at(d1, "09:00"), at(d1, "17:00")), (at(d2, "09:00"), at(d2, "17:00"))]
+        mine = [(at(d1, "10:00"), at(d1, "11:00")), (at(d1, "16:30"), at(d2, "09:30"))]
+        theirs = [(at(d1, "08:00"), at(d1, "09:15")), (at(d1, "10:30"), at(d1, "12:00")), (at(d2, "13:00"), at(d2, "14:00"))]
+        slots = list(free_intervals([mine, theirs], windows, timedelta(minutes=30)))
+        self.assertEqual(slots, [
+            (at(d1, "09:15"), at(d1, "10:00")),
+            (at(d1, "12:00"), at(d1, "16:30")),
+            (at(d2, "09:30"), at(d2, "13:00")),
+            (at(d2, "14:00"), at(d2, "17:00")),
+        ])
+        self.assertEqual(len(list(free_intervals([mine, theirs], windows, timedelta(hours=4)))), 1)
+        log_test_success("test_sweep_merges_calendars_and_windows")
+
+
+class TestCalendarFreeSlots(unittest.TestCase):
+
+    def setUp(self):
+        # A Monday far enough ahead that "now" never clips the windows
+        self.monday = date.today() + timedelta(days=14 - date.today().weekday())
+        self.store = CalendarStore([
+            {"title": "Standup", "date": format_date(self.monday), "start_time": "09:00", "end_time": "09:30"},
+            {"title": "Lunch", "date": format_date(self.monday), "start_time": "12:00", "end_time": "13:00"},
+            {"title": "Conference", "date": format_date(self.monday)},
+        ])
+        self.patcher = patch.object(calendar_agent, "calendar_store", self.store)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_one_call_answers_the_question(self):
+        log_test_step("Testing free slots on the local calendar")
+        result = calendar_agent.calendar_free_slots(self.monday, self.monday, "2h")
+        self.assertIn("Free slots of at least 120 min", result)
+        self.assertIn("09:30-12:00", result)
+        self.assertIn("13:00-17:00", result)
+        self.assertEqual(result.count("\n- "), 2, "All-day events do not block time")
+
+        late = calendar_agent.calendar_free_slots(self.monday, self.monday, 60, {"day_start": "13:00", "day_end": "14:00"})
+        self.assertIn("13:00-14:00", late)
+        full = calendar_agent.calendar_free_slots(self.monday, self.monday, "5h")
+        self.assertIn("No free slots of at least 300 min found", full)
+        log_test_success("test_one_call_answers_the_question")
+
+    def test_weekdays_and_limit(self):
+        log_test_step("Testing weekday filtering and the result limit")
+        saturday = self.monday + timedelta(days=5)
+        self.assertIn("No free slots", calendar_agent.calendar_free_slots(
+            saturday, saturday + timedelta(days=1), 60, {"weekdays_only": True}))
+        result = calendar_agent.calendar_free_slots(self.monday, self.monday + timedelta(days=13), 30, {"limit": 3})
+        self.assertEqual(result.count("\n- "), 3)
+        log_test_success("test_weekdays_and_limit")
+
+    def test_attendees_are_intersected(self):
+        log_test_step("Testing intersection with other attendees' busy time")
+        day = self.monday.isoformat()
+        service = FakeCalendarService(busy={"ana@example.com": [
+            {"start": f"{day}T09:30:00Z", "end": f"{day}T11:00:00Z"},
+            {"start": f"{day}T14:00:00Z", "end": f"{day}T16:00:00Z"},
+        ]})
+        sync = CalendarSync(service, self.store)
+        with patch.object(calendar_agent, "CALENDAR_BACKEND", "google"), \
+                patch.object(calendar_agent, "calendar_sync", sync), \
+                patch.object(sync, "refresh"):
+            result = calendar_agent.calendar_free_slots(
+                self.monday, self.monday, 60, {"attendees": ["ana@example.com", "bo@example.com"]})
+        self.assertIn("11:00-12:00", result)
+        self.assertIn("13:00-14:00", result)
+        self.assertIn("16:00-17:00", result)
+        self.assertNotIn("09:30", result)
+        self.assertIn("Could not check availability for: bo@example.com", result)
+        self.assertFalse(FreeSlots([], timedelta(hours=1), ["bo@example.com"]).is_empty,
+                         "No slots is not a final answer while an attendee went unchecked")
+        log_test_success("test_attendees_are_intersected")
+
+    def test_now_comes_from_the_calendar_zone(self):
+        log_test_step("Testing that past slots are cut using the calendar's clock")
+        sync = CalendarSync(FakeCalendarService(), self.store)
+        calendar_now = datetime.combine(self.monday, datetime.min.time()) + timedelta(hours=12, minutes=30)
+        with patch.object(calendar_agent, "CALENDAR_BACKEND", "google"), \
+                patch.object(calendar_agent, "calendar_sync", sync), \
+                patch.object(sync, "refresh"), patch.object(calendar_agent, "local_now", return_value=calendar_now):
+            result = calendar_agent.calendar_free_slots(self.monday, self.monday, 60)
+        self.assertNotIn("09:30-12:00", result)
+        self.assertIn("13:00-17:00", result)
+        log_test_success("test_now_comes_from_the_calendar_zone")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Test module for the idempotency cache used to deduplicate webhook retries.
+
+Verifies that concurrent duplicates coalesce onto the running call, that
+finished results are reused until the TTL expires, that failures are not
+cached, and that the cache stays bounded.
+"""
+
+import threading
+import time
+import unittest
+
+from riley2.core.idempotency import IdempotencyCache
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestIdempotencyCache(unittest.TestCase):
+
+    def test_concurrent_duplicates_share_one_call(self):
+        log_test_step("Testing that retries arriving mid-computation wait for the original")
+        cache = IdempotencyCache(ttl_seconds=60)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "reply"
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(cache.run("SM1", compute)))
+        first.start()
+        self.assertTrue(started.wait(5))
+        retries = [threading.Thread(target=lambda: results.append(cache.run("SM1", compute))) for _ in range(3)]
+        for thread in retries:
+            thread.start()
+        release.set()
+        for thread in [first] + retries:
+            thread.join(5)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, ["reply"] * 4)
+        log_test_success("test_concurrent_duplicates_share_one_call")
+
+    def test_results_expire_after_ttl(self):
+        log_test_step("Testing that finished results are reused only within the TTL")
+        cache = IdempotencyCache(ttl_seconds=0.05)
+        counter = iter(range(10))
+        self.assertEqual(cache.run("SM1", lambda: next(counter)), 0)
+        self.assertEqual(cache.run("SM1", lambda: next(counter)), 0)
+        time.sleep(0.06)
+        self.assertEqual(cache.run("SM1", lambda: next(counter)), 1)
+        log_test_success("test_results_expire_after_ttl")
+
+    def test_failures_are_not_cached(self):
+        log_test_step("Testing that a failed call can be retried")
+        cache = IdempotencyCache(ttl_seconds=60)
+
+        def broken():
+            raise RuntimeError("ollama is down")
+
+        with self.assertRaises(RuntimeError):
+            cache.run("SM1", broken)
+        self.assertEqual(cache.run("SM1", lambda: "recovered"), "recovered")
+        log_test_success("test_failures_are_not_cached")
+
+    def test_missing_key_and_size_bound(self):
+        log_test_step("Testing that blank keys bypass the cache and old entries are evicted")
+        cache = IdempotencyCache(ttl_seconds=60, max_entries=3)
+        counter = iter(range(100))
+        self.assertNotEqual(cache.run("", lambda: next(counter)), cache.run("", lambda: next(counter)))
+        for i in range(10):
+            cache.run(f"SM{i}", lambda: i)
+        self.assertLessEqual(len(cache), 4)
+        log_test_success("test_missing_key_and_size_bound")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Test module for the local tool intent classifier.
+
+Verifies that the TF-IDF nearest-centroid model routes clear requests to the
+right tool, defers ambiguous ones to the LLM router and stays fast.
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.core.intent_classifier import IntentClassifier, get_intent_model, load_intent_corpus
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestIntentClassifier(unittest.TestCase):
+
+    def test_routes_clear_requests(self):
+        log_test_step("Testing routing of unambiguous requests")
+        model = get_intent_model()
+        cases = {
+            "Any unread emails today?": "email_unread",
+            "When is my trip to Italy?": "calendar_search",
+            "Forget the note about the plumber": "kdb_delete_entry",
+            "What's my next meeting tomorrow?": "calendar_next",
+        }
+        for query, expected in cases.items():
+            label, confidence = model.predict(query)
+            self.assertEqual(label, expected, f"{query} (confidence {confidence:.2f})")
+        log_test_success("test_routes_clear_requests")
+
+    def test_unknown_vocabulary_defers_to_llm(self):
+        log_test_step("Testing that out-of-vocabulary input falls back")
+        label, confidence = get_intent_model().predict("zxqv blorp")
+        self.assertIsNone(label)
+        log_test_success("test_unknown_vocabulary_defers_to_llm")
+
+    def test_threshold_controls_fallback(self):
+        log_test_step("Testing that a stricter threshold falls back more often")
+        samples = load_intent_corpus()
+        strict = IntentClassifier(threshold=1.0).fit(samples)
+        self.assertIsNone(strict.predict("Show me my inbox")[0])
+        log_test_success("test_threshold_controls_fallback")
+
+    def test_model_is_cached_and_fast(self):
+        log_test_step("Testing that the hot model answers in well under a millisecond")
+        model = get_intent_model()
+        self.assertIs(model, get_intent_model(), "The model should be trained once per process")
+        start = time.perf_counter()
+        for _ in range(100):
+            model.predict("Did William email me about lunch?")
+        per_query = (time.perf_counter() - start) / 100
+        self.assertLess(per_query, 0.005)
+        log_test_success("test_model_is_cached_and_fast")
+
+
+class TestRoutedFirstTool(unittest.TestCase):
+
+    def test_confident_route_skips_first_planner_call(self):
+        log_test_step("Testing that a routed tool runs without the first planner call")
+        from riley2.agents import backend_manager_v2
+        from riley2.core.event_log import event_log
+        from riley2.core.router_chain import Context
+
+        prompts, calls = [], []
+        with patch.object(event_log, "enabled", False), \
+                patch.object(backend_manager_v2, "backend_planner_llm",
+                             side_effect=lambda prompt: prompts.append(prompt) or '{"action": "END_TURN"}'), \
+                patch.object(backend_manager_v2, "perform_action",
+                             side_effect=lambda tool, args: calls.append((tool, args)) or "Found events: Italy Trip"):
+            response = backend_manager_v2.backend_manager_loop_v2(
+                "When is my trip to Italy?", Context(), route="calendar_search")
+
+        self.assertEqual(prompts, [])
+        self.assertEqual(calls[0][0], "calendar_scan")
+        self.assertNotIn("query", calls[0][1], "The label picks the tool; the sentence is not a title filter")
+        self.assertIn("Italy Trip", response)
+        log_test_success("test_confident_route_skips_first_planner_call")
+
+    def test_unsure_route_skips_router_llm(self):
+        log_test_step("Testing that an unsure intent model does not fall back to the router LLM")
+        from riley2.core import llm_frontend
+
+        with patch.object(llm_frontend, "router_chain") as router_chain:
+            self.assertIsNone(llm_frontend.route_tool("zxqv blorp", use_llm=False))
+            router_chain.invoke.assert_not_called()
+        log_test_success("test_unsure_route_skips_router_llm")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+"""
+Test module for the riley2 logging backend.
+
+Verifies that records are written by a background listener rather than the
+calling thread, that messages are formatted when logged, that the bounded
+queue drops low-priority records when full and exports the count, that
+stopping the listener flushes everything still queued, that large payloads
+are rendered lazily, capped in size and kept off the console below DEBUG, and
+that log files rotate by size and age into gzipped archives subject to the
+retention policy.
+"""
+
+import contextlib
+import gzip
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.core import logger_utils
+from riley2.core.logger_utils import BoundedQueueHandler, CompressingRotatingFileHandler, Payload, attach_queue_listener
+from riley2.core.logger_utils import log_test_step, log_test_success
+from riley2.core.metrics import registry
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+
+class TestQueueLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.target = logging.getLogger(f"riley2_queue_test_{self._testMethodName}")
+        self.target.setLevel(logging.DEBUG)
+        self.target.propagate = False
+        self.target.handlers.clear()
+
+    def test_records_are_written_off_the_calling_thread(self):
+        log_test_step("Testing that handlers run on the listener thread")
+        recorder = RecordingHandler()
+        listener = attach_queue_listener(self.target, recorder)
+        for i in range(50):
+            self.target.debug("message %d", i)
+        listener.stop()
+        self.assertEqual(len(recorder.records), 50, "Stopping the listener should flush every record")
+        self.assertEqual(recorder.records[7], "message 7")
+        self.assertNotIn(threading.current_thread().name, recorder.threads)
+        log_test_success("test_records_are_written_off_the_calling_thread")
+
+    def test_arguments_are_captured_when_logged(self):
+        log_test_step("Testing that arguments mutated after the call do not change the message")
+        log_queue = queue.Queue()
+        self.target.addHandler(BoundedQueueHandler(log_queue))
+        args = {"query": "original"}
+        self.target.info("tool args: %s", args)
+        args["query"] = "changed"
+        record = log_queue.get_nowait()
+        self.assertEqual(record.getMessage(), "tool args: {'query': 'original'}")
+        self.assertIsNone(record.args)
+        log_test_success("test_arguments_are_captured_when_logged")
+
+    def test_full_queue_drops_debug_but_keeps_errors(self):
+        log_test_step("Testing the drop policy of the bounded queue")
+        log_queue = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue)
+        self.target.addHandler(handler)
+        self.target.debug("one")
+        self.target.info("two")
+        self.target.debug("dropped")
+        self.assertEqual(handler.dropped, 1)
+
+        # Errors wait for space; free one slot from another thread
+        threading.Timer(0.05, log_queue.get).start()
+        self.target.error("kept")
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(log_queue.qsize(), 2)
+
+        counter = registry.counter("test_log_records_dropped_total", "Dropped test records", ("logger",)).labels("test")
+        handler.count_drops(counter)
+        self.target.debug("dropped again")
+        self.assertEqual(counter.value, 2, "Drops before and after hooking up the counter are exported")
+        log_test_success("test_full_queue_drops_debug_but_keeps_errors")
+
+
+class TestPayload(unittest.TestCase):
+
+    def test_payload_is_not_rendered_below_level(self):
+        log_test_step("Testing that disabled levels never build the payload")
+        target = logging.getLogger("riley2_payload_test")
+        target.setLevel(logging.INFO)
+        calls = []
+        target.debug("Prompt: %s", Payload(lambda: calls.append("built") or "prompt"))
+        self.assertEqual(calls, [])
+        log_test_success("test_payload_is_not_rendered_below_level")
+
+    def test_console_helpers_skip_payloads_below_debug(self):
+        log_test_step("Testing that the console helpers only dump payloads at DEBUG")
+        self.addCleanup(logger_utils.logger.setLevel, logger_utils.logger.level)
+        logger_utils.logger.setLevel(logging.INFO)
+        out = io.StringIO()
+        with patch.object(logger_utils, "log_json_block") as dump, contextlib.redirect_stdout(out):
+            logger_utils.log_tool_usage("calendar_scan", {"query": "secret"}, {"result": "secret"})
+            logger_utils.log_component_interaction("USER", "FRONTEND", "ask", {"text": "secret"}, {"ok": "secret"})
+            logger_utils.log_llm_call("planner", "secret prompt", "secret response", {"temperature": 0})
+        dump.assert_not_called()
+        self.assertNotIn("secret", out.getvalue())
+        self.assertIn("[TOOL] calendar_scan", out.getvalue())
+        log_test_success("test_console_helpers_skip_payloads_below_debug")
+
+    def test_payload_is_capped(self):
+        log_test_step("Testing payload size capping")
+        self.assertEqual(str(Payload("x" * 50, limit=10)), "x" * 10 + "... [+40 chars]")
+        self.assertEqual(str(Payload({"a": [1, 2]})), '{"a": [1, 2]}')
+        self.assertEqual(str(Payload(42)), "42")
+        log_test_success("test_payload_is_capped")
+
+
+class TestLogRotation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "riley2.log")
+
+    def tearDown(self):
+        self.handler.close()
+        self.tmp.cleanup()
+
+    def emit(self, message):
+        self.handler.emit(logging.LogRecord("riley2", logging.INFO, __file__, 0, message, None, None))
+
+    def test_rotates_by_size_into_gzip(self):
+        log_test_step("Testing size-based rotation with compressed archives")
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=100, max_age_hours=0)
+        for i in range(5):
+            self.emit(f"line {i} " + "x" * 40)
+        self.handler.wait_for_archives()
+
+        archives = self.handler.archives()
+        self.assertTrue(archives)
+        self.assertTrue(all(path.endswith(".gz") for path in archives))
+        with gzip.open(archives[-1], "rt", encoding="utf-8") as f:
+            self.assertIn("line 0", f.read())
+        self.assertLessEqual(os.path.getsize(self.path), 100)
+        log_test_success("test_rotates_by_size_into_gzip")
+
+    def test_rotates_by_age(self):
+        log_test_step("Testing age-based rotation")
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, max_age_hours=1, compress=False)
+        self.emit("before")
+        self.handler.rollover_at = time.time() - 1
+        self.emit("after")
+        self.handler.wait_for_archives()
+
+        archives = self.handler.archives()
+        self.assertEqual(len(archives), 1)
+        with open(archives[0], encoding="utf-8") as f:
+            self.assertIn("before", f.read())
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read().strip(), "after")
+        log_test_success("test_rotates_by_age")
+
+    def test_age_is_measured_from_existing_file(self):
+        log_test_step("Testing that a reopened old log rotates on its first write")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("stale\n")
+        two_hours_ago = time.time() - 2 * 3600
+        os.utime(self.path, (two_hours_ago, two_hours_ago))
+
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, max_age_hours=1, compress=False)
+        self.assertLess(self.handler.rollover_at, time.time())
+        self.emit("fresh")
+        self.handler.wait_for_archives()
+
+        archives = self.handler.archives()
+        self.assertEqual(len(archives), 1)
+        with open(archives[0], encoding="utf-8") as f:
+            self.assertEqual(f.read().strip(), "stale")
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read().strip(), "fresh")
+        log_test_success("test_age_is_measured_from_existing_file")
+
+    def test_restarts_do_not_postpone_rotation(self):
+        log_test_step("Testing that rotation follows wall-clock periods across restarts")
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, max_age_hours=1, compress=False)
+        first = self.handler.rollover_at
+        self.emit("written just now")
+        self.handler.close()
+
+        # A restart right after a write must not push the rollover an hour past the restart
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, max_age_hours=1, compress=False)
+        self.assertEqual(self.handler.rollover_at, first)
+        self.assertEqual(first % 3600, 0)
+        self.assertLessEqual(first - time.time(), 3600)
+        log_test_success("test_restarts_do_not_postpone_rotation")
+
+    def test_retention_keeps_newest_archives(self):
+        log_test_step("Testing archive retention by count and age")
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, max_age_hours=0,
+                                                      backup_count=2, retention_days=1)
+        now = time.time()
+        for name, age_hours in (("a", 1), ("b", 2), ("c", 3), ("d", 48)):
+            archive = f"{self.path}.{name}.gz"
+            open(archive, "w").close()
+            os.utime(archive, (now - age_hours * 3600,) * 2)
+
+        self.handler.prune_archives()
+        kept = [os.path.basename(path) for path in self.handler.archives()]
+        self.assertEqual(kept, ["riley2.log.a.gz", "riley2.log.b.gz"])
+        log_test_success("test_retention_keeps_newest_archives")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test module for the metrics registry.
+
+Verifies counter, gauge and histogram semantics, the Prometheus text
+exposition format, label validation, that concurrent recording loses no
+updates, and that recording an event stays cheap.
+"""
+
+import threading
+import time
+import unittest
+
+from riley2.core.metrics import MetricsRegistry
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_exposition(self):
+        log_test_step("Testing counter and gauge rendering")
+        errors = self.registry.counter("riley2_tool_errors_total", "Tool errors", ("tool",))
+        errors.labels("calendar_scan").inc()
+        errors.labels(tool="calendar_scan").inc(2)
+        errors.labels("email \"batch\"").inc()
+        depth = self.registry.gauge("riley2_queue_depth", "Queued requests")
+        depth.set(3)
+        depth.inc(2)
+        depth.dec()
+
+        text = self.registry.render()
+        self.assertIn("# TYPE riley2_tool_errors_total counter", text)
+        self.assertIn('riley2_tool_errors_total{tool="calendar_scan"} 3', text)
+        self.assertIn('riley2_tool_errors_total{tool="email \\"batch\\""} 1', text)
+        self.assertIn("# TYPE riley2_queue_depth gauge", text)
+        self.assertIn("riley2_queue_depth 4", text)
+        log_test_success("test_counter_and_gauge_exposition")
+
+    def test_histogram_buckets_are_cumulative(self):
+        log_test_step("Testing histogram buckets, sum and count")
+        latency = self.registry.histogram("riley2_tool_seconds", "Tool latency", ("tool",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            latency.labels("calendar_scan").observe(value)
+
+        text = self.registry.render()
+        self.assertIn('riley2_tool_seconds_bucket{tool="calendar_scan",le="0.1"} 1', text)
+        self.assertIn('riley2_tool_seconds_bucket{tool="calendar_scan",le="1"} 3', text)
+        self.assertIn('riley2_tool_seconds_bucket{tool="calendar_scan",le="+Inf"} 4', text)
+        self.assertIn('riley2_tool_seconds_sum{tool="calendar_scan"} 6.05', text)
+        self.assertIn('riley2_tool_seconds_count{tool="calendar_scan"} 4', text)
+        log_test_success("test_histogram_buckets_are_cumulative")
+
+    def test_registration_is_idempotent_and_checked(self):
+        log_test_step("Testing metric re-registration and label validation")
+        first = self.registry.counter("riley2_llm_calls_total", "LLM calls", ("role",))
+        self.assertIs(self.registry.counter("riley2_llm_calls_total", "LLM calls", ("role",)), first)
+        with self.assertRaises(ValueError):
+            self.registry.histogram("riley2_llm_calls_total", "LLM calls", ("role",))
+        with self.assertRaises(ValueError):
+            first.labels("planner", "extra")
+        log_test_success("test_registration_is_idempotent_and_checked")
+
+    def test_concurrent_recording_is_exact(self):
+        log_test_step("Testing that per-thread shards lose no updates")
+        calls = self.registry.counter("riley2_llm_calls_total", "LLM calls", ("role",))
+        latency = self.registry.histogram("riley2_tool_seconds", "Tool latency", ("tool",))
+
+        def record():
+            for _ in range(5000):
+                calls.labels("planner").inc()
+                latency.labels("calendar_scan").observe(0.2)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls.labels("planner").value, 40000)
+        counts, total, count = latency.labels("calendar_scan").snapshot()
+        self.assertEqual(count, 40000)
+        self.assertEqual(sum(counts), 40000)
+        self.assertAlmostEqual(total, 8000.0, places=3)
+        log_test_success("test_concurrent_recording_is_exact")
+
+    def test_recording_is_cheap(self):
+        log_test_step("Testing per-event instrumentation cost")
+        calls = self.registry.counter("riley2_bench_total", "Bench", ("role",))
+        iterations = 100000
+        started = time.perf_counter()
+        for _ in range(iterations):
+            calls.labels("planner").inc()
+        per_event = (time.perf_counter() - started) / iterations
+        self.assertEqual(calls.labels("planner").value, iterations)
+        # Generous bound so slow CI machines do not flake; typically a few hundred ns
+        self.assertLess(per_event, 5e-6)
+        log_test_success("test_recording_is_cheap", f"{per_event * 1e9:.0f} ns per event")
+
+
+if __name__ == "__main__":
+    unittest.main()
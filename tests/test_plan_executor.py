@@ -0,0 +1,177 @@
+"""
+Test module for the plan-then-execute DAG executor.
+
+Verifies plan parsing and validation, dependency wiring between steps,
+parallel execution of independent steps, failure propagation, reuse of
+successful calls across a replan, propagation of the caller's trace context
+into worker threads, and answers built from every sink step.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.core.plan_executor import PlanError, parse_plan, execute_plan, sink_steps
+from riley2.core.event_log import current_trace_id, trace
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestPlanExecutor(unittest.TestCase):
+
+    def test_parse_plan_infers_dependencies_from_references(self):
+        log_test_step("Testing that $step references become dependencies")
+        steps = parse_plan('{"steps": ['
+                           '{"id": "s1", "tool": "email_download_chunk", "args": {"start_date": "2025/05/01", "end_date": "2025/05/08"}},'
+                           '{"id": "s2", "tool": "email_filter_by_sender", "args": {"raw_emails": "$s1", "sender_email": "boss@x.com"}},'
+                           '{"id": "s3", "tool": "email_summarize_batch", "args": {"raw_emails": "$s2"}}'
+                           ']}')
+        self.assertEqual([s.id for s in steps], ["s1", "s2", "s3"])
+        self.assertEqual(steps[1].depends_on, {"s1"})
+        self.assertEqual(steps[2].depends_on, {"s2"})
+        self.assertEqual([s.id for s in sink_steps(steps)], ["s3"])
+        log_test_success("test_parse_plan_infers_dependencies_from_references")
+
+    def test_parse_plan_rejects_invalid_plans(self):
+        log_test_step("Testing rejection of malformed plans")
+        invalid = [
+            "not json",
+            '{"steps": []}',
+            '{"steps": [{"id": "a", "args": {}}]}',
+            '{"steps": [{"id": "a", "tool": "x", "depends_on": ["missing"]}]}',
+            '{"steps": [{"id": "a", "tool": "x", "args": {"v": "$b"}}, {"id": "b", "tool": "y", "args": {"v": "$a"}}]}',
+            '{"steps": [{"id": "a", "tool": "x"}, {"id": "a", "tool": "y"}]}',
+        ]
+        for text in invalid:
+            with self.assertRaises(PlanError, msg=text):
+                parse_plan(text)
+        log_test_success("test_parse_plan_rejects_invalid_plans")
+
+    def test_execute_plan_passes_outputs_downstream(self):
+        log_test_step("Testing that step outputs are passed into dependent steps")
+        steps = parse_plan('[{"tool": "download"}, {"tool": "upper", "args": {"text": "$s1"}}]')
+
+        def perform_action(tool, args):
+            return "emails" if tool == "download" else args["text"].upper()
+
+        outcome = execute_plan(steps, perform_action)
+        self.assertTrue(outcome.ok)
+        self.assertEqual(outcome.results, {"s1": "emails", "s2": "EMAILS"})
+        self.assertEqual(outcome.order, ["s1", "s2"])
+        log_test_success("test_execute_plan_passes_outputs_downstream")
+
+    def test_independent_steps_run_in_parallel(self):
+        log_test_step("Testing that independent steps overlap in time")
+        steps = parse_plan('[{"tool": "slow"}, {"tool": "slow"}, {"tool": "slow"}]')
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def perform_action(tool, args):
+            with lock:
+                active.append(tool)
+                peak.append(len(active))
+            time.sleep(0.1)
+            with lock:
+                active.pop()
+            return "done"
+
+        outcome = execute_plan(steps, perform_action, max_workers=3)
+        self.assertTrue(outcome.ok)
+        self.assertEqual(max(peak), 3, "All three independent steps should run concurrently")
+        log_test_success("test_independent_steps_run_in_parallel")
+
+    def test_failure_skips_dependents_only(self):
+        log_test_step("Testing that a failed step skips its dependents but not other branches")
+        steps = parse_plan('{"steps": ['
+                           '{"id": "a", "tool": "broken"},'
+                           '{"id": "b", "tool": "echo", "args": {"v": "$a"}},'
+                           '{"id": "c", "tool": "echo", "args": {"v": "$b"}},'
+                           '{"id": "d", "tool": "ok"}'
+                           ']}')
+
+        def perform_action(tool, args):
+            if tool == "broken":
+                return "Error executing tool 'broken': boom"
+            return "fine"
+
+        outcome = execute_plan(steps, perform_action)
+        self.assertFalse(outcome.ok)
+        self.assertIn("a", outcome.failed)
+        self.assertEqual(sorted(outcome.skipped), ["b", "c"])
+        self.assertEqual(outcome.results, {"d": "fine"})
+        log_test_success("test_failure_skips_dependents_only")
+
+    def test_exceptions_are_recorded_as_failures(self):
+        log_test_step("Testing that exceptions raised by tools are captured")
+        steps = parse_plan('[{"tool": "raises"}]')
+
+        def perform_action(tool, args):
+            raise RuntimeError("network down")
+
+        outcome = execute_plan(steps, perform_action)
+        self.assertIn("network down", outcome.failed["s1"])
+        log_test_success("test_exceptions_are_recorded_as_failures")
+
+    def test_completed_calls_are_not_run_again(self):
+        log_test_step("Testing that a replan reuses calls that already succeeded")
+        calls = []
+
+        def perform_action(tool, args):
+            calls.append(tool)
+            return "Error: flaky" if tool == "flaky" and calls.count("flaky") == 1 else f"{tool} done"
+
+        completed = {}
+        first = parse_plan('[{"tool": "download", "args": {"day": "2025/05/12"}}, {"tool": "flaky", "args": {"v": "$s1"}}]')
+        self.assertFalse(execute_plan(first, perform_action, completed=completed).ok)
+
+        second = parse_plan('[{"id": "x", "tool": "download", "args": {"day": "2025/05/12"}},'
+                            ' {"id": "y", "tool": "flaky", "args": {"v": "$x"}}]')
+        outcome = execute_plan(second, perform_action, completed=completed)
+        self.assertTrue(outcome.ok)
+        self.assertEqual(calls, ["download", "flaky", "flaky"])
+        self.assertEqual(outcome.results["x"], "download done")
+        log_test_success("test_completed_calls_are_not_run_again")
+
+    def test_steps_run_in_the_callers_trace(self):
+        log_test_step("Testing that worker threads see the caller's trace_id")
+        seen = {}
+
+        def perform_action(tool, args):
+            seen[tool] = current_trace_id()
+
+        steps = parse_plan('[{"tool": "a"}, {"tool": "b"}]')
+        with trace("req-1"):
+            execute_plan(steps, perform_action)
+
+        self.assertEqual(seen, {"a": "req-1", "b": "req-1"})
+        log_test_success("test_steps_run_in_the_callers_trace")
+
+
+class TestPlanMode(unittest.TestCase):
+
+    def test_answer_covers_every_sink(self):
+        log_test_step("Testing that parallel branches all reach the final answer")
+        from riley2.agents import backend_manager_v2
+        from riley2.core.router_chain import Context
+        from riley2.core.event_log import event_log
+
+        plan = ('{"steps": [{"id": "cal", "tool": "calendar_scan", "args": {"query": "trip"}},'
+                ' {"id": "mail", "tool": "email_download_chunk", "args": {}},'
+                ' {"id": "sum", "tool": "email_summarize_batch", "args": {"raw_emails": "$mail"}}]}')
+        results = {"calendar_scan": "Found events: Italy trip", "email_download_chunk": "raw",
+                   "email_summarize_batch": "Two emails about the trip"}
+
+        with patch.object(event_log, "enabled", False), \
+                patch.object(backend_manager_v2, "backend_planner_llm", return_value=plan), \
+                patch.object(backend_manager_v2, "perform_action", side_effect=lambda tool, args: results[tool]):
+            response = backend_manager_v2.backend_manager_plan_v2("trip plans and emails", Context())
+
+        self.assertIn("Found events: Italy trip", response)
+        self.assertIn("Two emails about the trip", response)
+        self.assertNotIn("raw", response)
+        log_test_success("test_answer_covers_every_sink")
+
+
+if __name__ == "__main__":
+    unittest.main()
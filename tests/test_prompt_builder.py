@@ -0,0 +1,165 @@
+"""
+Test module for the token-budgeted prompt builder.
+
+Verifies per-section truncation and summarization, that tool results are
+re-rendered with fewer items before being cut, that the overall budget
+shrinks the largest flexible sections, and that the planner, summarizer and
+frontend prompts stay within budget and are recorded per role.
+"""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from riley2.agents import backend_manager_v2
+from riley2.core import frontend_llm, llm_backend
+from riley2.core.event_log import event_log
+from riley2.core.logger_utils import log_test_step, log_test_success
+from riley2.core.prompt_builder import (
+    KEEP_END, KEEP_START, PROMPT_TOKENS, PROMPT_TRUNCATIONS, SUMMARIZE, TRUNCATION_MARKER, PromptBuilder,
+    truncate_tokens)
+from riley2.core.router_chain import Context
+from riley2.core.session_memory import estimate_tokens
+from riley2.core.tool_results import EventList
+
+
+def _events(count):
+    return [{"title": f"Standup {i}", "date": "2025/05/20", "start_time": "09:00", "end_time": "09:15",
+             "id": f"evt-{i}"} for i in range(count)]
+
+
+class TestPromptBuilder(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(event_log, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_section_policies(self):
+        log_test_step("Testing per-section truncation policies")
+        text = "".join(f"line {i}\n" for i in range(200))
+        self.assertEqual(truncate_tokens("short", 10), "short")
+        start = truncate_tokens(text, 20, KEEP_START)
+        end = truncate_tokens(text, 20, KEEP_END)
+        self.assertTrue(start.startswith("line 0") and start.endswith(TRUNCATION_MARKER))
+        self.assertTrue(end.startswith(TRUNCATION_MARKER) and end.endswith("line 199\n"))
+        self.assertLessEqual(len(start), 80)
+
+        calls = []
+
+        def summarizer(content, budget):
+            calls.append(budget)
+            return "summary of the log"
+
+        truncations = PROMPT_TRUNCATIONS.labels("test_policies", "log")
+        before = truncations.value
+        builder = (PromptBuilder("test_policies")
+                   .add("instructions", "Fixed instructions " * 100)
+                   .add("log", text, budget=50, policy=SUMMARIZE, summarizer=summarizer)
+                   .add("note", "fits", budget=50, policy=KEEP_START))
+        prompt = builder.build()
+        self.assertEqual(calls, [50])
+        self.assertIn("summary of the log", prompt)
+        self.assertIn("Fixed instructions " * 100, prompt, "Fixed sections are never cut")
+        self.assertEqual(builder.truncated, ["log"])
+        self.assertEqual(truncations.value - before, 1)
+        self.assertEqual(builder.tokens, estimate_tokens(prompt))
+
+        with self.assertRaises(ValueError):
+            PromptBuilder("test_policies").add("log", text, policy=SUMMARIZE)
+        log_test_success("test_section_policies")
+
+    def test_tool_results_rerender_before_cutting(self):
+        log_test_step("Testing that tool results drop items before text is cut")
+        result = EventList(_events(40))
+        builder = PromptBuilder("test_rerender").add("tool_result", result, budget=60, policy=KEEP_START)
+        prompt = builder.build()
+        self.assertLessEqual(builder.tokens, 60)
+        self.assertTrue(prompt.startswith("Found events (40):"))
+        self.assertRegex(prompt, r"\.\.\. and \d+ more$", "Rendering fewer items keeps the summary line intact")
+        self.assertNotIn(TRUNCATION_MARKER, prompt)
+        log_test_success("test_tool_results_rerender_before_cutting")
+
+    def test_total_budget_shrinks_largest_sections(self):
+        log_test_step("Testing the overall prompt budget")
+        histogram = PROMPT_TOKENS.labels("test_total")
+        _, _, count_before = histogram.snapshot()
+        builder = (PromptBuilder("test_total", budget=300)
+                   .add("instructions", "x" * 400)
+                   .add("big", "b" * 2000, policy=KEEP_END)
+                   .add("small", "s" * 200, budget=100, policy=KEEP_START))
+        builder.build()
+        sections = builder.section_tokens()
+        self.assertEqual(sections["instructions"], 100)
+        self.assertEqual(sections["small"], 50, "Sections within budget are left alone when shrinking one is enough")
+        self.assertLess(sections["big"], 500)
+        self.assertLessEqual(builder.tokens, 300)
+        _, _, count_after = histogram.snapshot()
+        self.assertEqual(count_after - count_before, 1)
+        log_test_success("test_total_budget_shrinks_largest_sections")
+
+    def test_planner_prompts_include_query_and_fit(self):
+        log_test_step("Testing the planner loop prompts")
+        prompts = []
+
+        def planner(prompt):
+            prompts.append(prompt)
+            return '{"action": "END_TURN", "args": {}}'
+
+        with patch.object(backend_manager_v2, "backend_planner_llm", side_effect=planner):
+            backend_manager_v2.backend_manager_loop_v2("what's on my calendar in may?", Context(), speculate=False)
+        self.assertIn('User\'s request: "what\'s on my calendar in may?"', prompts[0])
+
+        context = Context()
+        context.update_with_action_result("calendar_scan", EventList(_events(500), limit=500))
+        builder = backend_manager_v2.follow_up_prompt("what's on my calendar in may?", context)
+        follow_up = builder.build()
+        self.assertIn("Found events (500):", follow_up)
+        self.assertIn('User\'s original goal: "what\'s on my calendar in may?"', follow_up)
+        self.assertIn("Respond STRICTLY in JSON", follow_up)
+        self.assertLessEqual(builder.section_tokens()["tool_result"], backend_manager_v2.TOOL_RESULT_BUDGET)
+        self.assertLessEqual(builder.tokens, builder.budget)
+
+        plan = backend_manager_v2.plan_prompt("find mail", failure_note="The last plan had a cycle.").build()
+        self.assertIn('User\'s request: "find mail"', plan)
+        self.assertIn("The last plan had a cycle.", plan)
+        log_test_success("test_planner_prompts_include_query_and_fit")
+
+    def test_llm_helpers_use_budgeted_prompts(self):
+        log_test_step("Testing summarize_text and the frontend prompt")
+        sent = []
+
+        def invoke(prompt):
+            sent.append(prompt)
+            return SimpleNamespace(content="ok")
+
+        emails = "\n---\n".join(f"From: someone@example.com\nSubject: hi {i}\n" for i in range(2000))
+        with patch.object(llm_backend, "llm") as llm:
+            llm.invoke.side_effect = invoke
+            self.assertEqual(llm_backend.summarize_text(emails), "ok")
+        final = sent.pop()
+        self.assertEqual(len(sent), llm_backend.MAX_SUMMARY_CHUNKS, "One call per chunk, then the merge")
+        self.assertTrue(all(estimate_tokens(prompt) <= PromptBuilder("summarize").budget for prompt in sent + [final]))
+        self.assertIn("Raw tool output:\nFrom: someone@example.com\nSubject: hi 0\n", sent[0])
+        self.assertNotIn("hi 0\n", final)
+        self.assertIn("Part 1 (", final)
+        self.assertRegex(final, r"\(\d+ emails omitted\)", "Emails left out are stated, not dropped silently")
+        self.assertIn("human-readable", final)
+
+        sent.clear()
+        with patch.object(llm_backend, "llm") as llm:
+            llm.invoke.side_effect = invoke
+            llm_backend.summarize_text("From: boss@example.com\nSubject: Update\n")
+        self.assertEqual(len(sent), 1, "A batch within budget is summarized in one call")
+        self.assertIn("Subject: Update", sent[0])
+
+        with patch.object(frontend_llm, "ChatOllama") as chat:
+            chat.return_value.invoke.side_effect = invoke
+            self.assertEqual(frontend_llm.frontend_llm_response("hello " * 5000), "ok")
+        self.assertIn("Respond naturally", sent[-1])
+        self.assertLess(estimate_tokens(sent[-1]), 400)
+        log_test_success("test_llm_helpers_use_budgeted_prompts")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Test module for the compiled chat/work query classifier.
+
+Verifies word-boundary matching, score-based tie breaking between social
+and work phrasing, and the misroute rate on the labelled routing set.
+"""
+
+import json
+import os
+import unittest
+
+from riley2.core.query_classifier import classify_query, score_query
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+LABELLED_QUERIES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'routing_queries.json')
+
+
+class TestQueryClassifier(unittest.TestCase):
+
+    def test_greetings_do_not_match_inside_words(self):
+        log_test_step("Testing that 'hi' does not match inside 'this' or 'which'")
+        self.assertEqual(score_query("Which of this week's slots are open?")["chat"], 0.0)
+        self.assertEqual(classify_query("Is this Thursday free for lunch?"), "work")
+        self.assertEqual(classify_query("hi"), "chat")
+        log_test_success("test_greetings_do_not_match_inside_words")
+
+    def test_work_signal_outweighs_greeting(self):
+        log_test_step("Testing that a greeting with a work request routes to work")
+        self.assertEqual(classify_query("Hi, what's on my calendar today?"), "work")
+        self.assertEqual(classify_query("Tell me about my emails"), "work")
+        self.assertEqual(classify_query("Tell me a joke"), "chat")
+        log_test_success("test_work_signal_outweighs_greeting")
+
+    def test_multi_word_phrases_tolerate_whitespace(self):
+        log_test_step("Testing multi-word phrase matching")
+        self.assertEqual(score_query("How   are\tyou?")["chat"], 2.0)
+        log_test_success("test_multi_word_phrases_tolerate_whitespace")
+
+    def test_labelled_set_misroute_rate(self):
+        log_test_step("Testing misroute rate on the labelled routing set")
+        with open(LABELLED_QUERIES, 'r', encoding='utf-8') as f:
+            samples = json.load(f)
+        misroutes = [s["query"] for s in samples if classify_query(s["query"]) != s["label"]]
+        self.assertLessEqual(len(misroutes) / len(samples), 0.05, f"Misrouted: {misroutes}")
+        log_test_success("test_labelled_set_misroute_rate")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Test module for recurring events.
+
+Verifies RRULE expansion for the supported subset, that a window lookup only
+walks the periods inside the window, and that the store and the Google sync
+keep series compact while scans see their occurrences, minus cancelled or
+moved instances.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from riley2.core import date_args
+from riley2.core.calendar_store import CalendarStore
+from riley2.core.calendar_sync import CalendarSync
+from riley2.core.logger_utils import log_test_step, log_test_success
+from riley2.core.recurrence import RecurrenceError, RecurrenceRule, parse_recurrence
+from tests.mocks.calendar_service_mock import FakeCalendarService
+
+
+def starts(lines, dtstart, lo, hi):
+    return [start.strftime("%Y-%m-%d %H:%M") for start in RecurrenceRule.parse(lines).occurrences(dtstart, lo, hi)]
+
+
+class TestRecurrenceRule(unittest.TestCase):
+
+    def test_rule_expansion(self):
+        log_test_step("Testing weekly, monthly, yearly, COUNT, UNTIL and EXDATE expansion")
+        monday = datetime(2025, 5, 5, 9, 0)
+        self.assertEqual(starts(["RRULE:FREQ=WEEKLY;BYDAY=MO,WE"], monday, datetime(2025, 5, 5), datetime(2025, 5, 15)),
+                         ["2025-05-05 09:00", "2025-05-07 09:00", "2025-05-12 09:00", "2025-05-14 09:00"])
+        self.assertEqual(starts(["RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT=3"], monday, datetime(2025, 1, 1), datetime(2026, 1, 1)),
+                         ["2025-05-05 09:00", "2025-05-19 09:00", "2025-06-02 09:00"])
+        self.assertEqual(starts(["RRULE:FREQ=DAILY;UNTIL=20250507T090000Z", "EXDATE:20250506T090000"],
+                                monday, datetime(2025, 1, 1), datetime(2026, 1, 1)),
+                         ["2025-05-05 09:00", "2025-05-07 09:00"])
+        self.assertEqual(starts(["RRULE:FREQ=MONTHLY;BYDAY=-1FR"], monday, datetime(2025, 6, 1), datetime(2025, 8, 1)),
+                         ["2025-06-27 09:00", "2025-07-25 09:00"])
+        self.assertEqual(starts(["RRULE:FREQ=MONTHLY"], datetime(2025, 1, 31), datetime(2025, 1, 1), datetime(2025, 6, 1)),
+                         ["2025-01-31 00:00", "2025-03-31 00:00", "2025-05-31 00:00"])
+        self.assertEqual(starts(["RRULE:FREQ=YEARLY"], datetime(2024, 2, 29), datetime(2025, 1, 1), datetime(2030, 1, 1)),
+                         ["2028-02-29 00:00"])
+        with self.assertRaises(RecurrenceError):
+            RecurrenceRule.parse(["RRULE:FREQ=HOURLY"])
+        self.assertIsNone(parse_recurrence(["RRULE:FREQ=WEEKLY;BYSETPOS=1"]))
+        log_test_success("test_rule_expansion")
+
+    def test_lookup_cost_is_independent_of_history(self):
+        log_test_step("Testing that a month window only walks that month's periods")
+        rule = RecurrenceRule.parse(["RRULE:FREQ=DAILY"])
+        with patch.object(RecurrenceRule, "_period_days", autospec=True,
+                          side_effect=RecurrenceRule._period_days) as period_days:
+            found = list(rule.occurrences(datetime(1990, 1, 1, 8, 0), datetime(2025, 5, 1), datetime(2025, 6, 1)))
+        self.assertEqual(len(found), 31)
+        self.assertLessEqual(period_days.call_count, 32, "35 years of history must not be walked")
+        log_test_success("test_lookup_cost_is_independent_of_history")
+
+
+class TestRecurringEventsInStore(unittest.TestCase):
+
+    def test_scan_expands_series_in_window(self):
+        log_test_step("Testing scans over a stored weekly series")
+        store = CalendarStore([
+            {"id": "standup", "title": "Weekly Team Standup", "date": "2025/05/05", "start_time": "09:00",
+             "end_time": "09:15", "recurrence": ["RRULE:FREQ=WEEKLY;BYDAY=MO"]},
+            {"id": "lunch", "title": "William Lunch", "date": "2025/05/19"},
+        ])
+        self.assertEqual(len(store), 2, "The series is stored once")
+        found = store.scan(datetime(2025, 5, 5), datetime(2025, 5, 27))
+        self.assertEqual([(e["title"], e["date"]) for e in found], [
+            ("Weekly Team Standup", "2025/05/05"), ("Weekly Team Standup", "2025/05/12"),
+            ("William Lunch", "2025/05/19"), ("Weekly Team Standup", "2025/05/19"),
+            ("Weekly Team Standup", "2025/05/26"),
+        ])
+        self.assertEqual(found[1]["recurring_event_id"], "standup")
+        self.assertNotIn("recurrence", found[1])
+
+        store.exclude_occurrence("standup", datetime(2025, 5, 12, 9, 0))
+        self.assertEqual([e["date"] for e in store.scan(datetime(2025, 5, 5), datetime(2025, 5, 27), "standup")],
+                         ["2025/05/05", "2025/05/19", "2025/05/26"])
+        self.assertEqual(store.scan(datetime(2031, 3, 3), datetime(2031, 3, 4), "stand")[0]["date"], "2031/03/03")
+        log_test_success("test_scan_expands_series_in_window")
+
+    def test_sync_keeps_instances_consistent(self):
+        log_test_step("Testing moved and cancelled instances from the Calendar API")
+        service = FakeCalendarService([{
+            "id": "gym", "summary": "Gym", "recurrence": ["RRULE:FREQ=DAILY;COUNT=5"],
+            "start": {"dateTime": "2025-05-05T18:00:00+02:00"}, "end": {"dateTime": "2025-05-05T19:00:00+02:00"},
+        }], time_zone="Europe/Paris")
+        clock = patch.object(date_args, "_clock_zone", date_args._clock_zone)
+        clock.start()
+        self.addCleanup(clock.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        state_path = os.path.join(tmp.name, "calendar_cache.json")
+        store = CalendarStore()
+        sync = CalendarSync(service, store, state_path=state_path)
+        sync.sync()
+        service.put({"id": "gym_20250506T160000Z", "status": "cancelled", "recurringEventId": "gym",
+                     "originalStartTime": {"dateTime": "2025-05-06T18:00:00+02:00"}})
+        service.put({"id": "gym_20250507T160000Z", "summary": "Gym", "recurringEventId": "gym",
+                     "originalStartTime": {"dateTime": "2025-05-07T18:00:00+02:00"},
+                     "start": {"dateTime": "2025-05-07T20:00:00+02:00"}, "end": {"dateTime": "2025-05-07T21:00:00+02:00"}})
+        sync.sync()
+
+        def gym_sessions(target):
+            return [(e["date"], e["start_time"]) for e in target.scan(datetime(2025, 5, 1), datetime(2025, 6, 1), "gym")]
+
+        expected = [("2025/05/05", "18:00"), ("2025/05/07", "20:00"), ("2025/05/08", "18:00"), ("2025/05/09", "18:00")]
+        self.assertEqual(gym_sessions(store), expected)
+
+        service.expire_tokens()
+        sync.sync()
+        self.assertEqual(gym_sessions(store), expected, "A full resync rebuilds the same view")
+        restarted = CalendarStore()
+        CalendarSync(service, restarted, state_path=state_path)
+        self.assertEqual(gym_sessions(restarted), expected, "Exclusions survive a restart")
+        log_test_success("test_sync_keeps_instances_consistent")
+
+
+if __name__ == "__main__":
+    unittest.main()
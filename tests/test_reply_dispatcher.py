@@ -0,0 +1,104 @@
+"""
+Test module for the acknowledge-then-reply dispatcher.
+
+Verifies that submitting returns before the reply is computed, that replies
+are delivered through the pluggable sender to the original number, that the
+queue depth gauge drains back to zero, that a full queue refuses new work,
+and that handler failures still produce an apology instead of silence.
+"""
+
+import threading
+import unittest
+
+from riley2.core.reply_dispatcher import (FAILURE_REPLY, REPLY_QUEUE_DEPTH, AsyncReplyDispatcher, DispatcherBusy,
+                                         FakeSender, InboundMessage, make_sender)
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestAsyncReplyDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.sender = FakeSender()
+
+    def test_submit_returns_before_reply(self):
+        log_test_step("Testing that submit does not wait for the pipeline")
+        release = threading.Event()
+
+        def slow_handler(message):
+            release.wait(5)
+            return f"reply to {message.body}"
+
+        dispatcher = AsyncReplyDispatcher(slow_handler, self.sender, workers=2)
+        dispatcher.submit(InboundMessage("SM1", "+15550001", "+15559999", "any meetings today?"))
+        self.assertEqual(self.sender.sent, [])
+
+        release.set()
+        self.assertTrue(self.sender.wait_for(1))
+        self.assertEqual(self.sender.sent[0], {"to": "+15550001", "from": "+15559999",
+                                               "body": "reply to any meetings today?"})
+        dispatcher.shutdown()
+        log_test_success("test_submit_returns_before_reply")
+
+    def test_messages_are_processed_concurrently(self):
+        log_test_step("Testing that the worker pool replies to several senders in parallel")
+        barrier = threading.Barrier(3, timeout=5)
+
+        def handler(message):
+            barrier.wait()
+            return message.body.upper()
+
+        dispatcher = AsyncReplyDispatcher(handler, self.sender, workers=3)
+        for i in range(3):
+            dispatcher.submit(InboundMessage(f"SM{i}", f"+1555000{i}", "+15559999", f"hello {i}"))
+        dispatcher.join()
+        self.assertEqual(sorted(m["body"] for m in self.sender.sent), ["HELLO 0", "HELLO 1", "HELLO 2"])
+        self.assertEqual(REPLY_QUEUE_DEPTH.labels().value, 0)
+        dispatcher.shutdown()
+        log_test_success("test_messages_are_processed_concurrently")
+
+    def test_full_queue_refuses_work(self):
+        log_test_step("Testing that a full reply queue sheds instead of growing")
+        started, release = threading.Event(), threading.Event()
+
+        def slow_handler(message):
+            started.set()
+            release.wait(5)
+            return "done"
+
+        dispatcher = AsyncReplyDispatcher(slow_handler, self.sender, workers=1, queue_size=2)
+        dispatcher.submit(InboundMessage("SM0", "+15550001", "+15559999", "first"))
+        self.assertTrue(started.wait(5))
+        dispatcher.submit(InboundMessage("SM1", "+15550001", "+15559999", "queued"))
+        dispatcher.submit(InboundMessage("SM2", "+15550001", "+15559999", "queued"))
+        with self.assertRaises(DispatcherBusy):
+            dispatcher.submit(InboundMessage("SM3", "+15550001", "+15559999", "one too many"))
+
+        release.set()
+        dispatcher.join()
+        self.assertEqual(len(self.sender.sent), 3)
+        dispatcher.shutdown()
+        log_test_success("test_full_queue_refuses_work")
+
+    def test_handler_failure_sends_apology(self):
+        log_test_step("Testing that a failing pipeline still answers the user")
+
+        def broken(message):
+            raise RuntimeError("ollama is down")
+
+        dispatcher = AsyncReplyDispatcher(broken, self.sender, workers=1)
+        dispatcher.submit(InboundMessage("SM1", "+15550001", "+15559999", "summarize my inbox"))
+        dispatcher.join()
+        self.assertEqual(self.sender.sent[0]["body"], FAILURE_REPLY)
+        dispatcher.shutdown()
+        log_test_success("test_handler_failure_sends_apology")
+
+    def test_make_sender(self):
+        log_test_step("Testing sender selection")
+        self.assertIsInstance(make_sender("fake"), FakeSender)
+        with self.assertRaises(ValueError):
+            make_sender("carrier-pigeon")
+        log_test_success("test_make_sender")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Test module for the calendar ReservationManager.
+
+Verifies overlap detection through the per-day interval index, release and
+expiry of holds, that a single expiry thread serves any number of holds, and
+that concurrent agents racing for the same slot get exactly one winner.
+"""
+
+import threading
+import time
+import unittest
+
+from riley2.agents.calendar_agent import ReservationManager
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+def slot(date, start, end):
+    return {"date": date, "start_time": start, "end_time": end}
+
+
+class TestReservationManager(unittest.TestCase):
+
+    def test_overlap_detection(self):
+        log_test_step("Testing overlapping, adjacent and other-day holds")
+        manager = ReservationManager()
+        first = manager.acquire_lock("agent1", slot("2025/05/26", "14:00", "15:00"))
+        self.assertTrue(first["success"])
+
+        clash = manager.acquire_lock("agent2", slot("2025/05/26", "14:30", "15:30"))
+        self.assertEqual(clash, {"success": False, "reason": "slot_locked", "locking_agent": "agent1"})
+        inside = manager.acquire_lock("agent2", slot("2025/05/26", "14:15", "14:45"))
+        self.assertFalse(inside["success"])
+
+        self.assertTrue(manager.acquire_lock("agent2", slot("2025/05/26", "15:00", "16:00"))["success"])
+        self.assertTrue(manager.acquire_lock("agent2", slot("2025/05/26", "13:00", "14:00"))["success"])
+        self.assertTrue(manager.acquire_lock("agent3", slot("2025/05/27", "14:00", "15:00"))["success"])
+        self.assertEqual(len(manager), 4)
+
+        self.assertEqual(manager.release_lock(first["lock_id"]), {"success": True})
+        self.assertEqual(manager.release_lock(first["lock_id"]), {"success": False, "reason": "invalid_lock_id"})
+        self.assertFalse(manager.is_locked(slot("2025/05/26", "14:10", "14:50")))
+        self.assertTrue(manager.acquire_lock("agent2", slot("2025/05/26", "14:30", "15:00"))["success"])
+        log_test_success("test_overlap_detection")
+
+    def test_holds_expire_on_one_thread(self):
+        log_test_step("Testing that many holds expire without a thread per hold")
+        manager = ReservationManager(default_timeout=0.3)
+        threads_before = threading.active_count()
+        for i in range(1000):
+            day = f"2025/06/{i // 40 + 1:02d}"
+            minute = i % 40
+            result = manager.acquire_lock(f"agent{i}", slot(day, f"09:{minute:02d}", f"09:{minute + 1:02d}"))
+            self.assertTrue(result["success"])
+        self.assertLessEqual(threading.active_count(), threads_before + 1)
+        kept = manager.acquire_lock("keeper", slot("2025/07/01", "09:00", "10:00"), timeout=0)
+        self.assertIsNone(kept["expires_at"])
+
+        deadline = time.monotonic() + 5
+        while len(manager) > 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(len(manager), 1, "Only the hold without a timeout remains")
+        self.assertTrue(manager.is_locked(slot("2025/07/01", "09:30", "09:45")))
+        log_test_success("test_holds_expire_on_one_thread")
+
+    def test_released_hold_is_not_expired_again(self):
+        log_test_step("Testing that a released and re-acquired slot keeps its new hold")
+        manager = ReservationManager(default_timeout=0.2)
+        target = slot("2025/05/28", "15:00", "16:00")
+        first = manager.acquire_lock("agent1", target)
+        manager.release_lock(first["lock_id"])
+        second = manager.acquire_lock("agent2", target, timeout=5)
+        time.sleep(0.4)
+        self.assertTrue(manager.is_locked(target))
+        self.assertTrue(manager.release_lock(second["lock_id"])["success"])
+        log_test_success("test_released_hold_is_not_expired_again")
+
+    def test_concurrent_acquire_has_one_winner(self):
+        log_test_step("Testing that agents racing for a slot get exactly one hold")
+        manager = ReservationManager()
+        target = slot("2025/05/27", "09:00", "10:00")
+        barrier = threading.Barrier(8)
+        results = []
+
+        def race(agent_id):
+            barrier.wait()
+            results.append(manager.acquire_lock(agent_id, dict(target)))
+
+        threads = [threading.Thread(target=race, args=(f"agent{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(result["success"] for result in results), 1)
+        log_test_success("test_concurrent_acquire_has_one_winner")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Test module for the fair request scheduler in front of route_user_query.
+
+Verifies per-sender token buckets, that short chat messages are served
+before queued work, that queued work alternates between senders instead of
+following arrival order, and that queue wait is recorded per sender class.
+"""
+
+import threading
+import time
+import unittest
+
+from riley2.core.scheduler import QUEUE_WAIT_SECONDS, FairScheduler, RateLimited, sender_class
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+WORK = "check my calendar for meetings next week"
+CHAT = "hi there"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFairScheduler(unittest.TestCase):
+
+    def test_sender_classes(self):
+        log_test_step("Testing sender classification")
+        self.assertEqual(sender_class(CHAT), "short_chat")
+        self.assertEqual(sender_class(WORK), "work")
+        log_test_success("test_sender_classes")
+
+    def test_token_bucket_limits_each_sender(self):
+        log_test_step("Testing that one sender cannot exceed their bucket")
+        clock = FakeClock()
+        scheduler = FairScheduler(concurrency=4, rate_per_minute=6, burst=2, clock=clock)
+        for _ in range(2):
+            self.assertEqual(scheduler.run("+1555A", WORK, lambda: "ok"), "ok")
+        with self.assertRaises(RateLimited):
+            scheduler.run("+1555A", WORK, lambda: "ok")
+        self.assertEqual(scheduler.run("+1555B", WORK, lambda: "ok"), "ok", "Other senders are unaffected")
+
+        clock.now += 10  # 6/minute refills one token every 10 seconds
+        self.assertEqual(scheduler.run("+1555A", WORK, lambda: "ok"), "ok")
+        log_test_success("test_token_bucket_limits_each_sender")
+
+    def test_fair_order_with_chat_priority(self):
+        log_test_step("Testing weighted fair queueing and short-chat priority")
+        scheduler = FairScheduler(concurrency=1, rate_per_minute=600, burst=10)
+        release = threading.Event()
+        order = []
+        threads = []
+
+        def submit(sender, query, label):
+            def compute():
+                if label == "blocker":
+                    release.wait(5)
+                order.append(label)
+            thread = threading.Thread(target=scheduler.run, args=(sender, query, compute))
+            expected = scheduler.queued + (0 if label == "blocker" else 1)
+            thread.start()
+            threads.append(thread)
+            deadline = time.monotonic() + 5
+            while scheduler.queued != expected and time.monotonic() < deadline:
+                time.sleep(0.005)
+
+        submit("+1555Z", WORK, "blocker")
+        for i in range(3):
+            submit("+1555A", WORK, f"A{i}")
+        submit("+1555B", WORK, "B0")
+        submit("+1555C", CHAT, "C0")
+        chat_waits_before = QUEUE_WAIT_SECONDS.labels("short_chat").snapshot()[2]
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, ["blocker", "C0", "A0", "B0", "A1", "A2"])
+        self.assertEqual(QUEUE_WAIT_SECONDS.labels("short_chat").snapshot()[2], chat_waits_before + 1)
+        log_test_success("test_fair_order_with_chat_priority")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Test module for the pooled WSGI server behind the webhook.
+
+Verifies that requests are served concurrently by the worker pool, that a
+full request queue sheds new connections with 503 instead of queueing them,
+and that draining finishes requests that were already accepted.
+"""
+
+import http.client
+import threading
+import time
+import unittest
+
+from riley2.core.serving import PooledWSGIServer
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestPooledWSGIServer(unittest.TestCase):
+
+    def start(self, app, workers, queue_size):
+        server = PooledWSGIServer(("127.0.0.1", 0), app, workers=workers, queue_size=queue_size)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+    def stop(self, server):
+        server.shutdown()
+        server.drain(timeout=5)
+
+    def get(self, server, results):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        try:
+            connection.request("GET", "/")
+            response = connection.getresponse()
+            results.append((response.status, response.read()))
+        except OSError as e:
+            results.append(("error", str(e)))
+        finally:
+            connection.close()
+
+    def test_workers_serve_concurrently(self):
+        log_test_step("Testing that the worker pool handles requests in parallel")
+        barrier = threading.Barrier(3, timeout=5)
+
+        def app(environ, start_response):
+            barrier.wait()
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [b"ok"]
+
+        server = self.start(app, workers=3, queue_size=3)
+        results = []
+        clients = [threading.Thread(target=self.get, args=(server, results)) for _ in range(3)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join(5)
+        self.stop(server)
+        self.assertEqual(results, [(200, b"ok")] * 3)
+        log_test_success("test_workers_serve_concurrently")
+
+    def test_full_queue_sheds_and_drain_finishes_accepted(self):
+        log_test_step("Testing load shedding and graceful drain")
+        release = threading.Event()
+
+        def app(environ, start_response):
+            release.wait(5)
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [b"done"]
+
+        server = self.start(app, workers=1, queue_size=1)
+        results = []
+        accepted = [threading.Thread(target=self.get, args=(server, results)) for _ in range(2)]
+        for client in accepted:
+            client.start()
+            time.sleep(0.1)
+
+        shed = []
+        self.get(server, shed)
+        self.assertEqual(shed[0][0], 503)
+
+        release.set()
+        self.stop(server)
+        for client in accepted:
+            client.join(5)
+        self.assertEqual(results, [(200, b"done")] * 2)
+        log_test_success("test_full_queue_sheds_and_drain_finishes_accepted")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Test module for bounded per-session conversational memory.
+
+Verifies that the sliding window stays under its token budget, that evicted
+turns are folded into a capped rolling summary, that concurrent turns on one
+session stay consistent, that idle and least recently used sessions are
+evicted, and that route_user_query keys memory by the caller's session.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.core.session_memory import SessionMemory, SessionMemoryStore
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestSessionMemory(unittest.TestCase):
+
+    def test_window_stays_within_budget(self):
+        log_test_step("Testing that prompt size stays flat over a long conversation")
+        memory = SessionMemory(token_budget=100, summary_budget=40)
+        sizes = []
+        for i in range(500):
+            memory.save_turn(f"Question number {i} about my calendar and inbox", "calendar_range")
+            sizes.append(memory.prompt_tokens())
+        self.assertLessEqual(max(sizes), 100 + 40)
+        self.assertEqual(max(sizes[100:]), max(sizes[400:]), "Prompt size should plateau")
+        log_test_success("test_window_stays_within_budget")
+
+    def test_evicted_turns_are_summarized(self):
+        log_test_step("Testing that evicted turns fold into the rolling summary")
+        memory = SessionMemory(token_budget=20)
+        memory.save_turn("When am I going to Italy?", "calendar_search")
+        memory.save_turn("And what about the dentist appointment next week?", "calendar_search")
+        summary, messages = memory.history()
+        self.assertIn("Italy", summary)
+        self.assertEqual(messages[-1], ("ai", "calendar_search"))
+        log_test_success("test_evicted_turns_are_summarized")
+
+    def test_custom_summarizer(self):
+        log_test_step("Testing a pluggable summarizer")
+        memory = SessionMemory(token_budget=5, summarizer=lambda summary, evicted: f"{len(evicted)} turns")
+        memory.save_turn("a" * 40, "b" * 40)
+        self.assertEqual(memory.summary, "1 turns")
+        log_test_success("test_custom_summarizer")
+
+    def test_concurrent_turns_stay_paired(self):
+        log_test_step("Testing that concurrent save_turn calls never interleave")
+        memory = SessionMemory(token_budget=100000)
+
+        def converse(worker):
+            for i in range(200):
+                memory.save_turn(f"q{worker}-{i}", f"a{worker}-{i}")
+
+        threads = [threading.Thread(target=converse, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        _, messages = memory.history()
+        self.assertEqual(len(messages), 1600)
+        for (role_q, question), (role_a, answer) in zip(messages[::2], messages[1::2]):
+            self.assertEqual((role_q, role_a), ("human", "ai"))
+            self.assertEqual(question[1:], answer[1:])
+        self.assertEqual(memory.window_tokens, sum((len(t) + 3) // 4 for _, t in messages))
+        log_test_success("test_concurrent_turns_stay_paired")
+
+
+class TestSessionMemoryStore(unittest.TestCase):
+
+    def test_sessions_are_isolated(self):
+        log_test_step("Testing that sessions do not share history")
+        store = SessionMemoryStore()
+        store.get("+15550001").save_turn("check my inbox", "email_inbox")
+        self.assertEqual(store.get("+15550002").history(), ("", []))
+        log_test_success("test_sessions_are_isolated")
+
+    def test_lru_eviction(self):
+        log_test_step("Testing least recently used eviction")
+        store = SessionMemoryStore(max_sessions=2)
+        store.get("a")
+        store.get("b")
+        store.get("a")
+        store.get("c")
+        self.assertIn("a", store)
+        self.assertNotIn("b", store)
+        self.assertEqual(len(store), 2)
+        log_test_success("test_lru_eviction")
+
+    def test_idle_eviction(self):
+        log_test_step("Testing idle session eviction")
+        store = SessionMemoryStore(idle_seconds=0.05)
+        store.get("old")
+        time.sleep(0.1)
+        store.get("new")
+        self.assertNotIn("old", store)
+        self.assertIn("new", store)
+        log_test_success("test_idle_eviction")
+
+
+    def test_route_user_query_uses_caller_session(self):
+        log_test_step("Testing that the caller's session id reaches the router")
+        from riley2.core import router_chain
+        from riley2.core.event_log import event_log
+
+        with patch.object(event_log, "enabled", False), \
+                patch.object(router_chain, "route_tool", return_value="fallback") as route_tool, \
+                patch.object(router_chain, "backend_manager_loop_v2", return_value="done"):
+            router_chain.route_user_query("check my inbox", session_id="+15550001")
+        route_tool.assert_called_once_with("check my inbox", session_id="+15550001", use_llm=False)
+        log_test_success("test_route_user_query_uses_caller_session")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Test module for speculative tool prefetching.
+
+Verifies that speculative results are handed over on an exact (tool, args)
+match, that mismatches fall through to a normal call, and that hit rate and
+wasted work are tracked, and that prefetches run in the caller's trace. Also checks that the planner is shown the prefetched
+calls so it can match them, and that speculation is off by default.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.core.speculation import SpeculativeExecutor, SpeculationStats
+from riley2.core.event_log import current_trace_id, trace
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestSpeculativeExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = SpeculationStats()
+        self.calls = []
+
+    def perform_action(self, tool_name, args):
+        self.calls.append(tool_name)
+        return f"{tool_name} result"
+
+    def test_claim_hit_reuses_result(self):
+        log_test_step("Testing that a matching speculation is reused")
+        args = {"start_date": "2025/05/01", "end_date": "2025/05/08"}
+        with SpeculativeExecutor(self.perform_action, stats=self.stats) as speculator:
+            speculator.start([("email_download_chunk", args)])
+            result = speculator.claim("email_download_chunk", dict(reversed(list(args.items()))))
+        self.assertEqual(result, "email_download_chunk result")
+        self.assertEqual(self.calls, ["email_download_chunk"], "The tool should only run once")
+        self.assertEqual(self.stats.snapshot()["hits"], 1)
+        self.assertEqual(self.stats.hit_rate, 1.0)
+        log_test_success("test_claim_hit_reuses_result")
+
+    def test_claim_miss_on_different_args(self):
+        log_test_step("Testing that different args are a miss")
+        with SpeculativeExecutor(self.perform_action, stats=self.stats) as speculator:
+            speculator.start([("calendar_scan", {"start_date": "2025/05/01", "end_date": "2025/05/31"})])
+            result = speculator.claim("calendar_scan", {"start_date": "2025/06/01", "end_date": "2025/06/30"})
+        self.assertIsNone(result)
+        self.assertEqual(self.stats.misses, 1)
+        self.assertEqual(self.stats.hits, 0)
+        log_test_success("test_claim_miss_on_different_args")
+
+    def test_non_read_only_tools_are_not_speculated(self):
+        log_test_step("Testing that only read-only tools are started speculatively")
+        with SpeculativeExecutor(self.perform_action, stats=self.stats) as speculator:
+            speculator.start([("email_summarize_batch", {"raw_emails": "x"})])
+        self.assertEqual(self.stats.launched, 0)
+        self.assertEqual(self.calls, [])
+        log_test_success("test_non_read_only_tools_are_not_speculated")
+
+    def test_abandoned_running_call_counts_as_wasted(self):
+        log_test_step("Testing that abandoned in-flight speculation is recorded as wasted work")
+        finished = threading.Event()
+
+        def slow_action(tool_name, args):
+            time.sleep(0.1)
+            finished.set()
+            return "late"
+
+        speculator = SpeculativeExecutor(slow_action, max_workers=1, stats=self.stats)
+        speculator.start([("get_current_time", {}), ("meta_query", {"query": "what can you do"})])
+        time.sleep(0.02)
+        speculator.abandon()
+        self.assertTrue(finished.wait(1))
+        time.sleep(0.05)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot["launched"], 2)
+        self.assertEqual(snapshot["wasted"], 1, "The running call cannot be cancelled")
+        self.assertEqual(snapshot["cancelled"], 1, "The queued call should be cancelled")
+        self.assertGreater(snapshot["wasted_seconds"], 0)
+        log_test_success("test_abandoned_running_call_counts_as_wasted")
+
+    def test_speculation_runs_in_the_callers_trace(self):
+        log_test_step("Testing that speculative calls inherit the request's trace_id")
+
+        def perform_action(tool_name, args):
+            return current_trace_id()
+
+        with trace("req-7"), SpeculativeExecutor(perform_action, stats=self.stats) as speculator:
+            speculator.start([("get_current_time", {})])
+            self.assertEqual(speculator.claim("get_current_time", {}), "req-7")
+        log_test_success("test_speculation_runs_in_the_callers_trace")
+
+
+class TestPlannerSeesPrefetch(unittest.TestCase):
+
+    def run_loop(self, **kwargs):
+        from riley2.agents import backend_manager_v2
+        from riley2.core.event_log import event_log
+        from riley2.core.router_chain import Context
+
+        prompts, calls = [], []
+        with patch.object(event_log, "enabled", False), \
+                patch.object(backend_manager_v2, "backend_planner_llm",
+                             side_effect=lambda prompt: prompts.append(prompt) or '{"action": "END_TURN"}'), \
+                patch.object(backend_manager_v2, "perform_action",
+                             side_effect=lambda tool, args: calls.append(tool) or "No emails found."):
+            backend_manager_v2.backend_manager_loop_v2("any emails this week?", Context(), **kwargs)
+        return prompts[0], calls
+
+    def test_prompt_lists_prefetched_args(self):
+        log_test_step("Testing that the planner prompt carries the speculated calls and today's date")
+        prompt, _ = self.run_loop(speculate=True)
+        self.assertIn("already running", prompt)
+        self.assertIn('email_download_chunk {"start_date"', prompt)
+        self.assertIn("Today's date is", prompt)
+        log_test_success("test_prompt_lists_prefetched_args")
+
+    def test_speculation_is_off_by_default(self):
+        log_test_step("Testing that no speculative calls run unless enabled")
+        prompt, calls = self.run_loop()
+        self.assertEqual(calls, [])
+        self.assertNotIn("already running", prompt)
+        log_test_success("test_speculation_is_off_by_default")
+
+
+if __name__ == "__main__":
+    unittest.main()
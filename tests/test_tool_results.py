@@ -0,0 +1,96 @@
+"""
+Test module for structured tool results.
+
+Verifies that calendar tools return typed results that still behave as text,
+that prompts get a compact rendering smaller than the old Python repr, and
+that errors, empty results and truncation are read from fields rather than
+parsed out of strings.
+"""
+
+import copy
+import pickle
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+from riley2.agents.calendar_agent import calendar_scan
+from riley2.agents.end_turn_agent import EndTurnAgent, EndTurnStats
+from riley2.core.event_log import event_log
+from riley2.core.logger_utils import log_test_step, log_test_success
+from riley2.core.router_chain import Context
+from riley2.core.tool_executor import execute_tool
+from riley2.core.tool_results import EventList, ToolError, is_error_result, prompt_text
+
+
+class TestToolResults(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(event_log, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_calendar_scan_returns_event_list(self):
+        log_test_step("Testing the typed calendar_scan result")
+        result = calendar_scan("2025/05/01", "2025/05/31", "italy")
+        self.assertIsInstance(result, EventList)
+        self.assertIsInstance(result, str)
+        self.assertEqual((result.total, result.truncated), (1, False))
+        self.assertEqual(result.events[0]["title"], "Italy Trip")
+        self.assertEqual(str(result), "Found events (1):\n- 2025/05/12 Italy Trip")
+
+        empty = calendar_scan("2025/01/01", "2025/01/31", "italy")
+        self.assertTrue(empty.is_empty)
+        self.assertIn("No matching events found", empty)
+        log_test_success("test_calendar_scan_returns_event_list")
+
+    def test_prompt_rendering_is_compact(self):
+        log_test_step("Testing prompt rendering and truncation")
+        events = [{"title": f"Standup {i}", "date": "2025/05/20", "start_time": "09:00", "end_time": "09:15",
+                   "id": f"evt-{i}", "is_all_day": False} for i in range(80)]
+        result = EventList(events, limit=50)
+        self.assertEqual((result.total, len(result.events), result.truncated), (80, 50, True))
+        self.assertIn("... and 30 more", result)
+
+        rendered = prompt_text(result, limit=5)
+        self.assertEqual(rendered.count("\n- "), 5)
+        self.assertIn("... and 75 more", rendered)
+        self.assertLess(len(str(result)), len(f"Found events: {events[:50]}") / 2,
+                        "The rendering must be much smaller than the old repr")
+        self.assertEqual(prompt_text("plain text"), "plain text")
+        log_test_success("test_prompt_rendering_is_compact")
+
+    def test_results_survive_copy_and_pickle(self):
+        log_test_step("Testing that typed results copy and pickle with their fields")
+        result = calendar_scan("2025/04/01", "2025/05/31")
+        for clone in (copy.deepcopy(result), pickle.loads(pickle.dumps(result))):
+            self.assertEqual(clone, result)
+            self.assertEqual(clone.total, 3)
+            self.assertEqual(clone.events, result.events)
+        log_test_success("test_results_survive_copy_and_pickle")
+
+    def test_downstream_reads_fields(self):
+        log_test_step("Testing that errors and empty results are read from the result type")
+        error = execute_tool("no_such_tool", {})
+        self.assertIsInstance(error, ToolError)
+        self.assertTrue(is_error_result(error))
+        self.assertTrue(is_error_result("Error: legacy text"))
+        self.assertFalse(is_error_result(EventList([{"title": "Error budget review", "date": "2025/05/02"}])))
+
+        stats = EndTurnStats()
+        agent = EndTurnAgent(stats=stats)
+        context = Context()
+        context.update_with_action_result("calendar_scan", calendar_scan("2025/01/01", "2025/01/02", "dentist"))
+        decision, reason = agent.evaluate("when is my dentist appointment?", context)
+        self.assertIsNone(decision, "An empty scan is left to the LLM to retry broader")
+        self.assertIn("found nothing", reason)
+
+        free = execute_tool("calendar_free_slots", {"start_date": "2025/01/01", "end_date": "2025/01/02"})
+        context.update_with_action_result("calendar_free_slots", free)
+        self.assertEqual(context.actions_log(), "[calendar_scan] No matching events found.\n"
+                                                "[calendar_free_slots] " + free.render(15))
+        self.assertEqual(free.min_length, timedelta(minutes=60))
+        log_test_success("test_downstream_reads_fields")
+
+
+if __name__ == "__main__":
+    unittest.main()
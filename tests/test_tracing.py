@@ -0,0 +1,137 @@
+"""
+Test module for the in-process span tracer.
+
+Verifies that spans nest through the context (including across plan worker
+threads), that a disabled tracer records nothing, that spans export in Chrome
+trace format, that the flame summary aggregates repeated calls under their
+parent, and that a full buffer keeps the most recent spans.
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from riley2.core import tracing
+from riley2.core.tracing import NOOP_SPAN, Tracer
+from riley2.core.plan_executor import execute_plan, parse_plan
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_disabled_tracer_records_nothing(self):
+        log_test_step("Testing that a disabled tracer hands out the shared no-op span")
+        tracer = Tracer(enabled=False)
+        self.assertIs(tracer.span("planner"), NOOP_SPAN)
+
+        @tracer.traced("classify_query")
+        def classify(query):
+            return "work"
+
+        with tracer.span("route_user_query") as root:
+            root.set(classification=classify("any emails?"))
+        self.assertEqual(list(tracer.spans), [])
+        log_test_success("test_disabled_tracer_records_nothing")
+
+    def test_spans_nest_and_record_errors(self):
+        log_test_step("Testing span nesting and error tagging")
+        tracer = Tracer(enabled=True)
+        with tracer.span("route_user_query"):
+            with tracer.span("execute_tool", tool="calendar_scan"):
+                pass
+            with self.assertRaises(ValueError):
+                with tracer.span("planner"):
+                    raise ValueError("bad json")
+
+        tool, planner, root = tracer.spans
+        self.assertIs(tool.parent, root)
+        self.assertEqual(tool.path(), ("route_user_query", "execute_tool"))
+        self.assertEqual(tool.attrs, {"tool": "calendar_scan"})
+        self.assertEqual(planner.attrs["error"], "ValueError")
+        self.assertIsNone(root.parent)
+        log_test_success("test_spans_nest_and_record_errors")
+
+    def test_plan_steps_nest_under_the_calling_span(self):
+        log_test_step("Testing that spans opened in plan worker threads keep their parent")
+        tracer = Tracer(enabled=True)
+
+        def perform_action(tool, args):
+            with tracer.span("execute_tool", tool=tool):
+                return "ok"
+
+        with tracer.span("planner"):
+            execute_plan(parse_plan('[{"tool": "a"}, {"tool": "b"}]'), perform_action)
+
+        tool_spans = [s for s in tracer.spans if s.name == "execute_tool"]
+        self.assertEqual([s.path() for s in tool_spans], [("planner", "execute_tool")] * 2)
+        log_test_success("test_plan_steps_nest_under_the_calling_span")
+
+    def test_chrome_trace_export(self):
+        log_test_step("Testing export to Chrome trace event format")
+        tracer = Tracer(enabled=True)
+        with tracer.span("route_user_query"):
+            with tracer.span("gmail.list"):
+                time.sleep(0.001)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = tracer.export(os.path.join(tmp, "trace.json"))
+            with open(path, encoding="utf-8") as f:
+                exported = json.load(f)
+
+        events = exported["traceEvents"]
+        self.assertEqual([e["name"] for e in events], ["gmail.list", "route_user_query"])
+        self.assertTrue(all(e["ph"] == "X" for e in events))
+        gmail, root = events
+        self.assertGreaterEqual(gmail["ts"], root["ts"])
+        self.assertLessEqual(gmail["ts"] + gmail["dur"], root["ts"] + root["dur"])
+        self.assertGreaterEqual(gmail["dur"], 1000)
+        log_test_success("test_chrome_trace_export")
+
+    def test_flame_summary_aggregates_paths(self):
+        log_test_step("Testing the text flame summary")
+        tracer = Tracer(enabled=True)
+        with tracer.span("route_user_query"):
+            for _ in range(3):
+                with tracer.span("execute_tool"):
+                    pass
+            with tracer.span("planner"):
+                time.sleep(0.005)
+
+        lines = tracer.flame_summary().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("route_user_query"))
+        self.assertIn("100.0%", lines[0])
+        self.assertTrue(lines[1].startswith("  planner"))
+        self.assertTrue(lines[2].startswith("  execute_tool"))
+        self.assertIn("x3", lines[2])
+        self.assertEqual(Tracer(enabled=True).flame_summary(), "No spans recorded.")
+        log_test_success("test_flame_summary_aggregates_paths")
+
+    def test_reset_returns_spans(self):
+        log_test_step("Testing that reset hands back and clears recorded spans")
+        tracer = Tracer(enabled=True)
+        with tracer.span("classify_query"):
+            pass
+        spans = tracer.reset()
+        self.assertEqual([s.name for s in spans], ["classify_query"])
+        self.assertEqual(list(tracer.spans), [])
+        log_test_success("test_reset_returns_spans")
+
+    def test_full_buffer_keeps_recent_spans(self):
+        log_test_step("Testing that a tracer that is never reset keeps the newest spans")
+        tracer = Tracer(enabled=True, max_spans=3)
+        with patch.object(tracing, "logger") as logger:
+            for i in range(5):
+                with tracer.span(f"request {i}"):
+                    pass
+        self.assertEqual([s.name for s in tracer.spans], ["request 2", "request 3", "request 4"])
+        self.assertEqual(tracer.dropped, 2)
+        logger.warning.assert_called_once()
+        log_test_success("test_full_buffer_keeps_recent_spans")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Test module for the Twilio webhook.
+
+Uses the Flask test client to verify that /twilio routes the message body
+through route_user_query with the sender as the session, answers with TwiML,
+records request metrics that /metrics then exposes, that retries with the
+same MessageSid do not re-run the pipeline, that async mode acks with
+empty TwiML and replies out-of-band, and that a full reply queue gets a busy
+reply.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from twilio_sandbox import twilio_webhook
+from riley2.core.reply_dispatcher import AsyncReplyDispatcher, DispatcherBusy, FakeSender
+from riley2.core.logger_utils import log_test_step, log_test_success
+
+
+class TestTwilioWebhook(unittest.TestCase):
+
+    def setUp(self):
+        self.client = twilio_webhook.app.test_client()
+
+    def test_reply_is_routed_per_sender(self):
+        log_test_step("Testing that /twilio answers with TwiML from route_user_query")
+        with patch.object(twilio_webhook, "route_user_query", return_value="You have 2 meetings") as route:
+            response = self.client.post("/twilio", data={"From": "+15550001", "Body": "meetings today?"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/xml")
+        self.assertIn("<Message>You have 2 meetings</Message>", response.get_data(as_text=True))
+        route.assert_called_once_with("meetings today?", session_id="+15550001")
+        log_test_success("test_reply_is_routed_per_sender")
+
+    def test_metrics_expose_twilio_requests(self):
+        log_test_step("Testing that /metrics reports the instrumented /twilio route")
+        ok_before = twilio_webhook.REQUESTS.labels("/twilio", "ok").value
+        with patch.object(twilio_webhook, "route_user_query", return_value="ok"):
+            self.client.post("/twilio", data={"From": "+15550002", "Body": "hi"})
+
+        response = self.client.get("/metrics")
+        text = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        self.assertIn(f'riley2_requests_total{{route="/twilio",status="ok"}} {ok_before + 1}', text)
+        self.assertIn('riley2_request_seconds_count{route="/twilio"}', text)
+        self.assertIn('riley2_log_records_dropped_total{logger="riley2"}', text)
+        log_test_success("test_metrics_expose_twilio_requests")
+
+    def test_retried_delivery_is_not_recomputed(self):
+        log_test_step("Testing that a Twilio retry with the same MessageSid reuses the reply")
+        data = {"From": "+15550004", "MessageSid": "SMretry", "Body": "what's on today?"}
+        with patch.object(twilio_webhook, "route_user_query", return_value="Standup at 9") as route:
+            first = self.client.post("/twilio", data=data)
+            retry = self.client.post("/twilio", data=data)
+
+        self.assertEqual(route.call_count, 1)
+        self.assertEqual(first.get_data(), retry.get_data())
+        log_test_success("test_retried_delivery_is_not_recomputed")
+
+    def test_async_mode_acks_then_replies(self):
+        log_test_step("Testing that async mode returns an empty ack and sends the reply later")
+        sender = FakeSender()
+        dispatcher = AsyncReplyDispatcher(twilio_webhook.reply_to, sender, workers=1)
+        with patch.object(twilio_webhook, "dispatcher", dispatcher), \
+                patch.object(twilio_webhook, "route_user_query", return_value="Inbox summarized") as route:
+            response = self.client.post("/twilio", data={"From": "+15550003", "To": "+15559999",
+                                                         "MessageSid": "SM1", "Body": "summarize my inbox"})
+            self.assertNotIn("<Message>", response.get_data(as_text=True))
+            self.assertTrue(sender.wait_for(1))
+            dispatcher.shutdown()
+
+        self.assertEqual(sender.sent, [{"to": "+15550003", "from": "+15559999", "body": "Inbox summarized"}])
+        route.assert_called_once_with("summarize my inbox", session_id="+15550003")
+        log_test_success("test_async_mode_acks_then_replies")
+
+    def test_async_mode_sheds_when_busy(self):
+        log_test_step("Testing that a full reply queue answers with a busy message")
+        busy = MagicMock()
+        busy.submit.side_effect = DispatcherBusy("full")
+        with patch.object(twilio_webhook, "dispatcher", busy):
+            response = self.client.post("/twilio", data={"From": "+15550004", "To": "+15559999",
+                                                         "MessageSid": "SM-busy", "Body": "summarize my inbox"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(twilio_webhook.BUSY_REPLY, response.get_data(as_text=True))
+        log_test_success("test_async_mode_sheds_when_busy")
+
+
+if __name__ == "__main__":
+    unittest.main()
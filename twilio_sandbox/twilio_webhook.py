@@ -1,28 +1,126 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import argparse
 from flask import Flask, request, Response
 from twilio.twiml.messaging_response import MessagingResponse
-from core.router_chain import route_and_respond
+from riley2.core.router_chain import route_user_query
 from dotenv import load_dotenv
+from riley2.core.metrics import CONTENT_TYPE, REQUESTS, REQUEST_SECONDS, registry
+from riley2.core.reply_dispatcher import AsyncReplyDispatcher, DispatcherBusy, InboundMessage, make_sender
+from riley2.core.idempotency import IdempotencyCache
+from riley2.core.intent_classifier import get_intent_model
+from riley2.core.logger_utils import logger, shutdown_logging
+from riley2.core.scheduler import FairScheduler, RateLimited
+from riley2.core.serving import DEFAULT_DRAIN_SECONDS, DEFAULT_SERVE_QUEUE, DEFAULT_SERVE_WORKERS, serve
+from riley2.core.tool_registry import TOOL_FUNCTIONS
+from riley2.agents.calendar_agent import get_calendar_sync
 
 load_dotenv()
 
 app = Flask(__name__)
 
+
+RATE_LIMITED_REPLY = "You're sending messages faster than I can keep up. Please wait a minute and try again."
+BUSY_REPLY = "I'm busy with other requests right now. Please try again in a minute."
+
+# Shares the backend fairly between senders and rate-limits any single number
+scheduler = FairScheduler()
+
+
+def reply_to(message):
+    sender = message.from_number or "default"
+    try:
+        # Each sender gets their own session memory
+        return scheduler.run(sender, message.body, lambda: route_user_query(message.body, session_id=sender))
+    except RateLimited as e:
+        logger.warning(str(e))
+        return RATE_LIMITED_REPLY
+
+
+# Async mode acks Twilio straight away and sends the reply out-of-band, so slow
+# pipelines no longer hit the webhook timeout and trigger retries
+ASYNC_REPLIES = os.environ.get('RILEY2_ASYNC_REPLIES', '0') in ('1', 'true', 'True')
+dispatcher = AsyncReplyDispatcher(reply_to, make_sender()) if ASYNC_REPLIES else None
+
+# Twilio retries on timeout with the same MessageSid; retries join the original run
+deliveries = IdempotencyCache(name="twilio_message_sid")
+
 @app.route('/twilio', methods=['POST'])
 def twilio_webhook():
     from_number = request.values.get('From', '')
     body = request.values.get('Body', '')
 
     print(f"👾 Received from Twilio: {from_number} -> {body}")
-    reply = route_and_respond(body)
+    message = InboundMessage(request.values.get('MessageSid', ''), from_number, request.values.get('To', ''), body)
+    if dispatcher:
+        resp = MessagingResponse()
+        try:
+            deliveries.run(message.sid, lambda: dispatcher.submit(message))
+            REQUESTS.labels("/twilio", "queued").inc()
+        except DispatcherBusy:
+            # Shed like the server's accept queue, but tell the sender rather than drop them silently
+            REQUESTS.labels("/twilio", "shed").inc()
+            resp.message(BUSY_REPLY)
+        return Response(str(resp), mimetype='application/xml')
+
+    with REQUEST_SECONDS.labels("/twilio").time():
+        try:
+            reply = deliveries.run(message.sid, lambda: reply_to(message))
+        except Exception:
+            REQUESTS.labels("/twilio", "error").inc()
+            raise
+    REQUESTS.labels("/twilio", "ok").inc()
     print(f"✅ Replying via Twilio: {reply}")
 
     resp = MessagingResponse()
     resp.message(reply)
     return Response(str(resp), mimetype='application/xml')
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+def preload(warm_llm=False):
+    """Load everything the first request would otherwise pay for."""
+    model = get_intent_model()
+    logger.info(f"Preloaded intent model ({len(model.centroids)} intents) and {len(TOOL_FUNCTIONS)} tools")
+    sync = get_calendar_sync()
+    if sync:
+        sync.refresh()
+    if warm_llm:
+        # Ollama loads model weights on first use; a tiny call moves that off the first user
+        from riley2.core.llm_frontend import llm
+        try:
+            llm.invoke("ok")
+            logger.info("Warmed the Ollama model")
+        except Exception as e:
+            logger.warning(f"Could not warm the Ollama model: {e}")
+
+
+def stop_background_work():
+    if dispatcher:
+        dispatcher.shutdown()
+    shutdown_logging()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Riley2 Twilio webhook")
+    parser.add_argument("--host", default=os.environ.get('RILEY2_SERVE_HOST', '127.0.0.1'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('RILEY2_SERVE_PORT', 5000)))
+    parser.add_argument("--workers", type=int, default=DEFAULT_SERVE_WORKERS, help="Request worker threads")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_SERVE_QUEUE,
+                        help="Requests that may wait for a worker before new ones get 503")
+    parser.add_argument("--drain-seconds", type=float, default=DEFAULT_DRAIN_SECONDS,
+                        help="How long shutdown waits for in-flight requests")
+    parser.add_argument("--warm-llm", action="store_true", help="Load the Ollama model before serving")
+    args = parser.parse_args(argv)
+
+    preload(warm_llm=args.warm_llm)
+    serve(app, host=args.host, port=args.port, workers=args.workers, queue_size=args.queue_size,
+          drain_seconds=args.drain_seconds, on_shutdown=stop_background_work)
+
+
 if __name__ == '__main__':
-    app.run(port=5000)
+    main()